@@ -0,0 +1,224 @@
+"""
+Contrôle d'admission et délestage (load shedding) des endpoints de prédiction.
+
+Chaque requête est rattachée à une classe de route (predict, batch, drift)
+qui a sa propre limite de concurrence et de file d'attente. Un budget
+global de concurrence est partagé entre les classes et attribué par
+priorité : predict > batch > drift.
+
+Au-delà des limites la requête reçoit tout de suite un 503 avec
+Retry-After au lieu de s'empiler dans le threadpool uvicorn. Une classe de
+priorité inférieure est aussi refusée dès qu'une classe prioritaire a des
+requêtes en attente.
+
+Configuration par variables d'environnement (X = PREDICT, BATCH, DRIFT) :
+    ADMISSION_X_CONCURRENCY     requêtes simultanées de la classe
+    ADMISSION_X_QUEUE           requêtes en attente de la classe
+    ADMISSION_TOTAL_CONCURRENCY budget global partagé (défaut: 32)
+    ADMISSION_QUEUE_TIMEOUT     attente maximale en secondes (défaut: 2)
+    ADMISSION_RETRY_AFTER       valeur du header Retry-After (défaut: 1)
+"""
+import asyncio
+import json
+import os
+from collections import deque
+from typing import Dict, Optional
+
+# (nom, priorité, concurrence, file) : 0 = plus prioritaire
+DEFAULT_ROUTE_CLASSES = [
+    ("predict", 0, 32, 64),
+    ("batch", 1, 4, 8),
+    ("drift", 2, 1, 2),
+]
+
+# Endpoints de scoring : classe "batch" si le chemin finit par /batch, sinon "predict"
+PREDICT_PREFIXES = ("/predict", "/explain", "/whatif", "/recommend")
+# Endpoints de scoring en masse : toujours en classe "batch"
+BULK_PREFIXES = ("/rank", "/cohorts")
+
+
+class RouteClass:
+    """Limites et compteurs d'une classe de route"""
+
+    def __init__(self, name: str, priority: int, max_concurrency: int, max_queue: int):
+        self.name = name
+        self.priority = priority
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.waiting = deque()
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": len(self.waiting),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+class AdmissionController:
+    """Attribution des créneaux d'exécution par classe et par priorité"""
+
+    def __init__(self, route_classes=DEFAULT_ROUTE_CLASSES, total_concurrency: int = 32,
+                 queue_timeout: float = 2.0, retry_after: int = 1):
+        self.classes: Dict[str, RouteClass] = {
+            name: RouteClass(name, priority, concurrency, queue)
+            for name, priority, concurrency, queue in route_classes
+        }
+        self.total_concurrency = total_concurrency
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.total_in_flight = 0
+
+    @classmethod
+    def from_env(cls):
+        route_classes = [
+            (
+                name,
+                priority,
+                int(os.getenv(f"ADMISSION_{name.upper()}_CONCURRENCY", concurrency)),
+                int(os.getenv(f"ADMISSION_{name.upper()}_QUEUE", queue)),
+            )
+            for name, priority, concurrency, queue in DEFAULT_ROUTE_CLASSES
+        ]
+        return cls(
+            route_classes,
+            total_concurrency=int(os.getenv("ADMISSION_TOTAL_CONCURRENCY", "32")),
+            queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2")),
+            retry_after=int(os.getenv("ADMISSION_RETRY_AFTER", "1")),
+        )
+
+    @staticmethod
+    def classify(path: str) -> Optional[str]:
+        """Classe de route d'un chemin (None = pas de contrôle d'admission)"""
+        if path.startswith(BULK_PREFIXES):
+            return "batch"
+        if path.startswith(PREDICT_PREFIXES):
+            return "batch" if path.endswith("/batch") else "predict"
+        if path.startswith("/drift"):
+            return "drift"
+        return None
+
+    def _higher_priority_waiting(self, route: RouteClass) -> bool:
+        return any(
+            c.waiting for c in self.classes.values() if c.priority < route.priority
+        )
+
+    def _has_slot(self, route: RouteClass) -> bool:
+        return (
+            route.in_flight < route.max_concurrency
+            and self.total_in_flight < self.total_concurrency
+        )
+
+    def _start(self, route: RouteClass):
+        route.in_flight += 1
+        route.admitted += 1
+        self.total_in_flight += 1
+
+    async def acquire(self, name: str) -> bool:
+        """True si la requête peut s'exécuter, False si elle doit être rejetée"""
+        route = self.classes[name]
+
+        if self._higher_priority_waiting(route):
+            route.rejected += 1
+            return False
+
+        if not route.waiting and self._has_slot(route):
+            self._start(route)
+            return True
+
+        if len(route.waiting) >= route.max_queue:
+            route.rejected += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        route.waiting.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # Le créneau a été attribué juste avant l'expiration
+                return True
+            route.waiting.remove(waiter)
+            route.timed_out += 1
+            route.rejected += 1
+            return False
+        except asyncio.CancelledError:
+            # Client déconnecté pendant l'attente : ne pas perdre le créneau
+            if waiter.done():
+                self.release(name)
+            else:
+                route.waiting.remove(waiter)
+            raise
+
+    def release(self, name: str):
+        route = self.classes[name]
+        route.in_flight -= 1
+        self.total_in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Attribue les créneaux libres aux requêtes en attente, par priorité puis FIFO"""
+        for route in sorted(self.classes.values(), key=lambda c: c.priority):
+            while route.waiting and self._has_slot(route):
+                waiter = route.waiting.popleft()
+                if waiter.done():
+                    continue
+                self._start(route)
+                waiter.set_result(True)
+
+    def stats(self) -> dict:
+        return {
+            "total_in_flight": self.total_in_flight,
+            "total_concurrency": self.total_concurrency,
+            "total_queued": sum(len(c.waiting) for c in self.classes.values()),
+            "classes": {name: c.stats() for name, c in self.classes.items()},
+        }
+
+
+class AdmissionMiddleware:
+    """Middleware ASGI : 503 + Retry-After immédiat quand la classe est saturée"""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        name = self.controller.classify(scope["path"])
+        if name is None:
+            return await self.app(scope, receive, send)
+
+        if not await self.controller.acquire(name):
+            return await self._reject(send, name)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name)
+
+    async def _reject(self, send, name: str):
+        body = json.dumps({
+            "detail": "Service overloaded, retry later",
+            "route_class": name,
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.controller.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,366 @@
+"""
+Client Python de l'API Bank Churn.
+
+  - Session HTTP partagée (keep-alive, pool de connexions)
+  - Regroupement automatique des prédictions unitaires en appels
+    /predict/validated/batch (fenêtre de `coalesce_ms`, au plus `max_batch`
+    clients par appel) : un client invalide ne fait échouer que son propre
+    appel (ChurnAPIError 422), pas ceux des autres threads du lot
+  - Découpage des gros lots / DataFrames en morceaux envoyés en parallèle
+    (au plus `max_in_flight` morceaux en vol)
+  - Retries avec backoff exponentiel (+ jitter) sur 503, en respectant
+    l'en-tête Retry-After renvoyé par le contrôle d'admission
+  - Variante asynchrone (httpx) : AsyncChurnClient
+
+Usage :
+    with ChurnClient("http://localhost:8000") as client:
+        client.predict(customer)                 # regroupé avec les appels concurrents
+        client.predict_batch(df)                 # morceaux parallèles, ordre conservé
+"""
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+
+RETRY_STATUS = {503}
+
+
+class ChurnAPIError(Exception):
+    """Réponse en erreur de l'API (après retries)"""
+
+    def __init__(self, status_code: int, detail):
+        super().__init__(f"Erreur API {status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _records(data) -> List[dict]:
+    """Liste de dicts à partir d'une liste ou d'un DataFrame pandas"""
+    if hasattr(data, "to_dict"):
+        return data.to_dict("records")
+    return list(data)
+
+
+def _chunks(records: List[dict], size: int) -> List[List[dict]]:
+    return [records[i:i + size] for i in range(0, len(records), size)]
+
+
+def _retry_delay(attempt: int, backoff: float, max_backoff: float, retry_after: Optional[str]) -> float:
+    """Backoff exponentiel avec jitter, jamais inférieur à Retry-After"""
+    delay = min(max_backoff, backoff * (2 ** attempt)) * random.uniform(0.5, 1.0)
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+    return delay
+
+
+def _detail(response):
+    try:
+        return response.json().get("detail", response.text)
+    except ValueError:
+        return response.text
+
+
+def _row_outcomes(results: List[dict]) -> list:
+    """Résultats de /predict/validated/batch : prédiction ou ChurnAPIError par ligne"""
+    outcomes = []
+    for result in results:
+        if "errors" in result:
+            outcomes.append(ChurnAPIError(422, result["errors"]))
+        else:
+            # risk_level vient du serveur (probabilité non arrondie), comme /predict
+            outcomes.append({k: v for k, v in result.items() if k != "index"})
+    return outcomes
+
+
+class _Coalescer:
+    """
+    Regroupe les prédictions unitaires de plusieurs threads en un appel batch.
+    send_batch renvoie, pour chaque ligne, une prédiction ou une exception
+    transmise au seul appelant concerné.
+    """
+
+    def __init__(self, send_batch, max_batch: int, window_s: float):
+        self.send_batch = send_batch
+        self.max_batch = max_batch
+        self.window_s = window_s
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+
+    def submit(self, features: dict) -> Future:
+        future = Future()
+        batch = None
+        with self._lock:
+            self._pending.append((features, future))
+            if len(self._pending) >= self.max_batch:
+                batch = self._take()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window_s, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self._send(batch)
+        return future
+
+    def _take(self):
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def flush(self):
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._send(batch)
+
+    def _send(self, batch):
+        try:
+            outcomes = self.send_batch([features for features, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), outcome in zip(batch, outcomes):
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+
+class ChurnClient:
+    """Client synchrone (requests) de l'API"""
+
+    def __init__(self, base_url: str, timeout: float = 30, max_retries: int = 4,
+                 backoff: float = 0.2, max_backoff: float = 5.0, pool_size: int = 10,
+                 chunk_size: int = 500, max_in_flight: int = 4,
+                 coalesce: bool = True, coalesce_ms: float = 5, max_batch: int = 256):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url.strip().rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.chunk_size = chunk_size
+        self.max_in_flight = max_in_flight
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._connection_errors = (requests.ConnectionError,)
+
+        self._executor = ThreadPoolExecutor(max_in_flight, thread_name_prefix="churn-client")
+        self._coalescer = _Coalescer(self._send_coalesced, max_batch, coalesce_ms / 1000) if coalesce else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._coalescer is not None:
+            self._coalescer.flush()
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    # ---------------------------------------------------------- bas niveau
+
+    def request(self, method: str, path: str, **kwargs):
+        """Requête avec retries sur 503 / erreur de connexion ; renvoie la dernière réponse"""
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+            except self._connection_errors:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(_retry_delay(attempt, self.backoff, self.max_backoff, None))
+                continue
+            if response.status_code not in RETRY_STATUS or attempt == self.max_retries:
+                return response
+            time.sleep(_retry_delay(attempt, self.backoff, self.max_backoff,
+                                    response.headers.get("Retry-After")))
+        return response
+
+    def _json(self, method: str, path: str, **kwargs):
+        response = self.request(method, path, **kwargs)
+        if response.status_code != 200:
+            raise ChurnAPIError(response.status_code, _detail(response))
+        return response.json()
+
+    # ---------------------------------------------------------- endpoints
+
+    def health(self) -> bool:
+        try:
+            return self.request("GET", "/health", timeout=5).status_code == 200
+        except Exception:
+            return False
+
+    def predict(self, features: dict) -> dict:
+        """Prédiction unitaire ; regroupée avec les appels concurrents si coalesce=True"""
+        if self._coalescer is None:
+            return self._json("POST", "/predict", json=features)
+        return self._coalescer.submit(features).result()
+
+    def _send_coalesced(self, records: List[dict]) -> list:
+        return _row_outcomes(self._json("POST", "/predict/validated/batch", json=records)["results"])
+
+    def _send_batch(self, records: List[dict]) -> List[dict]:
+        return self._json("POST", "/predict/batch", json=records)["predictions"]
+
+    def predict_batch(self, data) -> List[dict]:
+        """Prédictions d'une liste ou d'un DataFrame : morceaux en parallèle, ordre conservé"""
+        chunks = _chunks(_records(data), self.chunk_size)
+        if len(chunks) <= 1:
+            return self._send_batch(chunks[0]) if chunks else []
+        results = self._executor.map(self._send_batch, chunks)
+        return [prediction for chunk in results for prediction in chunk]
+
+    def drift_check(self, threshold: float = 0.05) -> dict:
+        return self._json("POST", "/drift/check", params={"threshold": threshold})
+
+    def drift_alert(self, message: str = "Manual drift alert triggered", severity: str = "warning") -> dict:
+        return self._json("POST", "/drift/alert", params={"message": message, "severity": severity})
+
+
+class AsyncChurnClient:
+    """Client asynchrone (httpx) de l'API, mêmes fonctionnalités que ChurnClient"""
+
+    def __init__(self, base_url: str, timeout: float = 30, max_retries: int = 4,
+                 backoff: float = 0.2, max_backoff: float = 5.0, pool_size: int = 10,
+                 chunk_size: int = 500, max_in_flight: int = 4,
+                 coalesce: bool = True, coalesce_ms: float = 5, max_batch: int = 256):
+        import httpx
+
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.chunk_size = chunk_size
+        self.max_in_flight = max_in_flight
+        self.coalesce = coalesce
+        self.coalesce_s = coalesce_ms / 1000
+        self.max_batch = max_batch
+
+        self.http = httpx.AsyncClient(
+            base_url=base_url.strip().rstrip("/"),
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+        self._connection_errors = (httpx.TransportError,)
+        self._pending = []
+        self._flush_handle = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.flush()
+        await self.http.aclose()
+
+    # ---------------------------------------------------------- bas niveau
+
+    async def request(self, method: str, path: str, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self.http.request(method, path, **kwargs)
+            except self._connection_errors:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(_retry_delay(attempt, self.backoff, self.max_backoff, None))
+                continue
+            if response.status_code not in RETRY_STATUS or attempt == self.max_retries:
+                return response
+            await asyncio.sleep(_retry_delay(attempt, self.backoff, self.max_backoff,
+                                             response.headers.get("Retry-After")))
+        return response
+
+    async def _json(self, method: str, path: str, **kwargs):
+        response = await self.request(method, path, **kwargs)
+        if response.status_code != 200:
+            raise ChurnAPIError(response.status_code, _detail(response))
+        return response.json()
+
+    # ---------------------------------------------------------- endpoints
+
+    async def health(self) -> bool:
+        try:
+            return (await self.request("GET", "/health", timeout=5)).status_code == 200
+        except Exception:
+            return False
+
+    async def predict(self, features: dict) -> dict:
+        """Prédiction unitaire ; regroupée avec les appels concurrents si coalesce=True"""
+        if not self.coalesce:
+            return await self._json("POST", "/predict", json=features)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((features, future))
+        if len(self._pending) >= self.max_batch:
+            await self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self.coalesce_s, lambda: asyncio.ensure_future(self.flush())
+            )
+        return await future
+
+    async def flush(self):
+        """Envoie immédiatement les prédictions unitaires en attente"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        try:
+            outcomes = await self._send_coalesced([features for features, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), outcome in zip(batch, outcomes):
+            if future.done():
+                continue
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+    async def _send_coalesced(self, records: List[dict]) -> list:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        async with self._semaphore:
+            results = (await self._json("POST", "/predict/validated/batch", json=records))["results"]
+        return _row_outcomes(results)
+
+    async def _send_batch(self, records: List[dict]) -> List[dict]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        async with self._semaphore:
+            return (await self._json("POST", "/predict/batch", json=records))["predictions"]
+
+    async def predict_batch(self, data) -> List[dict]:
+        """Prédictions d'une liste ou d'un DataFrame : morceaux concurrents, ordre conservé"""
+        chunks = _chunks(_records(data), self.chunk_size)
+        results = await asyncio.gather(*[self._send_batch(chunk) for chunk in chunks])
+        return [prediction for chunk in results for prediction in chunk]
+
+    async def drift_check(self, threshold: float = 0.05) -> dict:
+        return await self._json("POST", "/drift/check", params={"threshold": threshold})
+
+    async def drift_alert(self, message: str = "Manual drift alert triggered", severity: str = "warning") -> dict:
+        return await self._json("POST", "/drift/alert", params={"message": message, "severity": severity})
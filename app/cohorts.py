@@ -0,0 +1,97 @@
+"""
+Analyse par cohortes d'une population scorée.
+
+Agrégats par segment (Geography, NumOfProducts, IsActiveMember, tranche
+d'âge) : effectif, churn prédit, probabilité moyenne et répartition par
+niveau de risque.
+
+Tous les segments de toutes les dimensions sont calculés en une passe :
+chaque ligne reçoit un code de segment par dimension (décalé pour que les
+codes soient uniques entre dimensions), puis un np.bincount pondéré par
+mesure agrège toutes les dimensions à la fois. Aucune boucle Python par ligne.
+"""
+from typing import Dict
+
+import numpy as np
+
+from app.utils import DECISION_THRESHOLD, FEATURE_COLUMNS, HIGH_RISK_THRESHOLD, LOW_RISK_THRESHOLD
+
+GEOGRAPHIES = ["France", "Germany", "Spain"]
+# Mêmes tranches que train_model_mod.py (intervalles fermés à droite)
+AGE_BINS = [0, 25, 35, 45, 55, 65, 100]
+AGE_BANDS = ["<=25", "25-35", "35-45", "45-55", "55-65", "65+"]
+NUM_PRODUCTS = [1, 2, 3, 4]
+
+MEASURES = ["count", "churn", "probability", "Low", "Medium", "High"]
+
+
+def _col(X: np.ndarray, name: str) -> np.ndarray:
+    return X[:, FEATURE_COLUMNS.index(name)]
+
+
+def segment_codes(X: np.ndarray):
+    """
+    Code de segment de chaque ligne pour chaque dimension.
+
+    Returns:
+        (codes (n, n_dimensions), {dimension: libellés des segments})
+    """
+    # France = aucune des deux indicatrices ; Germany prioritaire si les deux sont à 1
+    germany = _col(X, "Geography_Germany") == 1
+    spain = _col(X, "Geography_Spain") == 1
+    geography = np.where(germany, 1, np.where(spain, 2, 0))
+
+    products = np.clip(_col(X, "NumOfProducts").astype(np.int64), 1, 4) - 1
+    active = (_col(X, "IsActiveMember") == 1).astype(np.int64)
+    age = np.clip(np.digitize(_col(X, "Age"), AGE_BINS, right=True) - 1, 0, len(AGE_BANDS) - 1)
+
+    labels = {
+        "Geography": GEOGRAPHIES,
+        "NumOfProducts": [str(n) for n in NUM_PRODUCTS],
+        "IsActiveMember": ["0", "1"],
+        "AgeBand": AGE_BANDS,
+    }
+    return np.column_stack([geography, products, active, age]), labels
+
+
+def cohort_breakdown(X: np.ndarray, probas: np.ndarray, decimals: int = 4) -> Dict:
+    """Agrégats globaux et par segment en une passe vectorisée"""
+    codes, labels = segment_codes(X)
+    sizes = np.array([len(values) for values in labels.values()])
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    values = np.column_stack([
+        np.ones(len(probas)),
+        probas > DECISION_THRESHOLD,
+        probas,
+        probas < LOW_RISK_THRESHOLD,
+        (probas >= LOW_RISK_THRESHOLD) & (probas < HIGH_RISK_THRESHOLD),
+        probas >= HIGH_RISK_THRESHOLD,
+    ]).astype(np.float64)
+
+    # Une ligne compte une fois dans chaque dimension : codes aplatis + mesures répétées
+    flat = (codes + offsets).ravel()
+    repeated = np.repeat(values, codes.shape[1], axis=0)
+    sums = np.column_stack([
+        np.bincount(flat, weights=repeated[:, j], minlength=int(sizes.sum()))
+        for j in range(len(MEASURES))
+    ])
+
+    def summarize(row):
+        count = int(row[0])
+        return {
+            "count": count,
+            "churn_count": int(row[1]),
+            "churn_rate": round(row[1] / count, decimals) if count else None,
+            "mean_probability": round(row[2] / count, decimals) if count else None,
+            "risk_levels": {level: int(row[3 + i]) for i, level in enumerate(["Low", "Medium", "High"])},
+        }
+
+    cohorts = {
+        dimension: {
+            label: summarize(sums[offset + i])
+            for i, label in enumerate(segment_labels)
+        }
+        for (dimension, segment_labels), offset in zip(labels.items(), offsets)
+    }
+    return {"overall": summarize(values.sum(axis=0)), "cohorts": cohorts}
@@ -0,0 +1,192 @@
+"""
+Recherche contrefactuelle d'actions de rétention.
+
+Pour un client au-dessus du seuil Low (0.3), on cherche le plus petit
+changement réaliste sur les features actionnables (activer le membre,
+ajouter un produit, changer la possession de carte) qui ramène la
+probabilité de churn sous le seuil.
+
+Recherche par niveaux : niveau k = exactement k features modifiées.
+  - Au niveau k, tous les candidats de tous les clients encore non résolus
+    sont construits dans une seule matrice et scorés en un appel vectorisé.
+  - Un client résolu au niveau k n'est plus évalué aux niveaux suivants :
+    tout sur-ensemble de ses changements est dominé (plus de changements).
+  - Parmi les candidats qui atteignent la cible, seuls ceux non dominés sur
+    (coût, probabilité) sont proposés.
+  - Un budget de temps par client borne la recherche. Le temps de chaque
+    appel vectorisé est imputé aux clients au prorata de leurs candidats :
+    un client coûteux épuise son propre budget, pas celui des autres. Un
+    client hors budget est marqué budget_exhausted avec le meilleur
+    candidat trouvé ; not_found signifie que tous les niveaux ont été évalués.
+"""
+import time
+from itertools import combinations, product
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.models import FEATURE_BOUNDS
+from app.utils import FEATURE_COLUMNS, LOW_RISK_THRESHOLD
+
+# Features actionnables et sens de changement autorisé
+ACTIONABLE_FEATURES = {
+    "IsActiveMember": "increase",   # réactiver le client
+    "NumOfProducts": "increase",    # ajouter un produit
+    "HasCrCard": "any",             # proposer / retirer une carte
+}
+
+# Nombre maximal de lignes candidates scorées en un appel
+MAX_CANDIDATE_ROWS = 200_000
+
+
+def _feature_values(name: str) -> np.ndarray:
+    ge, le = FEATURE_BOUNDS[name]
+    return np.arange(ge, le + 1, dtype=np.float64)
+
+
+def level_templates(features: List[str], k: int):
+    """
+    Tous les changements de exactement k features parmi `features`.
+
+    Returns:
+        (masque (T, n_features) des colonnes modifiées, valeurs cibles (T, n_features))
+    """
+    masks, values = [], []
+    for subset in combinations(features, k):
+        cols = [FEATURE_COLUMNS.index(name) for name in subset]
+        for assignment in product(*[_feature_values(name) for name in subset]):
+            mask = np.zeros(len(FEATURE_COLUMNS), dtype=bool)
+            vals = np.zeros(len(FEATURE_COLUMNS))
+            mask[cols] = True
+            vals[cols] = assignment
+            masks.append(mask)
+            values.append(vals)
+    return np.array(masks), np.array(values)
+
+
+class CounterfactualSearch:
+    """Recherche vectorisée, par niveaux, de la plus petite action de rétention"""
+
+    def __init__(self, predict_fn, actionable: Optional[List[str]] = None,
+                 target: float = LOW_RISK_THRESHOLD, max_alternatives: int = 3):
+        actionable = list(actionable or ACTIONABLE_FEATURES)
+        unknown = [name for name in actionable if name not in ACTIONABLE_FEATURES]
+        if unknown:
+            raise ValueError(f"Features non actionnables: {unknown}")
+        self.predict_fn = predict_fn
+        self.actionable = actionable
+        self.target = target
+        self.max_alternatives = max_alternatives
+
+        self.directions = np.zeros(len(FEATURE_COLUMNS))
+        self.ranges = np.ones(len(FEATURE_COLUMNS))
+        for name in actionable:
+            col = FEATURE_COLUMNS.index(name)
+            self.directions[col] = 1 if ACTIONABLE_FEATURES[name] == "increase" else 0
+            ge, le = FEATURE_BOUNDS[name]
+            self.ranges[col] = le - ge
+
+    def _valid(self, current: np.ndarray, mask: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """(P, T) : chaque feature masquée change réellement et dans le sens autorisé"""
+        delta = values[None, :, :] - current[:, None, :]
+        changed = delta != 0
+        allowed = (self.directions == 0) | (delta * self.directions > 0)
+        return np.all(~mask[None] | (changed & allowed), axis=2)
+
+    def search(self, X: np.ndarray, budget_s: float) -> List[Dict]:
+        """Recherche pour chaque ligne de X, dans un budget de `budget_s` secondes par client"""
+        scoring_start = time.perf_counter()
+        current_probas = self.predict_fn(X)
+        # Temps de recherche imputé à chaque client ; le scoring initial est partagé également
+        spent = np.full(len(X), (time.perf_counter() - scoring_start) / max(len(X), 1))
+        results = [
+            {
+                "status": "already_low" if p < self.target else "not_found",
+                "current_probability": round(float(p), 4),
+                "recommendation": None,
+                "alternatives": [],
+                "candidates_evaluated": 0,
+            }
+            for p in current_probas
+        ]
+        best = {}   # meilleur candidat (plus faible probabilité) des clients non résolus
+        pending = np.flatnonzero(current_probas >= self.target)
+
+        for k in range(1, len(self.actionable) + 1):
+            exhausted = pending[spent[pending] >= budget_s]
+            for i in exhausted:
+                results[i]["status"] = "budget_exhausted"
+            pending = np.setdiff1d(pending, exhausted)
+            if pending.size == 0:
+                break
+
+            mask, values = level_templates(self.actionable, k)
+            chunk = max(1, MAX_CANDIDATE_ROWS // len(mask))
+            resolved = []
+            for start in range(0, len(pending), chunk):
+                rows = pending[start:start + chunk]
+                resolved.extend(self._evaluate_level(X, rows, mask, values, k, results, best, spent))
+            pending = np.setdiff1d(pending, resolved)
+
+        for i, candidate in best.items():
+            if results[i]["recommendation"] is None:
+                results[i]["recommendation"] = candidate
+        return results
+
+    def _evaluate_level(self, X, rows, mask, values, k, results, best, spent):
+        start = time.perf_counter()
+        current = X[rows]
+        valid = self._valid(current, mask, values)
+        owner, template = np.nonzero(valid)
+        if owner.size == 0:
+            return []
+
+        candidates = np.where(mask[template], values[template], current[owner])
+        probas = self.predict_fn(candidates)
+        cost = (np.abs(candidates - current[owner]) / self.ranges).sum(axis=1)
+
+        # np.nonzero parcourt `valid` ligne par ligne : owner est trié, les
+        # candidats d'une ligne forment une plage contiguë (coût linéaire)
+        counts = np.bincount(owner, minlength=len(rows))
+        bounds = np.concatenate([[0], np.cumsum(counts)])
+
+        resolved = []
+        for local, i in enumerate(rows):
+            sel = np.arange(bounds[local], bounds[local + 1])
+            results[i]["candidates_evaluated"] += len(sel)
+            if sel.size == 0:
+                continue
+            success = sel[probas[sel] < self.target]
+            if success.size == 0:
+                lowest = sel[np.argmin(probas[sel])]
+                if i not in best or probas[lowest] < best[i]["churn_probability"]:
+                    best[i] = self._describe(X[i], candidates[lowest], probas[lowest], k)
+                continue
+
+            # Front de Pareto (coût, probabilité) parmi les candidats qui atteignent la cible
+            order = success[np.lexsort((probas[success], cost[success]))]
+            front, lowest_proba = [], np.inf
+            for c in order:
+                if probas[c] < lowest_proba:
+                    front.append(c)
+                    lowest_proba = probas[c]
+            described = [self._describe(X[i], candidates[c], probas[c], k) for c in front]
+            results[i].update({
+                "status": "found",
+                "recommendation": described[0],
+                "alternatives": described[1:1 + self.max_alternatives],
+            })
+            best.pop(i, None)
+            resolved.append(i)
+
+        # Temps du lot imputé au prorata des candidats de chaque ligne
+        spent[rows] += (time.perf_counter() - start) * counts / owner.size
+        return resolved
+
+    @staticmethod
+    def _describe(original, candidate, proba, k):
+        changes = {
+            FEATURE_COLUMNS[col]: {"from": float(original[col]), "to": float(candidate[col])}
+            for col in np.flatnonzero(candidate != original)
+        }
+        return {"changes": changes, "n_changes": k, "churn_probability": round(float(proba), 4)}
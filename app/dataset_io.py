@@ -0,0 +1,157 @@
+"""
+Lecture / écriture des datasets (data/bank_churn.csv, data/production_data.csv, ...).
+
+Format colonnaire parquet (pyarrow, compressé) quand il est disponible, avec
+repli transparent sur le CSV :
+  - read_dataset("data/bank_churn.csv") lit data/bank_churn.parquet s'il
+    existe, que pyarrow est installé et qu'il n'est pas plus ancien que le
+    CSV (un CSV régénéré ou ré-uploadé reste prioritaire) ; sinon le CSV
+  - projection de colonnes : seules les colonnes demandées sont lues
+    (parquet : colonnes physiquement séparées ; CSV : usecols)
+  - iter_dataset : itération par row groups / chunks en mémoire bornée
+  - write_dataset : format choisi par l'extension, écriture atomique
+  - convert_to_parquet : conversion unique d'un CSV existant (convert_datasets.py)
+"""
+import os
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+PARQUET_SUFFIX = ".parquet"
+CSV_SUFFIX = ".csv"
+DEFAULT_COMPRESSION = "zstd"
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def require_pyarrow():
+    if not HAS_PYARROW:
+        raise RuntimeError("Le format parquet nécessite pyarrow (pip install pyarrow)")
+
+
+def parquet_sibling(path) -> Path:
+    return Path(path).with_suffix(PARQUET_SUFFIX)
+
+
+def csv_sibling(path) -> Path:
+    return Path(path).with_suffix(CSV_SUFFIX)
+
+
+def resolve_dataset(path) -> Path:
+    """
+    Fichier réellement lu pour `path` (avec ou sans extension) : parquet si
+    lisible et à jour, sinon CSV. FileNotFoundError si aucun n'existe.
+    """
+    path = Path(path)
+    parquet, csv = parquet_sibling(path), csv_sibling(path)
+    parquet_ok = HAS_PYARROW and parquet.exists()
+    if path.suffix == PARQUET_SUFFIX:
+        if not path.exists():
+            raise FileNotFoundError(f"Dataset introuvable: {path}")
+        require_pyarrow()
+        return path
+    if parquet_ok and (not csv.exists() or parquet.stat().st_mtime >= csv.stat().st_mtime):
+        return parquet
+    if csv.exists():
+        return csv
+    if path.exists():
+        return path
+    raise FileNotFoundError(f"Dataset introuvable: {path}")
+
+
+def dataset_exists(path) -> bool:
+    try:
+        resolve_dataset(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def is_parquet(path) -> bool:
+    return Path(path).suffix == PARQUET_SUFFIX
+
+
+def dataset_columns(path) -> List[str]:
+    """Noms des colonnes sans lire les données (schéma parquet ou en-tête CSV)"""
+    resolved = resolve_dataset(path)
+    if is_parquet(resolved):
+        return list(pq.read_schema(resolved).names)
+    return list(pd.read_csv(resolved, nrows=0).columns)
+
+
+def read_dataset(path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """DataFrame complet, limité aux `columns` si précisées"""
+    resolved = resolve_dataset(path)
+    if is_parquet(resolved):
+        return pq.read_table(resolved, columns=columns).to_pandas()
+    return pd.read_csv(resolved, usecols=columns)
+
+
+def iter_dataset(path, columns: Optional[List[str]] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Morceaux de `chunk_size` lignes au plus, dans l'ordre du fichier"""
+    resolved = resolve_dataset(path)
+    if is_parquet(resolved):
+        parquet_file = pq.ParquetFile(resolved)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+        return
+    yield from pd.read_csv(resolved, usecols=columns, chunksize=chunk_size)
+
+
+def write_dataset(df: pd.DataFrame, path, compression: str = DEFAULT_COMPRESSION,
+                  row_group_size: Optional[int] = None) -> Path:
+    """Écrit df en parquet (extension .parquet) ou CSV ; un fichier visible est toujours complet"""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    if is_parquet(path):
+        require_pyarrow()
+        df.to_parquet(tmp_path, engine="pyarrow", compression=compression, index=False,
+                      row_group_size=row_group_size)
+    else:
+        df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def convert_to_parquet(csv_path, parquet_path=None, compression: str = DEFAULT_COMPRESSION,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """
+    Convertit un CSV en parquet par morceaux (un row group par morceau).
+    Le schéma du premier morceau est imposé aux suivants.
+    """
+    require_pyarrow()
+    csv_path = Path(csv_path)
+    parquet_path = Path(parquet_path) if parquet_path else parquet_sibling(csv_path)
+    tmp_path = parquet_path.with_name(parquet_path.name + ".tmp")
+
+    writer, schema, rows = None, None, 0
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+            if writer is None:
+                schema = pyarrow.Schema.from_pandas(chunk, preserve_index=False)
+                writer = pq.ParquetWriter(tmp_path, schema, compression=compression)
+            writer.write_table(pyarrow.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        # CSV sans ligne : parquet vide avec les colonnes de l'en-tête
+        pd.read_csv(csv_path).to_parquet(tmp_path, engine="pyarrow", compression=compression, index=False)
+    os.replace(tmp_path, parquet_path)
+
+    return {
+        "source": str(csv_path),
+        "output": str(parquet_path),
+        "rows": rows,
+        "csv_bytes": csv_path.stat().st_size,
+        "parquet_bytes": parquet_path.stat().st_size,
+    }
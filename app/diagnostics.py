@@ -0,0 +1,91 @@
+"""
+Instantané des ressources du processus API, pour le soak test (soak_test.py).
+
+Couvre les causes probables de croissance mémoire sur plusieurs jours :
+  - RSS du processus et tas Python (tracemalloc, si activé)
+  - descripteurs de fichiers ouverts et threads
+  - figures matplotlib non fermées (drift_detect)
+  - handlers de logging accumulés (AzureLogHandler, ...)
+  - rapports de drift accumulés dans drift_reports/
+"""
+import gc
+import logging
+import os
+import sys
+import threading
+import tracemalloc
+from pathlib import Path
+
+
+def process_rss_bytes():
+    """RSS courant (Linux /proc), sinon pic de RSS via resource"""
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        return None
+
+
+def open_fd_count():
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        if os.path.isdir(fd_dir):
+            return len(os.listdir(fd_dir))
+    return None
+
+
+def matplotlib_figure_count() -> int:
+    """Figures ouvertes ; 0 si pyplot n'a jamais été importé (import paresseux)"""
+    plt = sys.modules.get("matplotlib.pyplot")
+    return len(plt.get_fignums()) if plt is not None else 0
+
+
+def logging_handler_counts() -> dict:
+    counts = {"root": len(logging.getLogger().handlers)}
+    for name, candidate in logging.Logger.manager.loggerDict.items():
+        if isinstance(candidate, logging.Logger) and candidate.handlers:
+            counts[name] = len(candidate.handlers)
+    return counts
+
+
+def directory_stats(directory) -> dict:
+    path = Path(directory)
+    files = [p for p in path.iterdir() if p.is_file()] if path.is_dir() else []
+    return {"files": len(files), "bytes": sum(p.stat().st_size for p in files)}
+
+
+def tracemalloc_stats(top: int = 10):
+    if not tracemalloc.is_tracing():
+        return None
+    current, peak = tracemalloc.get_traced_memory()
+    statistics = tracemalloc.take_snapshot().statistics("lineno")[:top]
+    return {
+        "current_bytes": current,
+        "peak_bytes": peak,
+        "top": [
+            {"location": str(stat.traceback[0]), "size_bytes": stat.size, "count": stat.count}
+            for stat in statistics
+        ],
+    }
+
+
+def memory_snapshot(drift_reports_dir, top: int = 10) -> dict:
+    handlers = logging_handler_counts()
+    return {
+        "rss_bytes": process_rss_bytes(),
+        "open_fds": open_fd_count(),
+        "threads": threading.active_count(),
+        "gc_counts": list(gc.get_count()),
+        "matplotlib_figures": matplotlib_figure_count(),
+        "logging_handlers": handlers,
+        "logging_handlers_total": sum(handlers.values()),
+        "drift_reports": directory_stats(drift_reports_dir),
+        "tracemalloc": tracemalloc_stats(top),
+    }
@@ -3,26 +3,21 @@ Détection de Data Drift avec visualisations et alertes
 Compatible API / Docker / Azure
 """
 
-# =========================
-# BACKEND MATPLOTLIB SAFE
-# =========================
-from typing import Optional
-import matplotlib
-matplotlib.use("Agg")
-
 # =========================
 # IMPORTS
 # =========================
-import pandas as pd
+# matplotlib / seaborn sont importés dans create_drift_visualizations :
+# ils ne coûtent rien au démarrage de l'API tant qu'aucun graphique n'est produit
+from typing import Optional
 import numpy as np
 from scipy.stats import ks_2samp, chi2_contingency
 import json
 from datetime import datetime
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
 import os
 
+from app.dataset_io import dataset_columns, dataset_exists, read_dataset
+
 # =========================
 # PATHS ROBUSTES
 # =========================
@@ -38,10 +33,12 @@ def detect_drift(
     reference_file: str,
     production_file: str,
     threshold: float = 0.05,
-    output_dir: Optional[Path] = None
+    output_dir: Optional[Path] = None,
+    plot: bool = True
 ):
     """
     Détecte le drift entre données de référence et production
+    (plot=False : pas de graphiques, seulement le rapport JSON)
     """
 
     # -------- Paths sécurisés
@@ -54,16 +51,18 @@ def detect_drift(
     reference_file = Path(reference_file)
     production_file = Path(production_file)
 
-    # -------- Vérification fichiers
-    if not reference_file.exists():
+    # -------- Vérification fichiers (parquet voisin ou CSV, voir app/dataset_io.py)
+    if not dataset_exists(reference_file):
         raise FileNotFoundError(f"Fichier de référence introuvable: {reference_file}")
 
-    if not production_file.exists():
+    if not dataset_exists(production_file):
         raise FileNotFoundError(f"Fichier de production introuvable: {production_file}")
 
-    # -------- Chargement données
-    ref_data = pd.read_csv(reference_file)
-    prod_data = pd.read_csv(production_file)
+    # -------- Chargement données : seulement les colonnes communes, hors cible
+    prod_columns = set(dataset_columns(production_file))
+    columns = [c for c in dataset_columns(reference_file) if c in prod_columns and c != "Exited"]
+    ref_data = read_dataset(reference_file, columns=columns)
+    prod_data = read_dataset(production_file, columns=columns)
 
     drift_results = {}
     continuous_features = []
@@ -140,13 +139,14 @@ def detect_drift(
     # =========================
     # VISUALISATIONS
     # =========================
-    create_drift_visualizations(
-        ref_data,
-        prod_data,
-        drift_results,
-        continuous_features,
-        output_dir,
-    )
+    if plot:
+        create_drift_visualizations(
+            ref_data,
+            prod_data,
+            drift_results,
+            continuous_features,
+            output_dir,
+        )
 
     # =========================
     # SAUVEGARDE RAPPORT JSON
@@ -180,6 +180,11 @@ def create_drift_visualizations(
     """
     Crée les graphiques de drift
     """
+    # -------- Backend matplotlib safe (import différé)
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
     # -------- Distributions
     if continuous_features:
@@ -0,0 +1,139 @@
+"""
+Évaluation anticipée (early exit) de la forêt pour le scoring par niveau de risque.
+
+Les arbres sont évalués par lots de taille croissante. Après m arbres sur T,
+la moyenne finale est encadrée par :
+  - une borne déterministe : les T - m arbres restants valent entre 0 et 1
+  - une borne de Hoeffding-Serfling (tirage sans remise) : les arbres sont
+    évalués dans une permutation aléatoire fixe, les m premiers sont donc un
+    échantillon sans remise des T, même pour une forêt dont l'ordre stocké
+    n'est pas échangeable (warm start de retrain_incremental.py : anciens
+    arbres en tête, nouveaux en fin)
+  - `delta` est réparti sur les contrôles intermédiaires (delta / nombre de
+    contrôles) : la garantie tient pour l'ensemble des sorties anticipées
+Dès que l'intervalle ne contient plus aucune frontière (0.3, 0.5, 0.7), le
+niveau de risque et la prédiction binaire sont fixés et la ligne sort.
+
+Le mode par défaut de l'API (/predict) reste la probabilité exacte.
+"""
+import math
+import threading
+
+import numpy as np
+
+from app.utils import (
+    DECISION_THRESHOLD,
+    HIGH_RISK_THRESHOLD,
+    LOW_RISK_THRESHOLD,
+    is_binary_forest,
+    node_positive_proba,
+)
+
+TIER_BOUNDARIES = np.array([LOW_RISK_THRESHOLD, DECISION_THRESHOLD, HIGH_RISK_THRESHOLD])
+
+
+def supports_early_exit(model) -> bool:
+    """Seules les forêts sklearn binaires exposent des arbres évaluables un par un"""
+    return is_binary_forest(model)
+
+
+class EarlyExitScorer:
+    """
+    Scoreur early-exit d'une forêt.
+
+    La probabilité de la classe 1 de chaque noeud est précalculée une fois :
+    évaluer un arbre revient alors à `tree_.apply` + une indexation.
+    """
+
+    def __init__(self, forest, delta: float = 0.01, first_batch: int = 8, growth: float = 2.0,
+                 seed: int = 0):
+        if not supports_early_exit(forest):
+            raise ValueError("Early exit disponible uniquement pour une forêt binaire entraînée")
+        self.forest = forest
+        self.delta = delta
+        self.first_batch = first_batch
+        self.growth = growth
+        # Ordre d'évaluation : permutation fixe, tirée une fois
+        self.order = np.random.default_rng(seed).permutation(len(forest.estimators_))
+        self.trees = [forest.estimators_[i].tree_ for i in self.order]
+        self.node_proba = [node_positive_proba(tree) for tree in self.trees]
+        # Union sur les contrôles avant T (à m = T l'intervalle est exact)
+        n_checks = sum(1 for end in self._batch_ends() if end < self.n_trees)
+        self.check_delta = delta / max(n_checks, 1)
+
+        # Statistiques cumulées (lues par l'endpoint /predict/tier/stats)
+        self._lock = threading.Lock()
+        self.rows_scored = 0
+        self.trees_evaluated = 0
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.trees)
+
+    def _batch_ends(self):
+        """Indices de fin des lots successifs : 8, 24, 56, ... jusqu'à T"""
+        end, size = 0, self.first_batch
+        while end < self.n_trees:
+            end = min(end + int(size), self.n_trees)
+            yield end
+            size *= self.growth
+
+    def _bounds(self, sums: np.ndarray, m: int):
+        """Intervalle [lo, hi] contenant la moyenne finale des T arbres"""
+        T = self.n_trees
+        mean = sums / m
+        lo = sums / T
+        hi = (sums + (T - m)) / T
+        if m < T:
+            eps = math.sqrt((1 - (m - 1) / T) * math.log(2 / self.check_delta) / (2 * m))
+            lo = np.maximum(lo, mean - eps)
+            hi = np.minimum(hi, mean + eps)
+        return lo, hi
+
+    def predict(self, X: np.ndarray):
+        """
+        Score X en early exit.
+
+        Returns:
+            (probabilité estimée, nombre d'arbres évalués) par ligne. Pour
+            les lignes sorties tôt la probabilité est la moyenne partielle,
+            du même côté de chaque frontière que la moyenne exacte.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n = X.shape[0]
+        sums = np.zeros(n)
+        evaluated = np.zeros(n, dtype=np.int64)
+        active = np.arange(n)
+        start = 0
+
+        for end in self._batch_ends():
+            X_active = X[active]
+            partial = np.zeros(len(active))
+            for tree, node_proba in zip(self.trees[start:end], self.node_proba[start:end]):
+                partial += node_proba[tree.apply(X_active)]
+            sums[active] += partial
+            evaluated[active] = end
+            start = end
+
+            lo, hi = self._bounds(sums[active], end)
+            # Une frontière b est exclue si tout l'intervalle est strictement d'un côté
+            crosses = (lo[:, None] <= TIER_BOUNDARIES) & (hi[:, None] >= TIER_BOUNDARIES)
+            active = active[crosses.any(axis=1)]
+            if active.size == 0:
+                break
+
+        with self._lock:
+            self.rows_scored += n
+            self.trees_evaluated += int(evaluated.sum())
+
+        return sums / evaluated, evaluated
+
+    def stats(self) -> dict:
+        with self._lock:
+            avg = self.trees_evaluated / self.rows_scored if self.rows_scored else 0.0
+            return {
+                "rows_scored": self.rows_scored,
+                "avg_trees_evaluated": round(avg, 2),
+                "total_trees": self.n_trees,
+                "delta": self.delta,
+            }
@@ -0,0 +1,153 @@
+"""
+Exécuteur d'inférence dédié, à parallélisme contrôlé.
+
+Sans contrôle, chaque requête du threadpool Starlette peut lancer le
+parallélisme joblib de la forêt et les threads MKL/OpenBLAS de NumPy :
+sous charge les threads se disputent les coeurs et la latence p99 explose.
+
+Ici :
+  - deux files séparées : `interactive` (petites requêtes) et `bulk`
+    (gros batchs), un gros batch ne bloque jamais une prédiction unitaire
+  - nombre de workers configurable, en threads ou en processus
+  - n_jobs du modèle et threads BLAS fixés (1 par défaut)
+
+Configuration par variables d'environnement :
+    INFERENCE_MODE                 thread | process (défaut: thread)
+    INFERENCE_INTERACTIVE_WORKERS  workers de la file interactive (défaut: 2)
+    INFERENCE_BULK_WORKERS         workers de la file bulk (défaut: 1)
+    INFERENCE_BULK_THRESHOLD       nb de lignes au-delà duquel on passe en bulk (défaut: 16)
+    INFERENCE_N_JOBS               n_jobs imposé au modèle (défaut: 1)
+    INFERENCE_BLAS_THREADS         threads BLAS par worker (défaut: 1)
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import joblib
+import numpy as np
+from threadpoolctl import threadpool_limits
+
+
+def pin_model_threads(model, n_jobs: int):
+    """Fixe n_jobs sur le modèle et ses étapes (Pipeline) pour éviter le parallélisme joblib imbriqué"""
+    estimators = [model] + [step for _, step in getattr(model, "steps", [])]
+    for est in estimators:
+        if hasattr(est, "n_jobs"):
+            est.n_jobs = n_jobs
+    return model
+
+
+# =========================
+# WORKERS PROCESSUS
+# =========================
+_worker_model = None
+
+
+def _init_process_worker(model_path: str, n_jobs: int, blas_threads: int):
+    """Chaque processus charge sa propre copie du modèle"""
+    global _worker_model
+    threadpool_limits(limits=blas_threads)
+    _worker_model = pin_model_threads(joblib.load(model_path), n_jobs)
+
+
+def _process_predict_proba(X: np.ndarray) -> np.ndarray:
+    return _worker_model.predict_proba(X)
+
+
+# =========================
+# EXÉCUTEUR
+# =========================
+class InferenceExecutor:
+    """Deux files (interactive / bulk) devant le modèle"""
+
+    def __init__(
+        self,
+        mode: str = "thread",
+        interactive_workers: int = 2,
+        bulk_workers: int = 1,
+        bulk_threshold: int = 16,
+        n_jobs: int = 1,
+        blas_threads: int = 1,
+        model_path: str = None,
+    ):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"INFERENCE_MODE inconnu: {mode} (attendu: thread, process)")
+        if mode == "process" and not model_path:
+            raise ValueError("Le mode process nécessite model_path")
+        self.mode = mode
+        self.interactive_workers = interactive_workers
+        self.bulk_workers = bulk_workers
+        self.bulk_threshold = bulk_threshold
+        self.n_jobs = n_jobs
+        self.blas_threads = blas_threads
+        self.model_path = model_path
+        self._pools = None
+        self._process_pools = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, model_path: str = None):
+        return cls(
+            mode=os.getenv("INFERENCE_MODE", "thread"),
+            interactive_workers=int(os.getenv("INFERENCE_INTERACTIVE_WORKERS", "2")),
+            bulk_workers=int(os.getenv("INFERENCE_BULK_WORKERS", "1")),
+            bulk_threshold=int(os.getenv("INFERENCE_BULK_THRESHOLD", "16")),
+            n_jobs=int(os.getenv("INFERENCE_N_JOBS", "1")),
+            blas_threads=int(os.getenv("INFERENCE_BLAS_THREADS", "1")),
+            model_path=model_path,
+        )
+
+    def _ensure_started(self):
+        """Création paresseuse des pools (utilisable sans événement startup)"""
+        if self._pools is not None:
+            return
+        with self._lock:
+            if self._pools is not None:
+                return
+            # Les limites BLAS sont globales au processus
+            threadpool_limits(limits=self.blas_threads)
+            self._pools = {
+                "interactive": ThreadPoolExecutor(self.interactive_workers, thread_name_prefix="inference-interactive"),
+                "bulk": ThreadPoolExecutor(self.bulk_workers, thread_name_prefix="inference-bulk"),
+            }
+            if self.mode == "process":
+                ctx = multiprocessing.get_context("spawn")
+                initargs = (self.model_path, self.n_jobs, self.blas_threads)
+                self._process_pools = {
+                    "interactive": ProcessPoolExecutor(self.interactive_workers, mp_context=ctx,
+                                                       initializer=_init_process_worker, initargs=initargs),
+                    "bulk": ProcessPoolExecutor(self.bulk_workers, mp_context=ctx,
+                                                initializer=_init_process_worker, initargs=initargs),
+                }
+
+    def queue_for(self, n_rows: int) -> str:
+        return "interactive" if n_rows <= self.bulk_threshold else "bulk"
+
+    def prepare_model(self, model):
+        """À appeler au chargement : fixe n_jobs sur le modèle servi"""
+        return pin_model_threads(model, self.n_jobs)
+
+    async def run(self, fn, *args, n_rows: int = 1):
+        """Exécute fn(*args) dans la file adaptée (toujours en thread)"""
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pools[self.queue_for(n_rows)], fn, *args)
+
+    async def predict_proba(self, model, X: np.ndarray) -> np.ndarray:
+        """predict_proba dans la file adaptée ; en mode process le modèle des workers est utilisé"""
+        self._ensure_started()
+        queue = self.queue_for(len(X))
+        loop = asyncio.get_running_loop()
+        if self.mode == "process":
+            return await loop.run_in_executor(self._process_pools[queue], _process_predict_proba, X)
+        return await loop.run_in_executor(self._pools[queue], model.predict_proba, X)
+
+    def shutdown(self):
+        with self._lock:
+            for pools in (self._pools, self._process_pools):
+                for pool in (pools or {}).values():
+                    pool.shutdown(wait=False, cancel_futures=True)
+            self._pools = None
+            self._process_pools = None
@@ -0,0 +1,54 @@
+"""
+Statistiques de latence des outils de charge (load_generator.py, replay_traffic.py).
+
+Percentiles exacts sur les latences brutes et histogramme à buckets
+logarithmiques (bornes fixes : les histogrammes de plusieurs processus ou
+de plusieurs runs sont directement comparables et additionnables).
+"""
+from collections import Counter
+from typing import Dict, Iterable
+
+import numpy as np
+
+PERCENTILES = {"p50": 50, "p95": 95, "p99": 99, "p999": 99.9}
+# Bornes supérieures des buckets en ms : 0.1 ms -> ~100 s, 10 buckets par décade
+HISTOGRAM_BOUNDS_MS = np.round(np.logspace(-1, 5, 61), 4)
+
+
+def histogram_ms(latencies_ms: np.ndarray) -> Dict[str, int]:
+    """{borne supérieure (ms): effectif} des buckets non vides ; '+inf' au-delà"""
+    counts = np.bincount(
+        np.searchsorted(HISTOGRAM_BOUNDS_MS, latencies_ms), minlength=len(HISTOGRAM_BOUNDS_MS) + 1
+    )
+    labels = [str(bound) for bound in HISTOGRAM_BOUNDS_MS] + ["+inf"]
+    return {label: int(count) for label, count in zip(labels, counts) if count}
+
+
+def latency_summary(latencies_s: Iterable[float], statuses: Iterable) -> dict:
+    """
+    Résumé d'une série de requêtes.
+
+    Args:
+        latencies_s: latences en secondes
+        statuses: code HTTP par requête, ou libellé d'erreur côté client
+    """
+    latencies_ms = np.asarray(list(latencies_s), dtype=np.float64) * 1000
+    statuses = Counter(str(status) for status in statuses)
+    count = int(latencies_ms.size)
+    errors = sum(n for status, n in statuses.items() if not status.startswith("2"))
+
+    summary = {
+        "count": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else None,
+        "status_codes": dict(statuses),
+    }
+    if count:
+        values = np.percentile(latencies_ms, list(PERCENTILES.values()))
+        summary["latency_ms"] = {
+            **{name: round(float(v), 3) for name, v in zip(PERCENTILES, values)},
+            "mean": round(float(latencies_ms.mean()), 3),
+            "max": round(float(latencies_ms.max()), 3),
+        }
+        summary["histogram_ms"] = histogram_ms(latencies_ms)
+    return summary
@@ -1,6 +1,10 @@
-from fastapi import FastAPI, HTTPException
+import time
+_IMPORT_START = time.perf_counter()
+
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List
+import asyncio
 import joblib
 import numpy as np
 import logging
@@ -10,10 +14,34 @@ import glob
 import traceback
 from pathlib import Path
 
-from opencensus.ext.azure.log_exporter import AzureLogHandler
-
-from app.models import CustomerFeatures, PredictionResponse, HealthResponse
-from app.drift_detect import detect_drift
+# app.drift_detect (pandas, scipy, matplotlib, seaborn) et l'exporteur
+# opencensus ne sont importés qu'à la première utilisation : démarrage à froid
+# plus rapide sur Container Apps (scale-from-zero)
+from app.admission import AdmissionController, AdmissionMiddleware
+from app.models import (
+    CustomerFeatures,
+    ExplanationResponse,
+    HealthResponse,
+    PredictionResponse,
+    RecommendationBatchRequest,
+    RecommendationRequest,
+    TierPredictionResponse,
+    WhatIfBatchRequest,
+    WhatIfRequest,
+)
+from app.cohorts import cohort_breakdown
+from app.counterfactual import CounterfactualSearch
+from app.diagnostics import memory_snapshot
+from app.early_exit import EarlyExitScorer, supports_early_exit
+from app.inference import InferenceExecutor
+from app.recorder import RecorderMiddleware, TrafficRecorder
+from app.ranking import DEFAULT_CHUNK_SIZE, DEFAULT_TOP_K, iter_csv_chunks, rank_population
+from app.score_store import ScoreStore, metadata_mtime, model_version
+from app.shadow import load_shadow_evaluator
+from app.whatif import GridError, score_whatif, validate_grid
+from app.streaming import PredictionStream
+from app.validation import validate_records
+from app.utils import DECISION_THRESHOLD, features_to_array, risk_level, synthetic_features
 
 # ============================================================
 # LOGGING & APPLICATION INSIGHTS
@@ -24,6 +52,7 @@ logger = logging.getLogger("bank-churn-api")
 
 APPINSIGHTS_CONN = os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING")
 if APPINSIGHTS_CONN:
+    from opencensus.ext.azure.log_exporter import AzureLogHandler
     handler = AzureLogHandler(connection_string=APPINSIGHTS_CONN)
     logger.addHandler(handler)
     logger.info("app_startup", extra={
@@ -51,6 +80,11 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Contrôle d'admission par classe de route (voir app/admission.py).
+# Ajouté avant CORS pour que les réponses 503 portent les headers CORS.
+admission = AdmissionController.from_env()
+app.add_middleware(AdmissionMiddleware, controller=admission)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -58,21 +92,91 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Enregistrement du trafic /predict et /predict/batch pour rejeu (replay_traffic.py).
+# Middleware le plus externe : les requêtes rejetées par l'admission sont aussi capturées.
+RECORD_TRAFFIC_DIR = os.getenv("RECORD_TRAFFIC_DIR", "")
+recorder = None
+if RECORD_TRAFFIC_DIR:
+    recorder = TrafficRecorder(
+        RECORD_TRAFFIC_DIR,
+        version_fn=lambda: served_model_version,
+        rotate_every=int(os.getenv("RECORD_TRAFFIC_ROTATE", "100000")),
+    )
+    app.add_middleware(RecorderMiddleware, recorder=recorder)
+
 
 
 MODEL_PATH = os.getenv("MODEL_PATH", "model/churn_model.pkl")
+EARLY_EXIT_DELTA = float(os.getenv("EARLY_EXIT_DELTA", "0.01"))
+WARMUP_ROWS = int(os.getenv("WARMUP_ROWS", "64"))
+WARMUP_ITERATIONS = int(os.getenv("WARMUP_ITERATIONS", "5"))
+# Shadow : ex. SHADOW_MODEL_PATH=model/churn_model_optimized.pkl (vide = désactivé)
+SHADOW_MODEL_PATH = os.getenv("SHADOW_MODEL_PATH", "")
+SHADOW_SCALER_PATH = os.getenv("SHADOW_SCALER_PATH", "model/scaler.pkl")
+SHADOW_REFERENCE_DATA = os.getenv("SHADOW_REFERENCE_DATA", "data/bank_churn.csv")
+SHADOW_QUEUE_SIZE = int(os.getenv("SHADOW_QUEUE_SIZE", "1000"))
+# Table de scores matérialisée (materialize_scores.py), lue par memory-map
+SCORE_TABLE_PATH = os.getenv("SCORE_TABLE_PATH", "model/scores.npy")
+# Taille maximale d'une population envoyée à /rank
+MAX_RANK_ROWS = int(os.getenv("MAX_RANK_ROWS", "5000000"))
+# Streaming WebSocket : connexions simultanées, file par connexion, taille de lot
+WS_MAX_CONNECTIONS = int(os.getenv("WS_MAX_CONNECTIONS", "64"))
+WS_MAX_PENDING = int(os.getenv("WS_MAX_PENDING", "1024"))
+WS_MAX_BATCH = int(os.getenv("WS_MAX_BATCH", "256"))
+WS_COALESCE_MS = float(os.getenv("WS_COALESCE_MS", "2"))
+# Endpoints de diagnostic (/debug/memory) pour le soak test : désactivés par défaut
+DEBUG_ENDPOINTS = os.getenv("DEBUG_ENDPOINTS", "0") == "1"
+# Nombre de frames tracemalloc (0 = tracemalloc désactivé)
+DEBUG_TRACEMALLOC_FRAMES = int(os.getenv("DEBUG_TRACEMALLOC_FRAMES", "0"))
+DRIFT_REPORTS_DIR = Path(__file__).resolve().parent.parent / "drift_reports"
+# Budget de recherche contrefactuelle par client (ms)
+RECOMMEND_BUDGET_MS = float(os.getenv("RECOMMEND_BUDGET_MS", "50"))
 model = None
+early_exit_scorer = None
+explainer = None
+shadow = None
+served_model_version = None
+score_store = None
+score_table_mtime = None
+ws_connections = 0
 
+# Files d'inférence dédiées (interactive / bulk), voir app/inference.py
+inference = InferenceExecutor.from_env(model_path=MODEL_PATH)
 
-@app.on_event("startup")
-async def load_model():
-    global model
+# Readiness : passe à True une fois le modèle chargé ET le warm-up terminé
+ready = False
+STARTUP_TIMINGS = {"imports_s": round(time.perf_counter() - _IMPORT_START, 4)}
+_startup_task = None
+
+
+async def warm_up():
+    """Prédictions synthétiques sur les deux files pour initialiser threads, caches et scoreur"""
+    rows = synthetic_features(max(WARMUP_ROWS, 1))
+    for _ in range(WARMUP_ITERATIONS):
+        await inference.predict_proba(model, rows[:1])
+    await inference.predict_proba(model, rows)
+    if early_exit_scorer is not None:
+        await inference.run(early_exit_scorer.predict, rows, n_rows=len(rows))
+
+
+async def load_and_warm_up():
+    """Chargement du modèle hors boucle d'événements, puis warm-up"""
+    global model, early_exit_scorer, explainer, served_model_version, ready
+    start = time.perf_counter()
     try:
-        model = joblib.load(MODEL_PATH)
+        loaded = await asyncio.to_thread(joblib.load, MODEL_PATH)
+        served_model_version = await asyncio.to_thread(model_version, MODEL_PATH)
+        model = inference.prepare_model(loaded)
+        if supports_early_exit(model):
+            early_exit_scorer = EarlyExitScorer(model, delta=EARLY_EXIT_DELTA)
+            # Valeurs par noeud des explications, précalculées une fois par modèle
+            explainer = await asyncio.to_thread(build_explainer, model)
+        STARTUP_TIMINGS["model_load_s"] = round(time.perf_counter() - start, 4)
         logger.info("model_loaded", extra={
             "custom_dimensions": {
                 "event_type": "model_load",
                 "model_path": MODEL_PATH,
+                "model_version": served_model_version,
                 "status": "success"
             }
         })
@@ -84,6 +188,117 @@ async def load_model():
             }
         })
         model = None
+        return
+
+    warmup_start = time.perf_counter()
+    try:
+        await warm_up()
+    except Exception as e:
+        logger.error("warmup_failed", extra={
+            "custom_dimensions": {
+                "event_type": "warmup",
+                "error": str(e)
+            }
+        })
+        return
+    STARTUP_TIMINGS["warmup_s"] = round(time.perf_counter() - warmup_start, 4)
+    STARTUP_TIMINGS["total_s"] = round(time.perf_counter() - _IMPORT_START, 4)
+    ready = True
+
+    logger.info("startup_timings", extra={
+        "custom_dimensions": {
+            "event_type": "startup_timings",
+            **STARTUP_TIMINGS
+        }
+    })
+
+    if Path(SCORE_TABLE_PATH).exists():
+        open_score_store()
+
+    if SHADOW_MODEL_PATH:
+        await start_shadow()
+
+
+def open_score_store():
+    """Ouverture memory-map de la table ; un échec garde la table précédente (ou 503)"""
+    global score_store, score_table_mtime
+    # Mémorisée avant l'ouverture : un fichier illisible n'est pas retenté à chaque requête
+    score_table_mtime = metadata_mtime(SCORE_TABLE_PATH)
+    try:
+        score_store = ScoreStore.open(SCORE_TABLE_PATH)
+        logger.info("score_table_opened", extra={
+            "custom_dimensions": {
+                "event_type": "score_table",
+                "path": SCORE_TABLE_PATH,
+                "rows": len(score_store),
+                "model_version": score_store.model_version,
+                "stale": score_store.model_version != served_model_version
+            }
+        })
+    except Exception as e:
+        logger.error("score_table_failed", extra={
+            "custom_dimensions": {
+                "event_type": "score_table",
+                "error": str(e)
+            }
+        })
+
+
+def current_score_store():
+    """Table de scores, rouverte si materialize_scores.py en a publié une nouvelle"""
+    mtime = metadata_mtime(SCORE_TABLE_PATH)
+    if mtime is not None and mtime != score_table_mtime:
+        open_score_store()
+    return score_store
+
+
+async def start_shadow():
+    """Chargement du modèle shadow ; un échec n'affecte pas le modèle principal"""
+    global shadow
+    try:
+        evaluator = await asyncio.to_thread(
+            load_shadow_evaluator,
+            SHADOW_MODEL_PATH,
+            SHADOW_SCALER_PATH,
+            SHADOW_REFERENCE_DATA,
+            SHADOW_QUEUE_SIZE,
+        )
+        shadow = evaluator.start()
+        logger.info("shadow_model_loaded", extra={
+            "custom_dimensions": {
+                "event_type": "shadow_model_load",
+                "model_path": SHADOW_MODEL_PATH,
+                "status": "success"
+            }
+        })
+    except Exception as e:
+        logger.error("shadow_model_load_failed", extra={
+            "custom_dimensions": {
+                "event_type": "shadow_model_load",
+                "error": str(e)
+            }
+        })
+
+
+@app.on_event("startup")
+async def load_model():
+    # En tâche de fond : uvicorn accepte les connexions (liveness) pendant le chargement
+    global _startup_task
+    if DEBUG_TRACEMALLOC_FRAMES > 0:
+        import tracemalloc
+        tracemalloc.start(DEBUG_TRACEMALLOC_FRAMES)
+    if recorder is not None:
+        recorder.start()
+    _startup_task = asyncio.create_task(load_and_warm_up())
+
+
+@app.on_event("shutdown")
+async def stop_inference():
+    if shadow is not None:
+        shadow.stop()
+    if recorder is not None:
+        recorder.stop()
+    inference.shutdown()
 
 
 # ============================================================
@@ -104,7 +319,29 @@ def root():
 def health():
     if model is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
-    return {"status": "healthy", "model_loaded": True}
+    return {"status": "healthy", "model_loaded": True, "model_version": served_model_version}
+
+
+@app.get("/admission/stats", tags=["General"])
+def admission_stats():
+    """Profondeur des files et compteurs de rejet (pour l'autoscaling)"""
+    return admission.stats()
+
+
+@app.get("/debug/memory", tags=["General"])
+def debug_memory(top: int = 10):
+    """RSS, tas Python, fds, figures matplotlib, handlers de logging, rapports de drift"""
+    if not DEBUG_ENDPOINTS:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return memory_snapshot(DRIFT_REPORTS_DIR, top=top)
+
+
+@app.get("/ready", tags=["General"])
+def readiness():
+    """Readiness probe : 200 uniquement après chargement du modèle et warm-up"""
+    if not ready:
+        raise HTTPException(status_code=503, detail="Warm-up in progress")
+    return {"status": "ready", "startup_timings": STARTUP_TIMINGS}
 
 
 # ============================================================
@@ -112,29 +349,21 @@ def health():
 # ============================================================
 
 @app.post("/predict", response_model=PredictionResponse)
-def predict(features: CustomerFeatures):
+async def predict(features: CustomerFeatures):
 
     if model is None:
         raise HTTPException(status_code=503, detail="Model unavailable")
 
     try:
-        input_data = np.array([[  
-            features.CreditScore,
-            features.Age,
-            features.Tenure,
-            features.Balance,
-            features.NumOfProducts,
-            features.HasCrCard,
-            features.IsActiveMember,
-            features.EstimatedSalary,
-            features.Geography_Germany,
-            features.Geography_Spain
-        ]])
-
-        proba = float(model.predict_proba(input_data)[0][1])
-        prediction = int(proba > 0.5)
-
-        risk = "Low" if proba < 0.3 else "Medium" if proba < 0.7 else "High"
+        input_data = features_to_array([features])
+
+        start = time.perf_counter()
+        proba = float((await inference.predict_proba(model, input_data))[0][1])
+        if shadow is not None:
+            shadow.submit(input_data, [proba], time.perf_counter() - start)
+        prediction = int(proba > DECISION_THRESHOLD)
+
+        risk = risk_level(proba)
 
         logger.info("prediction", extra={
             "custom_dimensions": {
@@ -162,7 +391,7 @@ def predict(features: CustomerFeatures):
         raise HTTPException(status_code=500, detail=str(e))
     
 @app.post("/predict/batch")
-def predict_batch(features_list: List[CustomerFeatures]):
+async def predict_batch(features_list: List[CustomerFeatures]):
 
     if model is None:
         raise HTTPException(status_code=503, detail="Model unavailable")
@@ -170,27 +399,22 @@ def predict_batch(features_list: List[CustomerFeatures]):
     try:
         predictions = []
 
-        for features in features_list:
-            input_data = np.array([[  
-                features.CreditScore,
-                features.Age,
-                features.Tenure,
-                features.Balance,
-                features.NumOfProducts,
-                features.HasCrCard,
-                features.IsActiveMember,
-                features.EstimatedSalary,
-                features.Geography_Germany,
-                features.Geography_Spain
-            ]])
-
-            proba = float(model.predict_proba(input_data)[0][1])
-            prediction = int(proba > 0.5)
-
-            predictions.append({
-                "churn_probability": round(proba, 4),
-                "prediction": prediction
-            })
+        if features_list:
+            # Un seul appel vectorisé pour tout le batch
+            input_data = features_to_array(features_list)
+            start = time.perf_counter()
+            probas = (await inference.predict_proba(model, input_data))[:, 1]
+            if shadow is not None:
+                shadow.submit(input_data, probas, time.perf_counter() - start)
+
+            predictions = [
+                {
+                    "churn_probability": round(float(proba), 4),
+                    "prediction": int(proba > DECISION_THRESHOLD),
+                    "risk_level": risk_level(proba)
+                }
+                for proba in probas
+            ]
 
         logger.info("batch_prediction", extra={
             "custom_dimensions": {
@@ -213,6 +437,523 @@ def predict_batch(features_list: List[CustomerFeatures]):
         })
         raise HTTPException(status_code=500, detail=str(e))
 
+# ============================================================
+# RISK-TIER SCORING (EARLY EXIT)
+# ============================================================
+
+def get_early_exit_scorer():
+    """Scoreur early-exit du modèle courant (None si le modèle ne le permet pas)"""
+    global early_exit_scorer
+    if not supports_early_exit(model):
+        return None
+    if early_exit_scorer is None or early_exit_scorer.forest is not model:
+        early_exit_scorer = EarlyExitScorer(model, delta=EARLY_EXIT_DELTA)
+    return early_exit_scorer
+
+
+def score_tiers(input_data: np.ndarray) -> List[dict]:
+    """Niveau de risque + prédiction binaire, en early exit si possible"""
+    scorer = get_early_exit_scorer()
+    if scorer is None:
+        probas = model.predict_proba(input_data)[:, 1]
+        evaluated, total = [None] * len(probas), None
+    else:
+        probas, evaluated = scorer.predict(input_data)
+        total = scorer.n_trees
+
+    return [
+        {
+            "risk_level": risk_level(float(proba)),
+            "prediction": int(proba > DECISION_THRESHOLD),
+            "churn_probability_estimate": round(float(proba), 4),
+            "trees_evaluated": None if n is None else int(n),
+            "total_trees": total,
+        }
+        for proba, n in zip(probas, evaluated)
+    ]
+
+
+@app.post("/predict/validated/batch")
+async def predict_validated_batch(request: Request):
+    """
+    Batch tolérant : validation vectorisée des bornes de CustomerFeatures,
+    scoring des lignes valides et erreurs par ligne pour les autres
+    (au lieu d'un 422 pour tout le batch). Résultats dans l'ordre d'entrée.
+    """
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model unavailable")
+    try:
+        records = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Corps JSON invalide")
+    if not isinstance(records, list):
+        raise HTTPException(status_code=422, detail="Une liste de clients est attendue")
+
+    try:
+        X, valid_idx, errors = validate_records(records)
+        probas = np.empty(0)
+        if len(X):
+            start = time.perf_counter()
+            probas = (await inference.predict_proba(model, X))[:, 1]
+            if shadow is not None:
+                shadow.submit(X, probas, time.perf_counter() - start)
+    except Exception as e:
+        logger.error("validated_batch_error", extra={
+            "custom_dimensions": {
+                "event_type": "validated_batch_error",
+                "error": str(e)
+            }
+        })
+        raise HTTPException(status_code=500, detail=str(e))
+
+    results = [None] * len(records)
+    for i, proba in zip(valid_idx.tolist(), probas):
+        results[i] = {
+            "index": i,
+            "churn_probability": round(float(proba), 4),
+            "prediction": int(proba > DECISION_THRESHOLD),
+            "risk_level": risk_level(proba)
+        }
+    for i, row_errors in errors.items():
+        results[i] = {"index": i, "errors": row_errors}
+
+    logger.info("validated_batch_prediction", extra={
+        "custom_dimensions": {
+            "event_type": "validated_batch_prediction",
+            "count": len(records),
+            "invalid": len(errors)
+        }
+    })
+    return {
+        "results": results,
+        "count": len(records),
+        "valid": len(valid_idx),
+        "invalid": len(errors)
+    }
+
+
+@app.post("/predict/tier", response_model=TierPredictionResponse)
+async def predict_tier(features: CustomerFeatures):
+
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model unavailable")
+
+    try:
+        result = (await inference.run(score_tiers, features_to_array([features])))[0]
+
+        logger.info("tier_prediction", extra={
+            "custom_dimensions": {
+                "event_type": "tier_prediction",
+                "endpoint": "/predict/tier",
+                "risk_level": result["risk_level"],
+                "trees_evaluated": result["trees_evaluated"]
+            }
+        })
+
+        return result
+
+    except Exception as e:
+        logger.error("tier_prediction_error", extra={
+            "custom_dimensions": {
+                "event_type": "tier_prediction_error",
+                "error": str(e)
+            }
+        })
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/predict/tier/batch")
+async def predict_tier_batch(features_list: List[CustomerFeatures]):
+
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model unavailable")
+
+    try:
+        predictions = []
+        if features_list:
+            predictions = await inference.run(
+                score_tiers, features_to_array(features_list), n_rows=len(features_list)
+            )
+        evaluated = [p["trees_evaluated"] for p in predictions if p["trees_evaluated"] is not None]
+        avg_trees = round(sum(evaluated) / len(evaluated), 2) if evaluated else None
+
+        logger.info("tier_batch_prediction", extra={
+            "custom_dimensions": {
+                "event_type": "tier_batch_prediction",
+                "count": len(predictions),
+                "avg_trees_evaluated": avg_trees
+            }
+        })
+
+        return {
+            "predictions": predictions,
+            "count": len(predictions),
+            "avg_trees_evaluated": avg_trees
+        }
+
+    except Exception as e:
+        logger.error("tier_batch_prediction_error", extra={
+            "custom_dimensions": {
+                "event_type": "tier_batch_prediction_error",
+                "error": str(e)
+            }
+        })
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/predict/tier/stats")
+def predict_tier_stats():
+    scorer = get_early_exit_scorer()
+    if scorer is None:
+        return {"early_exit": False}
+    return {"early_exit": True, **scorer.stats()}
+
+# ============================================================
+# EXPLANATIONS
+# ============================================================
+
+def build_explainer(forest):
+    from app.explain import PathExplainer
+    return PathExplainer(forest)
+
+
+def get_explainer():
+    """Explainer du modèle courant (None si le modèle n'est pas une forêt)"""
+    global explainer
+    if not supports_early_exit(model):
+        return None
+    if explainer is None or explainer.forest is not model:
+        explainer = build_explainer(model)
+    return explainer
+
+
+@app.post("/explain", response_model=ExplanationResponse)
+async def explain(features: CustomerFeatures):
+
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model unavailable")
+    current = get_explainer()
+    if current is None:
+        raise HTTPException(status_code=501, detail="Explanations require a tree ensemble model")
+
+    try:
+        return (await inference.run(current.explain_records, features_to_array([features])))[0]
+
+    except Exception as e:
+        logger.error("explain_error", extra={
+            "custom_dimensions": {
+                "event_type": "explain_error",
+                "error": str(e)
+            }
+        })
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/explain/batch")
+async def explain_batch(features_list: List[CustomerFeatures]):
+
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model unavailable")
+    current = get_explainer()
+    if current is None:
+        raise HTTPException(status_code=501, detail="Explanations require a tree ensemble model")
+
+    try:
+        explanations = []
+        if features_list:
+            explanations = await inference.run(
+                current.explain_records, features_to_array(features_list), n_rows=len(features_list)
+            )
+
+        logger.info("batch_explanation", extra={
+            "custom_dimensions": {
+                "event_type": "batch_explanation",
+                "count": len(explanations)
+            }
+        })
+
+        return {
+            "explanations": explanations,
+            "count": len(explanations)
+        }
+
+    except Exception as e:
+        logger.error("batch_explain_error", extra={
+            "custom_dimensions": {
+                "event_type": "batch_explain_error",
+                "error": str(e)
+            }
+        })
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ============================================================
+# WHAT-IF / SENSITIVITY
+# ============================================================
+
+async def run_whatif(customers: List[CustomerFeatures], grid: dict):
+    """Valide la grille puis score toutes les variantes en un appel"""
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model unavailable")
+    try:
+        axes = validate_grid(grid)
+        base = features_to_array(customers)
+        n_rows = len(base) * int(np.prod([len(values) for _, values in axes]))
+        base_probas, surfaces = await inference.run(score_whatif, model, base, axes, n_rows=n_rows)
+    except GridError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error("whatif_error", extra={
+            "custom_dimensions": {
+                "event_type": "whatif_error",
+                "error": str(e)
+            }
+        })
+        raise HTTPException(status_code=500, detail=str(e))
+
+    logger.info("whatif", extra={
+        "custom_dimensions": {
+            "event_type": "whatif",
+            "customers": len(base),
+            "rows_scored": n_rows
+        }
+    })
+    return axes, base_probas, surfaces
+
+
+@app.post("/whatif")
+async def whatif(request: WhatIfRequest):
+    """Surface de réponse : probabilité de churn sur le produit cartésien des grilles"""
+    axes, base_probas, surfaces = await run_whatif([request.customer], request.grid)
+    return {
+        "base_probability": round(float(base_probas[0]), 4),
+        "features": [name for name, _ in axes],
+        "grid": {name: values.tolist() for name, values in axes},
+        "surface": np.round(surfaces[0], 4).tolist()
+    }
+
+
+@app.post("/whatif/batch")
+async def whatif_batch(request: WhatIfBatchRequest):
+    """Courbes ICE par client + dépendance partielle (moyenne des courbes)"""
+    axes, base_probas, surfaces = await run_whatif(request.customers, request.grid)
+    return {
+        "features": [name for name, _ in axes],
+        "grid": {name: values.tolist() for name, values in axes},
+        "curves": [
+            {"base_probability": round(float(p), 4), "surface": np.round(surface, 4).tolist()}
+            for p, surface in zip(base_probas, surfaces)
+        ],
+        "partial_dependence": np.round(surfaces.mean(axis=0), 4).tolist(),
+        "count": len(base_probas)
+    }
+
+# ============================================================
+# RETENTION ACTIONS (COUNTERFACTUAL)
+# ============================================================
+
+def search_retention_actions(search, X, budget_ms):
+    """Recherche exécutée dans le pool d'inférence : un predict_proba par niveau"""
+    return search.search(X, budget_s=budget_ms / 1000)
+
+
+async def run_recommend(customers: List[CustomerFeatures], actionable, target, budget_ms):
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model unavailable")
+    budget_ms = budget_ms or RECOMMEND_BUDGET_MS
+    # Validation des paramètres avant l'envoi au pool : seule cette étape répond 422,
+    # une erreur du modèle pendant la recherche reste une erreur serveur (500)
+    try:
+        search = CounterfactualSearch(
+            lambda rows: model.predict_proba(rows)[:, 1],
+            actionable=actionable,
+            target=target,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    X = features_to_array(customers)
+    start = time.perf_counter()
+    try:
+        results = await inference.run(search_retention_actions, search, X, budget_ms, n_rows=len(X))
+    except Exception as e:
+        logger.error("recommend_error", extra={
+            "custom_dimensions": {
+                "event_type": "recommend_error",
+                "error": str(e)
+            }
+        })
+        raise HTTPException(status_code=500, detail=str(e))
+
+    logger.info("recommend", extra={
+        "custom_dimensions": {
+            "event_type": "recommend",
+            "customers": len(X),
+            "found": sum(r["status"] == "found" for r in results),
+            "candidates_evaluated": sum(r["candidates_evaluated"] for r in results),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
+    })
+    return results
+
+
+@app.post("/recommend")
+async def recommend(request: RecommendationRequest):
+    """Plus petite action de rétention ramenant le client sous la cible"""
+    results = await run_recommend([request.customer], request.actionable, request.target, request.budget_ms)
+    return results[0]
+
+
+@app.post("/recommend/batch")
+async def recommend_batch(request: RecommendationBatchRequest):
+    """Actions de rétention pour un portefeuille de clients"""
+    results = await run_recommend(request.customers, request.actionable, request.target, request.budget_ms)
+    statuses = [r["status"] for r in results]
+    return {
+        "recommendations": results,
+        "count": len(results),
+        "summary": {status: statuses.count(status) for status in sorted(set(statuses))}
+    }
+
+# ============================================================
+# STREAMING (WEBSOCKET)
+# ============================================================
+
+@app.websocket("/ws/predict")
+async def ws_predict(websocket: WebSocket):
+    """Prédictions en continu sur une connexion persistante, regroupées en lots vectorisés"""
+    global ws_connections
+    await websocket.accept()
+    if model is None or ws_connections >= WS_MAX_CONNECTIONS:
+        # 1013 : "try again later"
+        await websocket.close(code=1013)
+        return
+
+    async def score(X):
+        return (await inference.predict_proba(model, X))[:, 1]
+
+    ws_connections += 1
+    try:
+        await PredictionStream(
+            websocket, score,
+            max_pending=WS_MAX_PENDING,
+            max_batch=WS_MAX_BATCH,
+            coalesce_s=WS_COALESCE_MS / 1000,
+        ).run()
+    finally:
+        ws_connections -= 1
+
+# ============================================================
+# PORTFOLIO RANKING
+# ============================================================
+
+@app.post("/rank")
+async def rank(file: UploadFile = File(...), k: int = DEFAULT_TOP_K, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Top-K des clients les plus à risque d'une population CSV, scorée par morceaux"""
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model unavailable")
+    if k < 1 or chunk_size < 1:
+        raise HTTPException(status_code=422, detail="k et chunk_size doivent être >= 1")
+    try:
+        ranked, stats = await inference.run(
+            rank_population, model, iter_csv_chunks(file.file, chunk_size), k, MAX_RANK_ROWS,
+            n_rows=chunk_size
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error("rank_error", extra={
+            "custom_dimensions": {
+                "event_type": "rank_error",
+                "error": str(e)
+            }
+        })
+        raise HTTPException(status_code=500, detail=str(e))
+
+    logger.info("rank", extra={
+        "custom_dimensions": {
+            "event_type": "rank",
+            **stats
+        }
+    })
+    return {"ranked": ranked, "count": len(ranked), "stats": stats}
+
+# ============================================================
+# MATERIALIZED SCORES
+# ============================================================
+
+@app.get("/scores/{customer_id}")
+async def get_score(customer_id: int):
+    """Dernier score d'un client depuis la table memory-mappée (live si la version diffère)"""
+    store = current_score_store()
+    if store is None:
+        raise HTTPException(status_code=503, detail="Score table not loaded")
+    record = store.lookup(customer_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Client {customer_id} absent de la table")
+
+    if store.model_version == served_model_version:
+        proba = float(record["probability"])
+        source = "materialized"
+    else:
+        if model is None:
+            raise HTTPException(status_code=503, detail="Model unavailable")
+        proba = float((await inference.predict_proba(model, record["features"].reshape(1, -1)))[0][1])
+        source = "live"
+
+    return {
+        "customer_id": customer_id,
+        "churn_probability": round(proba, 4),
+        "prediction": int(proba > DECISION_THRESHOLD),
+        "risk_level": risk_level(proba),
+        "source": source,
+        "model_version": served_model_version,
+        "table_model_version": store.model_version
+    }
+
+# ============================================================
+# COHORT ANALYTICS
+# ============================================================
+
+@app.post("/cohorts")
+async def cohorts(features_list: List[CustomerFeatures]):
+    """Score une population puis agrège par Geography, NumOfProducts, IsActiveMember et âge"""
+    if model is None:
+        raise HTTPException(status_code=503, detail="Model unavailable")
+    if not features_list:
+        raise HTTPException(status_code=422, detail="Population vide")
+
+    try:
+        X = features_to_array(features_list)
+        probas = (await inference.predict_proba(model, X))[:, 1]
+        breakdown = cohort_breakdown(X, probas)
+    except Exception as e:
+        logger.error("cohort_error", extra={
+            "custom_dimensions": {
+                "event_type": "cohort_error",
+                "error": str(e)
+            }
+        })
+        raise HTTPException(status_code=500, detail=str(e))
+
+    logger.info("cohort_analytics", extra={
+        "custom_dimensions": {
+            "event_type": "cohort_analytics",
+            "count": len(X)
+        }
+    })
+    return breakdown
+
+# ============================================================
+# SHADOW MODEL
+# ============================================================
+
+@app.get("/shadow/stats")
+def shadow_stats():
+    """Accord, écarts de probabilité et latences modèle principal vs shadow"""
+    if shadow is None:
+        return {"enabled": False}
+    return shadow.stats()
+
 # ============================================================
 # DRIFT LOGGING TO APPLICATION INSIGHTS
 # ============================================================
@@ -261,6 +1002,8 @@ def log_drift_to_insights(drift_results: dict):
 def check_drift(threshold: float = 0.05):
 
     try:
+        from app.drift_detect import detect_drift
+
         results = detect_drift(
             reference_file="data/bank_churn.csv",
             production_file="data/production_data.csv",
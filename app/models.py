@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Dict, List, Optional
 
 class CustomerFeatures(BaseModel):
     """Schema pour les features d'un client"""
@@ -30,13 +30,70 @@ class Config:
             }
         }
 
+def _field_bounds(schema) -> Dict[str, tuple]:
+    """Bornes (ge, le) de chaque Field d'un schema, None si absente"""
+    bounds = {}
+    for name, field in schema.model_fields.items():
+        ge = next((m.ge for m in field.metadata if hasattr(m, "ge")), None)
+        le = next((m.le for m in field.metadata if hasattr(m, "le")), None)
+        bounds[name] = (ge, le)
+    return bounds
+
+# Bornes et types des features, derives de CustomerFeatures (source unique)
+FEATURE_BOUNDS = _field_bounds(CustomerFeatures)
+INTEGER_FEATURES = {
+    name for name, field in CustomerFeatures.model_fields.items() if field.annotation is int
+}
+
 class PredictionResponse(BaseModel):
     """Schema pour la reponse de prediction"""
     churn_probability: float = Field(..., description="Probabilite de churn (0-1)")
     prediction: int = Field(..., description="Prediction binaire (0=reste, 1=part)")
     risk_level: str = Field(..., description="Niveau de risque (Low/Medium/High)")
 
+class TierPredictionResponse(BaseModel):
+    """Schema pour la reponse du scoring par niveau de risque (early exit)"""
+    risk_level: str = Field(..., description="Niveau de risque (Low/Medium/High)")
+    prediction: int = Field(..., description="Prediction binaire (0=reste, 1=part)")
+    churn_probability_estimate: float = Field(..., description="Moyenne des arbres evalues")
+    trees_evaluated: Optional[int] = Field(None, description="Nombre d'arbres evalues")
+    total_trees: Optional[int] = Field(None, description="Nombre d'arbres de la foret")
+
+class ExplanationResponse(BaseModel):
+    """Schema pour l'explication d'une prediction (attribution par feature)"""
+    churn_probability: float = Field(..., description="Probabilite de churn (0-1)")
+    base_value: float = Field(..., description="Probabilite moyenne a la racine des arbres")
+    contributions: Dict[str, float] = Field(..., description="Contribution de chaque feature")
+
+class WhatIfRequest(BaseModel):
+    """Schema pour l'analyse what-if d'un client"""
+    customer: CustomerFeatures
+    grid: Dict[str, List[float]] = Field(..., description="Feature -> valeurs a tester")
+
+class WhatIfBatchRequest(BaseModel):
+    """Schema pour les courbes ICE d'un lot de clients"""
+    customers: List[CustomerFeatures] = Field(..., min_length=1)
+    grid: Dict[str, List[float]] = Field(..., description="Feature -> valeurs a tester")
+
+class RecommendationRequest(BaseModel):
+    """Schema pour la recherche d'action de retention d'un client"""
+    customer: CustomerFeatures
+    actionable: Optional[List[str]] = Field(None, description="Features actionnables (defaut: toutes)")
+    target: float = Field(0.3, gt=0, le=1, description="Probabilite cible a atteindre")
+    budget_ms: Optional[float] = Field(None, gt=0, description="Budget de recherche par client")
+
+class RecommendationBatchRequest(BaseModel):
+    """Schema pour la recherche d'actions de retention sur un portefeuille"""
+    customers: List[CustomerFeatures] = Field(..., min_length=1)
+    actionable: Optional[List[str]] = Field(None, description="Features actionnables (defaut: toutes)")
+    target: float = Field(0.3, gt=0, le=1, description="Probabilite cible a atteindre")
+    budget_ms: Optional[float] = Field(None, gt=0, description="Budget de recherche par client")
+
 class HealthResponse(BaseModel):
     """Schema pour le health check"""
+    # model_loaded / model_version : pas de conflit avec l'espace "model_" de pydantic
+    model_config = ConfigDict(protected_namespaces=())
+
     status: str
-    model_loaded: bool
\ No newline at end of file
+    model_loaded: bool
+    model_version: Optional[str] = None
\ No newline at end of file
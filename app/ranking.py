@@ -0,0 +1,114 @@
+"""
+Classement d'un portefeuille : top-K des clients les plus à risque.
+
+La population est scorée par morceaux ; seul un top-K courant est conservé
+(mémoire bornée à K lignes + un morceau). À chaque morceau, le top-K courant
+et les lignes du morceau sont fusionnés par tri partiel (np.argpartition,
+O(n)) : aucun tri complet de la population n'est nécessaire.
+"""
+import time
+from typing import Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from app.utils import FEATURE_COLUMNS, risk_level
+
+DEFAULT_TOP_K = 5000
+DEFAULT_CHUNK_SIZE = 100_000
+# Colonnes d'identifiant reconnues dans un fichier de population
+ID_COLUMNS = ("CustomerId", "customer_id", "id")
+
+
+class TopK:
+    """Top-K courant par probabilité décroissante"""
+
+    def __init__(self, k: int):
+        if k < 1:
+            raise ValueError("k doit être >= 1")
+        self.k = k
+        self.ids = np.empty(0, dtype=np.int64)
+        self.probas = np.empty(0)
+        self.rows = np.empty((0, len(FEATURE_COLUMNS)))
+
+    def update(self, ids: np.ndarray, probas: np.ndarray, rows: np.ndarray):
+        ids = np.concatenate([self.ids, ids])
+        probas = np.concatenate([self.probas, probas])
+        rows = np.vstack([self.rows, rows])
+        if len(probas) > self.k:
+            keep = np.argpartition(-probas, self.k - 1)[:self.k]
+            ids, probas, rows = ids[keep], probas[keep], rows[keep]
+        self.ids, self.probas, self.rows = ids, probas, rows
+
+    def ranked(self):
+        """(ids, probas, rows) triés par probabilité décroissante, puis id croissant"""
+        order = np.lexsort((self.ids, -self.probas))
+        return self.ids[order], self.probas[order], self.rows[order]
+
+
+def iter_csv_chunks(source, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Itère sur (ids, X) depuis un CSV (chemin ou fichier ouvert).
+
+    L'identifiant est la colonne CustomerId/customer_id/id si présente,
+    sinon la position de la ligne dans le fichier.
+    """
+    import pandas as pd
+
+    offset = 0
+    for chunk in pd.read_csv(source, chunksize=chunk_size):
+        missing = [col for col in FEATURE_COLUMNS if col not in chunk.columns]
+        if missing:
+            raise ValueError(f"Colonnes manquantes: {missing}")
+        id_column = next((col for col in ID_COLUMNS if col in chunk.columns), None)
+        if id_column:
+            ids = chunk[id_column].to_numpy(dtype=np.int64)
+        else:
+            ids = np.arange(offset, offset + len(chunk), dtype=np.int64)
+        offset += len(chunk)
+        yield ids, chunk[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+
+
+def rank_population(model, chunks: Iterable[Tuple[np.ndarray, np.ndarray]], k: int = DEFAULT_TOP_K,
+                    max_rows: Optional[int] = None):
+    """
+    Score les morceaux et conserve le top-K.
+
+    Returns:
+        (top-K au format JSON, statistiques de débit)
+    """
+    top = TopK(k)
+    n_rows = n_chunks = 0
+    scoring_s = 0.0
+    start = time.perf_counter()
+
+    for ids, X in chunks:
+        if max_rows is not None and n_rows + len(X) > max_rows:
+            raise ValueError(f"Population supérieure à la limite de {max_rows} lignes")
+        t0 = time.perf_counter()
+        probas = model.predict_proba(X)[:, 1]
+        scoring_s += time.perf_counter() - t0
+        top.update(ids, probas, X)
+        n_rows += len(X)
+        n_chunks += 1
+
+    elapsed = time.perf_counter() - start
+    ids, probas, rows = top.ranked()
+    ranked = [
+        {
+            "rank": rank,
+            "id": int(customer_id),
+            "churn_probability": round(float(proba), 4),
+            "risk_level": risk_level(proba),
+            "features": dict(zip(FEATURE_COLUMNS, row.tolist())),
+        }
+        for rank, (customer_id, proba, row) in enumerate(zip(ids, probas, rows), start=1)
+    ]
+    stats = {
+        "rows_scored": n_rows,
+        "chunks": n_chunks,
+        "k": k,
+        "elapsed_s": round(elapsed, 3),
+        "scoring_s": round(scoring_s, 3),
+        "rows_per_second": round(n_rows / elapsed, 1) if elapsed > 0 else None,
+    }
+    return ranked, stats
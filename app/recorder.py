@@ -0,0 +1,145 @@
+"""
+Enregistrement du trafic de prédiction pour rejeu (replay_traffic.py).
+
+Middleware ASGI : pour POST /predict et /predict/batch, le corps brut de la
+requête, le statut, le corps de la réponse, la latence et la version du
+modèle servi sont écrits en NDJSON compressé (gzip), un fichier par
+tranche de `rotate_every` enregistrements :
+    <RECORD_TRAFFIC_DIR>/traffic-<YYYYmmdd-HHMMSS>-<n>.ndjson.gz
+
+L'écriture se fait dans un thread dédié via une file bornée : si la file
+est pleine, l'enregistrement est abandonné (compteur `dropped`) sans
+ralentir la requête.
+"""
+import gzip
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger("bank-churn-api")
+
+RECORDED_PATHS = ("/predict", "/predict/batch")
+
+
+class TrafficRecorder:
+    """Écrivain NDJSON gzip en arrière-plan, avec rotation des fichiers"""
+
+    def __init__(self, directory, version_fn=lambda: None, rotate_every: int = 100_000,
+                 max_queue: int = 10_000):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.version_fn = version_fn
+        self.rotate_every = rotate_every
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._file = None
+        self._file_records = 0
+        self._file_index = 0
+        self._session = datetime.now().strftime("%Y%m%d-%H%M%S")
+
+        self.recorded = 0
+        self.dropped = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="traffic-recorder", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def record(self, entry: dict):
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def _open_next(self):
+        if self._file is not None:
+            self._file.close()
+        self._file_index += 1
+        path = self.directory / f"traffic-{self._session}-{self._file_index:04d}.ndjson.gz"
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._file_records = 0
+
+    def _run(self):
+        try:
+            while True:
+                entry = self._queue.get()
+                if entry is None:
+                    return
+                if self._file is None or self._file_records >= self.rotate_every:
+                    self._open_next()
+                self._file.write(json.dumps(entry) + "\n")
+                self._file_records += 1
+                self.recorded += 1
+        except Exception as e:
+            logger.error("traffic_recorder_error", extra={
+                "custom_dimensions": {
+                    "event_type": "traffic_recorder_error",
+                    "error": str(e)
+                }
+            })
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self) -> dict:
+        return {
+            "directory": str(self.directory),
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "queue_size": self._queue.qsize(),
+            "files": self._file_index,
+        }
+
+
+class RecorderMiddleware:
+    """Middleware ASGI : capture requête + réponse des routes de prédiction"""
+
+    def __init__(self, app, recorder: TrafficRecorder):
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in RECORDED_PATHS:
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        request_chunks, response_chunks = [], []
+        status = {}
+
+        async def recording_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                request_chunks.append(message.get("body", b""))
+            return message
+
+        async def recording_send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response_chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, recording_receive, recording_send)
+        finally:
+            self.recorder.record({
+                "ts": time.time(),
+                "path": scope["path"],
+                "body": b"".join(request_chunks).decode("utf-8", errors="replace"),
+                "status": status.get("code"),
+                "response": b"".join(response_chunks).decode("utf-8", errors="replace"),
+                "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+                "model_version": self.recorder.version_fn(),
+            })
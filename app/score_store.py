@@ -0,0 +1,132 @@
+"""
+Table de scores matérialisée, lue par memory-map.
+
+Le job nocturne (materialize_scores.py) score tout le fichier clients et
+écrit un tableau structuré à largeur fixe (.npy), trié par identifiant :
+    id (int64) | probability (float32) | features (10 x float64)
+accompagné d'un fichier .json (version du modèle, nombre de lignes, date).
+
+L'API ouvre le tableau avec np.load(mmap_mode="r") : aucune donnée n'est
+chargée au démarrage, une recherche est un np.searchsorted sur la colonne
+id (quelques pages lues) et les pages utiles restent dans le cache de l'OS.
+Un nouveau run remplace les fichiers (os.replace) : l'API détecte le
+changement de mtime des métadonnées et rouvre la table.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.utils import FEATURE_COLUMNS
+
+SCORE_DTYPE = np.dtype([
+    ("id", "<i8"),
+    ("probability", "<f4"),
+    ("features", "<f8", (len(FEATURE_COLUMNS),)),
+])
+
+
+def model_version(model_path: str, length: int = 12) -> str:
+    """Version d'un artefact modèle : préfixe du sha256 du fichier"""
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:length]
+
+
+def metadata_path(table_path) -> Path:
+    return Path(table_path).with_suffix(".json")
+
+
+def metadata_mtime(table_path) -> Optional[int]:
+    """mtime (ns) des métadonnées, remplacées en dernier par write_score_table ; None si absentes"""
+    try:
+        return os.stat(metadata_path(table_path)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def build_score_table(ids: np.ndarray, probas: np.ndarray, X: np.ndarray) -> np.ndarray:
+    """Tableau structuré trié par id ; les identifiants doivent être uniques"""
+    table = np.empty(len(ids), dtype=SCORE_DTYPE)
+    table["id"] = ids
+    table["probability"] = probas
+    table["features"] = X
+    table.sort(order="id", kind="stable")
+    check_unique_ids(table["id"])
+    return table
+
+
+def check_unique_ids(sorted_ids: np.ndarray):
+    if len(sorted_ids) > 1 and (np.diff(sorted_ids) == 0).any():
+        raise ValueError("Identifiants clients dupliqués")
+
+
+def tmp_table_path(table_path) -> Path:
+    return Path(table_path).with_suffix(".tmp.npy")
+
+
+def write_score_table(table_path, table: np.ndarray, version: str, model_path: str = None) -> dict:
+    """Écrit le tableau et ses métadonnées ; remplacement atomique des deux fichiers"""
+    table_path = Path(table_path)
+    table_path.parent.mkdir(parents=True, exist_ok=True)
+    np.save(tmp_table_path(table_path), table)
+    return publish_score_table(table_path, len(table), version, model_path)
+
+
+def publish_score_table(table_path, rows: int, version: str, model_path: str = None) -> dict:
+    """
+    Publie la table déjà écrite dans tmp_table_path(table_path) : remplacement
+    atomique de la table puis des métadonnées (dont le mtime signale le changement)
+    """
+    table_path = Path(table_path)
+    metadata = {
+        "model_version": version,
+        "model_path": model_path,
+        "rows": int(rows),
+        "record_bytes": SCORE_DTYPE.itemsize,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+    tmp_meta = table_path.with_suffix(".tmp.json")
+    with open(tmp_meta, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp_table_path(table_path), table_path)
+    os.replace(tmp_meta, metadata_path(table_path))
+    return metadata
+
+
+class ScoreStore:
+    """Recherche par identifiant dans une table de scores memory-mappée"""
+
+    def __init__(self, table: np.ndarray, metadata: dict):
+        if table.dtype != SCORE_DTYPE:
+            raise ValueError(f"Format de table inattendu: {table.dtype}")
+        self.table = table
+        self.ids = table["id"]
+        self.metadata = metadata
+
+    @classmethod
+    def open(cls, table_path) -> "ScoreStore":
+        with open(metadata_path(table_path), encoding="utf-8") as f:
+            metadata = json.load(f)
+        return cls(np.load(table_path, mmap_mode="r"), metadata)
+
+    @property
+    def model_version(self) -> Optional[str]:
+        return self.metadata.get("model_version")
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def lookup(self, customer_id: int) -> Optional[np.void]:
+        """Enregistrement du client, None s'il est absent de la table"""
+        pos = int(np.searchsorted(self.ids, customer_id))
+        if pos < len(self.ids) and self.ids[pos] == customer_id:
+            return self.table[pos]
+        return None
@@ -0,0 +1,226 @@
+"""
+Évaluation en shadow d'un modèle candidat sur le trafic réel.
+
+Le modèle principal répond à la requête ; les mêmes lignes de features
+sont déposées dans une file bornée et scorées par un thread en arrière-plan
+avec le modèle shadow. Si la file est pleine, le travail est abandonné
+(compteur `dropped`) : la latence du modèle principal n'est jamais affectée.
+
+Le modèle optimisé (train_model_mod.py) n'utilise pas les 10 features
+brutes : l'adaptateur `OptimizedFeatureAdapter` rejoue son feature
+engineering (ratios, tranches d'âge, StandardScaler).
+"""
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from app.utils import DECISION_THRESHOLD, FEATURE_COLUMNS
+
+logger = logging.getLogger("bank-churn-api")
+
+# Même feature engineering que train_model_mod.py
+AGE_BINS = [0, 25, 35, 45, 55, 65, 100]
+AGE_DUMMIES = ["Age_25-35", "Age_35-45", "Age_45-55", "Age_55-65", "Age_65+"]
+ENGINEERED_COLUMNS = FEATURE_COLUMNS + [
+    "Balance_to_Salary_Ratio",
+    "Products_per_Tenure",
+    "CreditScore_Age_Interaction",
+    "Is_High_Value",
+] + AGE_DUMMIES
+SCALED_COLUMNS = [
+    "CreditScore", "Age", "Balance", "EstimatedSalary",
+    "Balance_to_Salary_Ratio", "CreditScore_Age_Interaction",
+]
+
+
+class OptimizedFeatureAdapter:
+    """Transforme les 10 features de l'API en entrée du modèle optimisé"""
+
+    def __init__(self, scaler, balance_median: float, salary_median: float):
+        self.scaler = scaler
+        self.balance_median = balance_median
+        self.salary_median = salary_median
+
+    @classmethod
+    def from_files(cls, scaler_path: str, reference_file: str):
+        import joblib
+
+        from app.dataset_io import read_dataset
+
+        ref = read_dataset(reference_file, columns=["Balance", "EstimatedSalary"])
+        return cls(
+            joblib.load(scaler_path),
+            float(ref["Balance"].median()),
+            float(ref["EstimatedSalary"].median()),
+        )
+
+    def __call__(self, X: np.ndarray):
+        import pandas as pd
+
+        df = pd.DataFrame(X, columns=FEATURE_COLUMNS)
+        df["Balance_to_Salary_Ratio"] = df["Balance"] / (df["EstimatedSalary"] + 1)
+        df["Products_per_Tenure"] = df["NumOfProducts"] / (df["Tenure"] + 1)
+        df["CreditScore_Age_Interaction"] = df["CreditScore"] * df["Age"] / 1000
+        df["Is_High_Value"] = ((df["Balance"] > self.balance_median) &
+                               (df["EstimatedSalary"] > self.salary_median)).astype(int)
+
+        # pd.cut(right=True) : l'intervalle i est ]bins[i], bins[i+1]]
+        age_bin = np.digitize(df["Age"], AGE_BINS, right=True)
+        for i, name in enumerate(AGE_DUMMIES, start=2):
+            df[name] = age_bin == i
+
+        df[SCALED_COLUMNS] = self.scaler.transform(df[SCALED_COLUMNS])
+        return df[ENGINEERED_COLUMNS]
+
+
+def _percentiles_ms(latencies) -> dict:
+    if not latencies:
+        return {"p50": None, "p95": None, "p99": None, "count": 0}
+    values = np.percentile(np.asarray(latencies) * 1000, [50, 95, 99])
+    return {
+        "p50": round(float(values[0]), 3),
+        "p95": round(float(values[1]), 3),
+        "p99": round(float(values[2]), 3),
+        "count": len(latencies),
+    }
+
+
+class ShadowEvaluator:
+    """File bornée + thread de scoring shadow + statistiques de comparaison"""
+
+    def __init__(self, shadow_model, feature_adapter=None, max_queue: int = 1000,
+                 max_coalesce: int = 64, latency_window: int = 10000, model_path: Optional[str] = None):
+        self.shadow_model = shadow_model
+        self.feature_adapter = feature_adapter
+        self.model_path = model_path
+        self.max_coalesce = max_coalesce
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self.submitted = 0
+        self.dropped = 0
+        self.errors = 0
+        self.rows_compared = 0
+        self.agreements = 0
+        self.sum_delta = 0.0
+        self.sum_abs_delta = 0.0
+        self.max_abs_delta = 0.0
+        self.primary_latencies = deque(maxlen=latency_window)
+        self.shadow_latencies = deque(maxlen=latency_window)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="shadow-worker", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def submit(self, X: np.ndarray, primary_proba: np.ndarray, primary_latency_s: float) -> bool:
+        """Dépôt non bloquant ; False si la file est pleine (travail abandonné)"""
+        try:
+            self._queue.put_nowait((X, np.asarray(primary_proba, dtype=np.float64), primary_latency_s))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            # Regroupe les éléments déjà en file pour un seul appel au modèle shadow
+            items = [item]
+            while len(items) < self.max_coalesce:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._process(items)
+                    return
+                items.append(item)
+            self._process(items)
+
+    def _process(self, items):
+        try:
+            X = np.vstack([x for x, _, _ in items])
+            primary = np.concatenate([p for _, p, _ in items])
+            start = time.perf_counter()
+            features = self.feature_adapter(X) if self.feature_adapter else X
+            shadow = self.shadow_model.predict_proba(features)[:, 1]
+            shadow_latency = time.perf_counter() - start
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            logger.error("shadow_error", extra={
+                "custom_dimensions": {
+                    "event_type": "shadow_error",
+                    "error": str(e)
+                }
+            })
+            return
+
+        delta = shadow - primary
+        agree = (shadow > DECISION_THRESHOLD) == (primary > DECISION_THRESHOLD)
+        with self._lock:
+            self.rows_compared += len(delta)
+            self.agreements += int(agree.sum())
+            self.sum_delta += float(delta.sum())
+            self.sum_abs_delta += float(np.abs(delta).sum())
+            self.max_abs_delta = max(self.max_abs_delta, float(np.abs(delta).max()))
+            self.primary_latencies.extend(latency for _, _, latency in items)
+            # Latence shadow ramenée à l'élément, comparable à celle du principal
+            self.shadow_latencies.extend([shadow_latency / len(items)] * len(items))
+
+    def stats(self) -> dict:
+        with self._lock:
+            n = self.rows_compared
+            return {
+                "enabled": True,
+                "shadow_model_path": self.model_path,
+                "queue_size": self._queue.qsize(),
+                "max_queue": self._queue.maxsize,
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "rows_compared": n,
+                "agreement_rate": round(self.agreements / n, 4) if n else None,
+                "mean_delta": round(self.sum_delta / n, 4) if n else None,
+                "mean_abs_delta": round(self.sum_abs_delta / n, 4) if n else None,
+                "max_abs_delta": round(self.max_abs_delta, 4) if n else None,
+                "latency_ms": {
+                    "primary": _percentiles_ms(list(self.primary_latencies)),
+                    "shadow": _percentiles_ms(list(self.shadow_latencies)),
+                },
+            }
+
+
+def load_shadow_evaluator(model_path: str, scaler_path: str, reference_file: str,
+                          max_queue: int = 1000) -> ShadowEvaluator:
+    """Charge le modèle shadow et choisit l'adaptateur selon son nombre de features"""
+    import joblib
+
+    shadow_model = joblib.load(model_path)
+    n_features = getattr(shadow_model, "n_features_in_", len(FEATURE_COLUMNS))
+    if n_features == len(FEATURE_COLUMNS):
+        adapter = None
+    elif n_features == len(ENGINEERED_COLUMNS):
+        adapter = OptimizedFeatureAdapter.from_files(scaler_path, reference_file)
+    else:
+        raise ValueError(f"Modèle shadow incompatible : {n_features} features attendues")
+    return ShadowEvaluator(shadow_model, adapter, max_queue=max_queue, model_path=model_path)
@@ -0,0 +1,185 @@
+"""
+Canal de prédiction en streaming sur WebSocket.
+
+Protocole (messages texte JSON) :
+  client -> serveur : {"id": ..., "features": {...}} ou une liste de ces objets
+  serveur -> client : {"results": [{"id": ..., "churn_probability": ..., ...}
+                                   | {"id": ..., "errors": [...]}]}
+
+Les enregistrements reçus passent par une file bornée par connexion. Le
+scoreur la vide par lots (jusqu'à `max_batch`, en attendant au plus
+`coalesce_s` que le lot se remplisse), valide le lot de façon vectorisée et
+le score en un seul appel au modèle.
+
+Contrôle de flux : quand la file est pleine, le lecteur cesse de lire la
+socket ; les tampons TCP se remplissent et le client est ralenti. De même,
+si le client ne lit pas ses résultats, l'envoi bloque le scoreur, la file
+se remplit et la lecture s'arrête. La mémoire par connexion reste bornée.
+"""
+import asyncio
+import json
+import logging
+import time
+
+import numpy as np
+from starlette.websockets import WebSocketDisconnect
+
+from app.utils import DECISION_THRESHOLD, risk_level
+from app.validation import validate_records
+
+logger = logging.getLogger("bank-churn-api")
+
+_CLOSED = object()
+
+
+class PredictionStream:
+    """Session de streaming d'une connexion WebSocket"""
+
+    def __init__(self, websocket, score_fn, max_pending: int = 1024,
+                 max_batch: int = 256, coalesce_s: float = 0.002):
+        self.websocket = websocket
+        self.score_fn = score_fn
+        self.max_batch = max_batch
+        self.coalesce_s = coalesce_s
+        self.queue = asyncio.Queue(maxsize=max_pending)
+
+        self.messages = 0
+        self.records = 0
+        self.batches = 0
+        self.max_queue_depth = 0
+        self.read_error = None
+
+    async def run(self):
+        start = time.perf_counter()
+        reader = asyncio.create_task(self._read())
+        try:
+            await self._score_loop()
+            if self.read_error is not None:
+                # 1003 : données non acceptées (trame binaire...)
+                await self.websocket.close(code=1003)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            reader.cancel()
+            logger.info("ws_session", extra={
+                "custom_dimensions": {
+                    "event_type": "ws_session",
+                    "duration_s": round(time.perf_counter() - start, 3),
+                    **self.stats()
+                }
+            })
+
+    def stats(self) -> dict:
+        return {
+            "messages": self.messages,
+            "records": self.records,
+            "batches": self.batches,
+            "avg_batch_size": round(self.records / self.batches, 2) if self.batches else 0.0,
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+    @staticmethod
+    def _parse(item):
+        """(id, features, erreur) d'un enregistrement reçu"""
+        if not isinstance(item, dict) or "id" not in item:
+            request_id = item.get("id") if isinstance(item, dict) else None
+            return request_id, None, "Chaque enregistrement doit être un objet avec 'id' et 'features'"
+        return item["id"], item.get("features"), None
+
+    async def _read(self):
+        try:
+            while True:
+                message = await self.websocket.receive_text()
+                self.messages += 1
+                try:
+                    payload = json.loads(message)
+                except ValueError:
+                    payload = [None]
+                for item in payload if isinstance(payload, list) else [payload]:
+                    # Bloque quand la file est pleine : plus aucune lecture sur la socket
+                    await self.queue.put(self._parse(item))
+                    self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            self.read_error = repr(e)
+            # Trame binaire (KeyError 'text' côté Starlette), socket déjà fermée... :
+            # le lecteur s'arrête, le scoreur doit quand même terminer la session
+            logger.warning("ws_read_error", extra={
+                "custom_dimensions": {
+                    "event_type": "ws_read_error",
+                    "error": self.read_error
+                }
+            })
+        # Hors finally : une annulation (fin de session) n'a pas à prévenir le scoreur
+        await self.queue.put(_CLOSED)
+
+    async def _next_batch(self):
+        """Lot suivant (liste, connexion fermée ?) ; attend au plus coalesce_s après le premier élément"""
+        first = await self.queue.get()
+        if first is _CLOSED:
+            return [], True
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.coalesce_s
+        batch = [first]
+        while len(batch) < self.max_batch:
+            try:
+                item = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if item is _CLOSED:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _score_loop(self):
+        while True:
+            batch, closed = await self._next_batch()
+            if batch:
+                await self.websocket.send_text(json.dumps({"results": await self._score(batch)}))
+            if closed:
+                return
+
+    async def _score(self, batch):
+        results = [None] * len(batch)
+        positions, records = [], []
+        for position, (request_id, features, error) in enumerate(batch):
+            if error:
+                results[position] = {"id": request_id, "errors": [{"loc": [], "msg": error, "type": "model_type"}]}
+            else:
+                positions.append(position)
+                records.append(features)
+
+        X, valid_idx, errors = validate_records(records)
+        try:
+            probas = await self.score_fn(X) if len(X) else np.empty(0)
+        except Exception as e:
+            logger.error("ws_prediction_error", extra={
+                "custom_dimensions": {
+                    "event_type": "ws_prediction_error",
+                    "error": str(e)
+                }
+            })
+            error = [{"loc": [], "msg": str(e), "type": "prediction_error"}]
+            errors.update({int(i): error for i in valid_idx})
+            valid_idx, probas = valid_idx[:0], np.empty(0)
+        for i, proba in zip(valid_idx.tolist(), probas):
+            results[positions[i]] = {
+                "id": batch[positions[i]][0],
+                "churn_probability": round(float(proba), 4),
+                "prediction": int(proba > DECISION_THRESHOLD),
+                "risk_level": risk_level(proba),
+            }
+        for i, row_errors in errors.items():
+            results[positions[i]] = {"id": batch[positions[i]][0], "errors": row_errors}
+
+        self.records += len(batch)
+        self.batches += 1
+        return results
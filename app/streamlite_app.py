@@ -1,13 +1,19 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import requests
 import json
 import io
 from datetime import datetime
 import matplotlib.pyplot as plt
 import seaborn as sns
 import time
+import sys
+import os
+
+# Client de l'API (app/client.py) : lancé via `streamlit run app/streamlite_app.py`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.client import ChurnClient
+from app.dataset_io import write_dataset
 
 # Configuration de la page
 st.set_page_config(
@@ -65,13 +71,16 @@ st.markdown('<h1 class="main-header">🏦 Bank Churn Prediction Dashboard</h1>',
 # Configuration API
 API_BASE_URL = st.sidebar.text_input("API URL", " https://bank-churn.nicehill-253897a0.francecentral.azurecontainerapps.io")
 
+@st.cache_resource
+def get_client(base_url):
+    """Client partagé entre les reruns : session keep-alive, retries, lots parallèles"""
+    return ChurnClient(base_url)
+
+client = get_client(API_BASE_URL)
+
 # Vérification de la connexion API
 def check_api_health():
-    try:
-        response = requests.get(f"{API_BASE_URL}/health", timeout=5)
-        return response.status_code == 200
-    except:
-        return False
+    return client.health()
 
 # Sidebar
 st.sidebar.title("Configuration")
@@ -135,11 +144,7 @@ with tab1:
             
             try:
                 # Appel API
-                response = requests.post(
-                    f"{API_BASE_URL}/predict",
-                    json=features,
-                    timeout=10
-                )
+                response = client.request("POST", "/predict", json=features, timeout=10)
                 
                 if response.status_code == 200:
                     result = response.json()
@@ -304,71 +309,60 @@ with tab2:
                         # Conversion en format API
                         clients_list = st.session_state.batch_data.to_dict('records')
                         
-                        response = requests.post(
-                            f"{API_BASE_URL}/predict/batch",
-                            json=clients_list,
-                            timeout=30
-                        )
+                        predictions = client.predict_batch(clients_list)
                         
-                        if response.status_code == 200:
-                            results = response.json()
-                            predictions = results['predictions']
-                            
-                            # Ajout des prédictions au dataframe
-                            result_df = st.session_state.batch_data.copy()
-                            result_df['Churn_Probability'] = [p['churn_probability'] for p in predictions]
-                            result_df['Prediction'] = [p['prediction'] for p in predictions]
-                            result_df['Risk'] = [
-                                'High' if p['churn_probability'] > 0.7 
-                                else 'Medium' if p['churn_probability'] > 0.3 
-                                else 'Low' 
-                                for p in predictions
-                            ]
-                            
-                            st.markdown("### Résultats des prédictions")
-                            st.dataframe(result_df, use_container_width=True)
-                            
-                            # Statistiques
-                            col1, col2, col3 = st.columns(3)
-                            with col1:
-                                st.metric(
-                                    "Clients à risque",
-                                    f"{sum([p['prediction'] for p in predictions])}/{len(predictions)}"
-                                )
-                            with col2:
-                                avg_prob = np.mean([p['churn_probability'] for p in predictions])
-                                st.metric("Probabilité moyenne", f"{avg_prob*100:.1f}%")
-                            with col3:
-                                high_risk = sum([1 for p in predictions if p['churn_probability'] > 0.7])
-                                st.metric("Risque élevé", high_risk)
-                            
-                            # Téléchargement des résultats
-                            csv = result_df.to_csv(index=False)
-                            st.download_button(
-                                label="📥 Télécharger les résultats",
-                                data=csv,
-                                file_name=f"batch_predictions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                                mime="text/csv"
+                        # Ajout des prédictions au dataframe
+                        result_df = st.session_state.batch_data.copy()
+                        result_df['Churn_Probability'] = [p['churn_probability'] for p in predictions]
+                        result_df['Prediction'] = [p['prediction'] for p in predictions]
+                        result_df['Risk'] = [
+                            'High' if p['churn_probability'] > 0.7 
+                            else 'Medium' if p['churn_probability'] > 0.3 
+                            else 'Low' 
+                            for p in predictions
+                        ]
+                        
+                        st.markdown("### Résultats des prédictions")
+                        st.dataframe(result_df, use_container_width=True)
+                        
+                        # Statistiques
+                        col1, col2, col3 = st.columns(3)
+                        with col1:
+                            st.metric(
+                                "Clients à risque",
+                                f"{sum([p['prediction'] for p in predictions])}/{len(predictions)}"
                             )
+                        with col2:
+                            avg_prob = np.mean([p['churn_probability'] for p in predictions])
+                            st.metric("Probabilité moyenne", f"{avg_prob*100:.1f}%")
+                        with col3:
+                            high_risk = sum([1 for p in predictions if p['churn_probability'] > 0.7])
+                            st.metric("Risque élevé", high_risk)
+                        
+                        # Téléchargement des résultats
+                        csv = result_df.to_csv(index=False)
+                        st.download_button(
+                            label="📥 Télécharger les résultats",
+                            data=csv,
+                            file_name=f"batch_predictions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                            mime="text/csv"
+                        )
+                        
+                        # Stocker dans l'historique
+                        for i, (customer, pred) in enumerate(zip(clients_list, predictions)):
+                            if 'predictions_history' not in st.session_state:
+                                st.session_state.predictions_history = []
                             
-                            # Stocker dans l'historique
-                            for i, (client, pred) in enumerate(zip(clients_list, predictions)):
-                                if 'predictions_history' not in st.session_state:
-                                    st.session_state.predictions_history = []
-                                
-                                st.session_state.predictions_history.append({
-                                    **client,
-                                    **pred,
-                                    "risk_level": 'High' if pred['churn_probability'] > 0.7 
-                                                 else 'Medium' if pred['churn_probability'] > 0.3 
-                                                 else 'Low',
-                                    "timestamp": datetime.now().isoformat(),
-                                    "type": "batch"
-                                })
-                            
-                        else:
-                            st.error(f"Erreur API: {response.status_code}")
-                            
+                            st.session_state.predictions_history.append({
+                                **customer,
+                                **pred,
+                                "risk_level": 'High' if pred['churn_probability'] > 0.7 
+                                             else 'Medium' if pred['churn_probability'] > 0.3 
+                                             else 'Low',
+                                "timestamp": datetime.now().isoformat(),
+                                "type": "batch"
+                            })
+                        
                     except Exception as e:
                         st.error(f"Erreur: {str(e)}")
         
@@ -401,36 +395,28 @@ with tab2:
                             try:
                                 clients_list = df.to_dict('records')
                                 
-                                response = requests.post(
-                                    f"{API_BASE_URL}/predict/batch",
-                                    json=clients_list,
-                                    timeout=30
+                                predictions = client.predict_batch(clients_list)
+                                
+                                # Ajout des prédictions
+                                result_df = df.copy()
+                                result_df['Churn_Probability'] = [p['churn_probability'] for p in predictions]
+                                result_df['Prediction'] = [p['prediction'] for p in predictions]
+                                
+                                st.markdown("### Résultats")
+                                st.dataframe(result_df, use_container_width=True)
+                                
+                                # Graphique des prédictions
+                                fig, ax = plt.subplots(figsize=(10, 4))
+                                result_df['Prediction'].value_counts().plot(
+                                    kind='bar',
+                                    color=['green', 'red'],
+                                    ax=ax
                                 )
+                                ax.set_title('Distribution des prédictions de churn')
+                                ax.set_xlabel('Prédiction (0=Non, 1=Oui)')
+                                ax.set_ylabel('Nombre de clients')
+                                st.pyplot(fig)
                                 
-                                if response.status_code == 200:
-                                    results = response.json()
-                                    predictions = results['predictions']
-                                    
-                                    # Ajout des prédictions
-                                    result_df = df.copy()
-                                    result_df['Churn_Probability'] = [p['churn_probability'] for p in predictions]
-                                    result_df['Prediction'] = [p['prediction'] for p in predictions]
-                                    
-                                    st.markdown("### Résultats")
-                                    st.dataframe(result_df, use_container_width=True)
-                                    
-                                    # Graphique des prédictions
-                                    fig, ax = plt.subplots(figsize=(10, 4))
-                                    result_df['Prediction'].value_counts().plot(
-                                        kind='bar',
-                                        color=['green', 'red'],
-                                        ax=ax
-                                    )
-                                    ax.set_title('Distribution des prédictions de churn')
-                                    ax.set_xlabel('Prédiction (0=Non, 1=Oui)')
-                                    ax.set_ylabel('Nombre de clients')
-                                    st.pyplot(fig)
-                                    
                             except Exception as e:
                                 st.error(f"Erreur: {str(e)}")
             except Exception as e:
@@ -476,7 +462,8 @@ with tab3:
         try:
             # Lire et sauvegarder le fichier
             prod_df = pd.read_csv(uploaded_prod_file)
-            prod_df.to_csv(prod_data_path, index=False)
+            # CSV plus récent qu'un éventuel parquet : c'est lui qui sera lu (app/dataset_io.py)
+            write_dataset(prod_df, prod_data_path)
             
             st.success(f"✅ Fichier chargé ({len(prod_df)} lignes, {len(prod_df.columns)} colonnes)")
             
@@ -489,8 +476,8 @@ with tab3:
                 with st.spinner("Analyse en cours..."):
                     try:
                         # Appel API
-                        response = requests.post(
-                            f"{API_BASE_URL}/drift/check",
+                        response = client.request(
+                            "POST", "/drift/check",
                             params={"threshold": threshold},
                             timeout=30
                         )
@@ -558,8 +545,8 @@ with tab3:
                             with alert_col1:
                                 if st.button("🚨 Envoyer alerte de drift", key="send_alert"):
                                     try:
-                                        alert_response = requests.post(
-                                            f"{API_BASE_URL}/drift/alert",
+                                        alert_response = client.request(
+                                            "POST", "/drift/alert",
                                             params={
                                                 "message": f"Drift détecté: {result['features_drifted']}/{result['features_analyzed']} features",
                                                 "severity": "warning"
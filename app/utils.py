@@ -0,0 +1,74 @@
+"""
+Utilitaires partagés par l'API : ordre des features et niveaux de risque
+"""
+from typing import List
+
+import numpy as np
+
+# Ordre des colonnes attendu par le modèle (identique à data/bank_churn.csv)
+FEATURE_COLUMNS = [
+    "CreditScore",
+    "Age",
+    "Tenure",
+    "Balance",
+    "NumOfProducts",
+    "HasCrCard",
+    "IsActiveMember",
+    "EstimatedSalary",
+    "Geography_Germany",
+    "Geography_Spain",
+]
+
+# Seuils métier
+LOW_RISK_THRESHOLD = 0.3
+HIGH_RISK_THRESHOLD = 0.7
+DECISION_THRESHOLD = 0.5
+
+
+def synthetic_features(n_rows: int, seed: int = 42) -> np.ndarray:
+    """Lignes synthétiques plausibles (même recette que generate_data.py), pour le warm-up"""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.integers(300, 850, n_rows),
+        rng.integers(18, 80, n_rows),
+        rng.integers(0, 11, n_rows),
+        rng.uniform(0, 200000, n_rows),
+        rng.integers(1, 5, n_rows),
+        rng.integers(0, 2, n_rows),
+        rng.integers(0, 2, n_rows),
+        rng.uniform(20000, 150000, n_rows),
+        rng.integers(0, 2, n_rows),
+        rng.integers(0, 2, n_rows),
+    ]).astype(np.float64)
+
+
+def features_to_array(features_list: List) -> np.ndarray:
+    """Construit la matrice (n_clients, n_features) dans l'ordre FEATURE_COLUMNS"""
+    return np.array(
+        [[getattr(f, col) for col in FEATURE_COLUMNS] for f in features_list],
+        dtype=np.float64,
+    )
+
+
+def risk_level(proba: float) -> str:
+    """Niveau de risque Low / Medium / High d'une probabilité de churn"""
+    return "Low" if proba < LOW_RISK_THRESHOLD else "Medium" if proba < HIGH_RISK_THRESHOLD else "High"
+
+
+def is_binary_forest(model) -> bool:
+    """Forêt sklearn binaire entraînée, dont les arbres sont accessibles un par un"""
+    estimators = getattr(model, "estimators_", None)
+    classes = getattr(model, "classes_", None)
+    return (
+        isinstance(estimators, list)
+        and len(estimators) > 0
+        and hasattr(estimators[0], "tree_")
+        and classes is not None
+        and len(classes) == 2
+    )
+
+
+def node_positive_proba(tree) -> np.ndarray:
+    """Probabilité de la classe 1 en chaque noeud d'un arbre (valeurs normalisées comme predict_proba)"""
+    value = tree.value[:, 0, :]
+    return value[:, 1] / value.sum(axis=1)
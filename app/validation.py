@@ -0,0 +1,96 @@
+"""
+Validation vectorisée d'un batch de clients.
+
+Les bornes ge/le et les types de CustomerFeatures sont vérifiés colonne par
+colonne sur tout le batch (opérations numpy), au lieu d'instancier un modèle
+pydantic par ligne. Une ligne invalide n'invalide plus tout le batch : elle
+reçoit ses propres erreurs (format proche de celui de pydantic) et les
+lignes valides sont scorées.
+"""
+from typing import Dict, List
+
+import numpy as np
+
+from app.models import FEATURE_BOUNDS, INTEGER_FEATURES
+from app.utils import FEATURE_COLUMNS
+
+
+def _bound_arrays():
+    ge = np.array([FEATURE_BOUNDS[name][0] if FEATURE_BOUNDS[name][0] is not None else -np.inf
+                   for name in FEATURE_COLUMNS], dtype=np.float64)
+    le = np.array([FEATURE_BOUNDS[name][1] if FEATURE_BOUNDS[name][1] is not None else np.inf
+                   for name in FEATURE_COLUMNS], dtype=np.float64)
+    return ge, le
+
+
+LOWER_BOUNDS, UPPER_BOUNDS = _bound_arrays()
+INTEGER_MASK = np.array([name in INTEGER_FEATURES for name in FEATURE_COLUMNS])
+
+
+def _numeric_column(values: list):
+    """(valeurs float64, masque des absents) ; None et non numériques -> NaN"""
+    try:
+        # Chemin rapide : colonne entièrement numérique (None -> NaN)
+        column = np.array(values, dtype=np.float64)
+        if column.ndim == 1:
+            return column, np.isnan(column)
+    except (TypeError, ValueError):
+        pass
+
+    import pandas as pd
+
+    series = pd.Series(values, dtype=object)
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64), series.isna().to_numpy()
+
+
+def validate_records(records: list):
+    """
+    Valide une liste de lignes JSON brutes.
+
+    Returns:
+        (X des lignes valides (n_valid, n_features), indices des lignes valides,
+         {indice: [erreurs]} pour les lignes invalides)
+    """
+    n = len(records)
+    is_object = np.fromiter((isinstance(r, dict) for r in records), dtype=bool, count=n)
+    rows = [r if ok else {} for r, ok in zip(records, is_object)]
+
+    X = np.empty((n, len(FEATURE_COLUMNS)))
+    missing = np.zeros(X.shape, dtype=bool)
+    for j, name in enumerate(FEATURE_COLUMNS):
+        X[:, j], missing[:, j] = _numeric_column([r.get(name) for r in rows])
+    not_numeric = np.isnan(X) & ~missing
+    present = ~np.isnan(X)
+
+    # Comparaisons à NaN fausses : seules les valeurs présentes sont testées
+    checks = [
+        ("missing", missing, lambda name: "Field required"),
+        ("float_parsing", not_numeric, lambda name: "Input should be a valid number"),
+        ("greater_than_equal", present & (X < LOWER_BOUNDS),
+         lambda name: f"Input should be greater than or equal to {FEATURE_BOUNDS[name][0]}"),
+        ("less_than_equal", present & (X > UPPER_BOUNDS),
+         lambda name: f"Input should be less than or equal to {FEATURE_BOUNDS[name][1]}"),
+        ("int_from_float", present & INTEGER_MASK & (X != np.round(X)),
+         lambda name: "Input should be a valid integer, got a number with a fractional part"),
+    ]
+
+    errors: Dict[int, List[dict]] = {
+        int(i): [{"loc": [], "msg": "Input should be an object", "type": "model_type"}]
+        for i in np.flatnonzero(~is_object)
+    }
+    invalid = ~is_object
+    for error_type, mask, message in checks:
+        mask = mask & is_object[:, None]
+        invalid |= mask.any(axis=1)
+        # Boucle sur les erreurs uniquement, jamais sur les lignes valides
+        for row, col in zip(*np.nonzero(mask)):
+            name = FEATURE_COLUMNS[col]
+            errors.setdefault(int(row), []).append({
+                "loc": [name],
+                "msg": message(name),
+                "type": error_type,
+                "input": None if missing[row, col] else records[row].get(name),
+            })
+
+    valid_idx = np.flatnonzero(~invalid)
+    return X[valid_idx], valid_idx, errors
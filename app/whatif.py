@@ -0,0 +1,82 @@
+"""
+Analyse what-if / sensibilité : variation d'une ou plusieurs features pour
+un client (surface de réponse) ou un lot de clients (courbes ICE).
+
+Toutes les variantes (produit cartésien des grilles, pour chaque client)
+sont construites dans une seule matrice et scorées en un appel vectorisé,
+au lieu de dizaines d'appels /predict.
+"""
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.models import FEATURE_BOUNDS, INTEGER_FEATURES
+from app.utils import FEATURE_COLUMNS
+
+# Nombre maximal de lignes scorées par requête (clients x combinaisons)
+MAX_WHATIF_ROWS = int(os.getenv("MAX_WHATIF_ROWS", "100000"))
+
+
+class GridError(ValueError):
+    """Grille invalide (feature inconnue, valeur hors bornes, trop de combinaisons)"""
+
+
+def validate_grid(grid: Dict[str, List[float]]) -> List[Tuple[str, np.ndarray]]:
+    """Vérifie la grille contre les bornes de CustomerFeatures"""
+    if not grid:
+        raise GridError("La grille doit contenir au moins une feature")
+
+    axes = []
+    for name, values in grid.items():
+        if name not in FEATURE_COLUMNS:
+            raise GridError(f"Feature inconnue: {name}")
+        if not values:
+            raise GridError(f"Aucune valeur pour {name}")
+        values = np.asarray(values, dtype=np.float64)
+
+        ge, le = FEATURE_BOUNDS[name]
+        if ge is not None and (values < ge).any():
+            raise GridError(f"{name}: valeurs < {ge}")
+        if le is not None and (values > le).any():
+            raise GridError(f"{name}: valeurs > {le}")
+        if name in INTEGER_FEATURES and (values != np.round(values)).any():
+            raise GridError(f"{name}: valeurs entières attendues")
+        axes.append((name, values))
+    return axes
+
+
+def build_variants(base: np.ndarray, axes: List[Tuple[str, np.ndarray]]):
+    """
+    Matrice de toutes les variantes, clients en bloc :
+    lignes [c * n_combos, (c + 1) * n_combos) = client c sur toute la grille.
+
+    Returns:
+        (X (n_clients * n_combos, n_features), forme de la grille)
+    """
+    shape = tuple(len(values) for _, values in axes)
+    n_combos = int(np.prod(shape))
+    if len(base) * n_combos > MAX_WHATIF_ROWS:
+        raise GridError(
+            f"{len(base)} clients x {n_combos} combinaisons dépasse la limite de {MAX_WHATIF_ROWS} lignes"
+        )
+
+    mesh = np.meshgrid(*[values for _, values in axes], indexing="ij")
+    combos = np.column_stack([m.ravel() for m in mesh])
+    columns = [FEATURE_COLUMNS.index(name) for name, _ in axes]
+
+    X = np.repeat(base, n_combos, axis=0)
+    X[:, columns] = np.tile(combos, (len(base), 1))
+    return X, shape
+
+
+def score_whatif(model, base: np.ndarray, axes):
+    """
+    Score les clients de base et toutes leurs variantes en un seul predict_proba.
+
+    Returns:
+        (probabilités de base (n_clients,), surfaces (n_clients, *forme de la grille))
+    """
+    X, shape = build_variants(base, axes)
+    probas = model.predict_proba(np.vstack([base, X]))[:, 1]
+    return probas[:len(base)], probas[len(base):].reshape((len(base),) + shape)
@@ -0,0 +1,235 @@
+"""
+Benchmark du moteur de drift : temps, mémoire et pouvoir de détection en
+fonction du volume de données et du niveau de drift.
+
+Pour chaque combinaison (lignes, features, niveau low/medium/high) :
+  - référence : generate_data.generate_bank_data (n lignes)
+  - production : échantillon indépendant du même générateur, puis
+    drift_data_gen.apply_drift au niveau demandé
+  - au-delà des 10 features du dataset, des features gaussiennes sont
+    ajoutées ; une sur deux est décalée de EXTRA_SHIFT écarts-types en
+    production (les autres ne driftent pas)
+
+Le moteur (detect_drift par défaut, ou --engine module:fonction de même
+signature) tourne dans un processus neuf, avec et sans graphiques :
+temps mural, pic de RSS, part des features réellement driftées détectées
+(rappel) et part des features stables signalées à tort.
+
+Les combinaisons dépassant --max-cells (lignes x features) sont ignorées :
+10M lignes x 500 features représentent ~40 Go en mémoire et bien plus en CSV.
+
+Usage :
+    python benchmark_drift.py
+    python benchmark_drift.py --rows 1000 100000 10000000 --features 10 500 --max-cells 5e9
+    python benchmark_drift.py --engine app.drift_fast:detect_drift --no-plot
+"""
+import argparse
+import importlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import multiprocessing
+
+import numpy as np
+
+from drift_data_gen import apply_drift, drifted_features
+from generate_data import generate_bank_data
+
+DEFAULT_ROWS = (1_000, 10_000, 100_000, 1_000_000)
+DEFAULT_FEATURES = (10, 50)
+DRIFT_LEVELS = ("low", "medium", "high")
+BASE_FEATURES = 10
+# Décalage des features ajoutées driftées, en écarts-types
+EXTRA_SHIFT = {"low": 0.05, "medium": 0.1, "high": 0.2}
+DEFAULT_ENGINE = "app.drift_detect:detect_drift"
+
+
+# =========================
+# DONNÉES
+# =========================
+def build_datasets(n_rows, n_features, drift_level, seed=42):
+    """(référence, production, features réellement driftées)"""
+    reference = generate_bank_data(n_rows, seed=seed)
+    production = apply_drift(generate_bank_data(n_rows, seed=seed + 1), drift_level, seed=seed)
+    truth = set(drifted_features(drift_level))
+
+    rng = np.random.default_rng(seed)
+    for i in range(max(0, n_features - BASE_FEATURES)):
+        name = f"Extra_{i:03d}"
+        reference[name] = rng.standard_normal(n_rows)
+        production[name] = rng.standard_normal(n_rows)
+        if i % 2 == 0:
+            production[name] += EXTRA_SHIFT[drift_level]
+            truth.add(name)
+    return reference, production, truth
+
+
+def write_datasets(directory, n_rows, n_features, drift_level, seed=42):
+    reference, production, truth = build_datasets(n_rows, n_features, drift_level, seed)
+    reference_file = os.path.join(directory, "reference.csv")
+    production_file = os.path.join(directory, "production.csv")
+    reference.to_csv(reference_file, index=False)
+    production.to_csv(production_file, index=False)
+    features = [c for c in reference.columns if c != "Exited"]
+    return reference_file, production_file, features, truth
+
+
+# =========================
+# MESURE (processus neuf)
+# =========================
+def load_engine(spec):
+    module_name, _, function_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), function_name or "detect_drift")
+
+
+def _peak_rss_bytes():
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _measure(engine, reference_file, production_file, output_dir, threshold, plot):
+    detect = load_engine(engine)
+    if plot:
+        # Imports des graphiques hors mesure de temps
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot  # noqa: F401
+        import seaborn  # noqa: F401
+    before = _peak_rss_bytes()
+    start = time.perf_counter()
+    results = detect(reference_file, production_file, threshold=threshold, output_dir=output_dir, plot=plot)
+    wall = time.perf_counter() - start
+    return {
+        "wall_s": wall,
+        "peak_rss_bytes": _peak_rss_bytes(),
+        "rss_before_bytes": before,
+        "detected": sorted(f for f, r in results.items() if r["drift_detected"]),
+    }
+
+
+def measure(engine, reference_file, production_file, output_dir, threshold=0.05, plot=True):
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(_measure, engine, reference_file, production_file,
+                           output_dir, threshold, plot).result()
+
+
+def detection_scores(detected, truth, features) -> dict:
+    detected, truth = set(detected), set(truth)
+    stable = set(features) - truth
+    return {
+        "true_drifted": len(truth),
+        "detected": len(detected),
+        "recall": round(len(detected & truth) / len(truth), 4) if truth else None,
+        "false_positive_rate": round(len(detected & stable) / len(stable), 4) if stable else None,
+        "missed": sorted(truth - detected),
+    }
+
+
+# =========================
+# SCÉNARIO
+# =========================
+def run_benchmark(rows=DEFAULT_ROWS, features=DEFAULT_FEATURES, levels=DRIFT_LEVELS,
+                  plots=(False, True), engine=DEFAULT_ENGINE, threshold=0.05,
+                  max_cells=5e7, workdir=None, seed=42):
+    # Un workdir fourni n'appartient pas au benchmark : seuls ses sous-dossiers sont supprimés
+    own_workdir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="drift-bench-")
+    runs = []
+    try:
+        for n_rows in rows:
+            for n_features in features:
+                if n_features < BASE_FEATURES:
+                    raise ValueError(f"Au moins {BASE_FEATURES} features (celles du dataset)")
+                if n_rows * n_features > max_cells:
+                    runs.append({"rows": n_rows, "features": n_features, "skipped": "max_cells"})
+                    print(f"  {n_rows:>10,} lignes x {n_features:>4} features : ignoré (> --max-cells)")
+                    continue
+                for level in levels:
+                    data_dir = os.path.join(workdir, f"{n_rows}-{n_features}-{level}")
+                    os.makedirs(data_dir, exist_ok=True)
+                    try:
+                        reference_file, production_file, columns, truth = write_datasets(
+                            data_dir, n_rows, n_features, level, seed
+                        )
+                        for plot in plots:
+                            output_dir = os.path.join(data_dir, "plots" if plot else "no-plots")
+                            m = measure(engine, reference_file, production_file, output_dir, threshold, plot)
+                            run = {
+                                "rows": n_rows,
+                                "features": n_features,
+                                "drift_level": level,
+                                "plot": plot,
+                                "wall_s": round(m["wall_s"], 4),
+                                "peak_rss_mb": round(m["peak_rss_bytes"] / 2 ** 20, 1),
+                                "call_rss_mb": round((m["peak_rss_bytes"] - m["rss_before_bytes"]) / 2 ** 20, 1),
+                                **detection_scores(m["detected"], truth, columns),
+                            }
+                            runs.append(run)
+                            print_run(run)
+                    finally:
+                        shutil.rmtree(data_dir, ignore_errors=True)
+    finally:
+        if own_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "engine": engine,
+            "threshold": threshold,
+            "extra_shift_sigma": EXTRA_SHIFT,
+            "max_cells": max_cells,
+            "seed": seed,
+        },
+        "runs": runs,
+    }
+
+
+def print_header():
+    print(f"{'lignes':>12}{'feat.':>7}{'niveau':>8}{'plot':>6}{'temps s':>10}"
+          f"{'pic Mo':>9}{'appel Mo':>10}{'rappel':>8}{'faux +':>8}")
+
+
+def print_run(run):
+    print(f"{run['rows']:>12,}{run['features']:>7}{run['drift_level']:>8}{'oui' if run['plot'] else 'non':>6}"
+          f"{run['wall_s']:>10.3f}{run['peak_rss_mb']:>9.1f}{run['call_rss_mb']:>10.1f}"
+          f"{run['recall']:>8.2f}{run['false_positive_rate'] or 0:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark temps / mémoire / détection du moteur de drift")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS))
+    parser.add_argument("--features", type=int, nargs="+", default=list(DEFAULT_FEATURES))
+    parser.add_argument("--levels", nargs="+", default=list(DRIFT_LEVELS), choices=DRIFT_LEVELS)
+    parser.add_argument("--no-plot", action="store_true", help="Seulement sans graphiques")
+    parser.add_argument("--plot-only", action="store_true", help="Seulement avec graphiques")
+    parser.add_argument("--engine", default=DEFAULT_ENGINE, help="module:fonction (signature de detect_drift)")
+    parser.add_argument("--threshold", type=float, default=0.05)
+    parser.add_argument("--max-cells", type=float, default=5e7, help="Lignes x features max par combinaison")
+    parser.add_argument("--workdir", default=None, help="Répertoire des CSV temporaires")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark_drift.json")
+    args = parser.parse_args()
+
+    plots = (False,) if args.no_plot else (True,) if args.plot_only else (False, True)
+
+    print("=" * 60)
+    print(f"BENCHMARK DU MOTEUR DE DRIFT : {args.engine}")
+    print("=" * 60)
+    print_header()
+
+    start = time.time()
+    results = run_benchmark(
+        args.rows, args.features, args.levels, plots, args.engine,
+        args.threshold, args.max_cells, args.workdir, args.seed,
+    )
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nRésultats : {args.output} ({time.time() - start:.1f} s)")
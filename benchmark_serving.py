@@ -0,0 +1,327 @@
+"""
+Benchmarks du chemin de service, hors ligne, contre un petit modèle
+entraîné localement sur des données synthétiques (aucun fichier requis).
+
+Couvre :
+  - construction de la matrice de features (features_to_array)
+  - validation pydantic (un client, un batch) et validation vectorisée
+  - predict_proba, de 1 à 100 000 lignes
+  - /predict et /predict/batch de bout en bout, via un client ASGI en processus
+
+Chaque benchmark donne p50 / p99 par appel et le débit en lignes/s.
+Les résultats peuvent être enregistrés comme référence (--save-baseline) ;
+un run de comparaison (--compare) échoue (code 1) si le débit baisse ou si
+la latence p99 augmente au-delà de la tolérance. Les gros cas ne font que
+quelques appels : en dessous de MIN_CALLS_FOR_P99 appels (dans le run ou la
+référence), leur "p99" n'est que l'appel le plus lent et c'est p50 qui est
+comparé.
+
+Les logs INFO de bank-churn-api et httpx sont coupés pendant les mesures de
+bout en bout (une ligne par prédiction sur la console fausserait les mesures).
+
+Usage :
+    python benchmark_serving.py --save-baseline benchmark_baseline.json
+    python benchmark_serving.py --compare benchmark_baseline.json --tolerance 0.2
+    python benchmark_serving.py --quick
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+import numpy as np
+
+from app.models import INTEGER_FEATURES, CustomerFeatures
+from app.utils import FEATURE_COLUMNS, features_to_array, synthetic_features
+
+PREDICT_SIZES = (1, 10, 100, 1000, 10000, 100000)
+FEATURE_SIZES = (1, 100, 10000)
+VALIDATION_SIZES = (100, 10000)
+API_BATCH_SIZES = (100, 1000)
+# Sous ce seuil, une hausse de latence est du bruit de mesure (ms)
+LATENCY_FLOOR_MS = 0.1
+# Appels minimum pour que p99 serve de critère de régression (sinon p50)
+MIN_CALLS_FOR_P99 = 100
+
+
+# =========================
+# MODÈLE ET DONNÉES
+# =========================
+def train_benchmark_model(n_rows=20000, n_estimators=100, max_depth=10, seed=42):
+    """Forêt aux paramètres de train_model.py, sur des lignes synthétiques"""
+    from sklearn.ensemble import RandomForestClassifier
+
+    from app.inference import pin_model_threads
+
+    X = synthetic_features(n_rows, seed=seed)
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n_rows) < (1 - X[:, 6]) * 0.4 + (X[:, 4] == 1) * 0.3).astype(int)
+    model = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, random_state=seed)
+    # n_jobs=1 comme dans l'exécuteur d'inférence de l'API
+    return pin_model_threads(model.fit(X, y), 1)
+
+
+def customer_payloads(n_rows, seed=0) -> List[dict]:
+    return [
+        {name: int(value) if name in INTEGER_FEATURES else float(value)
+         for name, value in zip(FEATURE_COLUMNS, row)}
+        for row in synthetic_features(n_rows, seed=seed)
+    ]
+
+
+# =========================
+# MESURE
+# =========================
+def repeats_for(n_rows, iterations, row_budget):
+    """Beaucoup d'appels pour les petits batchs, peu pour les gros"""
+    return int(min(iterations, max(5, row_budget // max(n_rows, 1))))
+
+
+def summarize(latencies_s, n_rows) -> dict:
+    latencies_ms = np.asarray(latencies_s) * 1000
+    return {
+        "rows": n_rows,
+        "calls": len(latencies_ms),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 4),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 4),
+        "mean_ms": round(float(latencies_ms.mean()), 4),
+        "throughput_rows_s": round(n_rows * len(latencies_ms) / (latencies_ms.sum() / 1000), 1),
+    }
+
+
+def time_calls(fn, repeat, warmup=2):
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def time_async_calls(fn, repeat, warmup=2):
+    for _ in range(warmup):
+        await fn()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+# =========================
+# BENCHMARKS
+# =========================
+def bench_features(iterations, row_budget) -> dict:
+    results = {}
+    for n in FEATURE_SIZES:
+        customers = [CustomerFeatures(**payload) for payload in customer_payloads(n)]
+        latencies = time_calls(lambda: features_to_array(customers), repeats_for(n, iterations, row_budget))
+        results[f"features_to_array/{n}"] = summarize(latencies, n)
+    return results
+
+
+def bench_validation(iterations, row_budget) -> dict:
+    from pydantic import TypeAdapter
+
+    from app.validation import validate_records
+
+    adapter = TypeAdapter(List[CustomerFeatures])
+    payload = customer_payloads(1)[0]
+    results = {
+        "validation/pydantic/1": summarize(
+            time_calls(lambda: CustomerFeatures(**payload), repeats_for(1, iterations, row_budget)), 1
+        )
+    }
+    for n in VALIDATION_SIZES:
+        payloads = customer_payloads(n)
+        repeat = repeats_for(n, iterations, row_budget)
+        results[f"validation/pydantic/{n}"] = summarize(
+            time_calls(lambda: adapter.validate_python(payloads), repeat), n
+        )
+        results[f"validation/vectorized/{n}"] = summarize(
+            time_calls(lambda: validate_records(payloads), repeat), n
+        )
+    return results
+
+
+def bench_predict_proba(model, iterations, row_budget) -> dict:
+    results = {}
+    for n in PREDICT_SIZES:
+        X = synthetic_features(n, seed=1)
+        latencies = time_calls(lambda: model.predict_proba(X), repeats_for(n, iterations, row_budget))
+        results[f"predict_proba/{n}"] = summarize(latencies, n)
+    return results
+
+
+async def _bench_api(model, iterations, row_budget) -> dict:
+    import httpx
+
+    import app.main as api
+
+    api.model = model
+    transport = httpx.ASGITransport(app=api.app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        payload = customer_payloads(1)[0]
+
+        async def predict_one():
+            response = await http.post("/predict", json=payload)
+            response.raise_for_status()
+
+        results["api/predict"] = summarize(
+            await time_async_calls(predict_one, repeats_for(1, iterations, row_budget)), 1
+        )
+
+        for n in API_BATCH_SIZES:
+            payloads = customer_payloads(n)
+
+            async def predict_batch():
+                response = await http.post("/predict/batch", json=payloads)
+                response.raise_for_status()
+
+            results[f"api/predict_batch/{n}"] = summarize(
+                await time_async_calls(predict_batch, repeats_for(n, iterations, row_budget)), n
+            )
+    return results
+
+
+def bench_api(model, iterations, row_budget) -> dict:
+    loggers = [logging.getLogger(name) for name in ("bank-churn-api", "httpx")]
+    levels = [log.level for log in loggers]
+    for log in loggers:
+        log.setLevel(logging.WARNING)
+    try:
+        return asyncio.run(_bench_api(model, iterations, row_budget))
+    finally:
+        for log, level in zip(loggers, levels):
+            log.setLevel(level)
+
+
+def environment() -> dict:
+    import sklearn
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_benchmarks(iterations=200, row_budget=2_000_000, n_estimators=100) -> dict:
+    model = train_benchmark_model(n_estimators=n_estimators)
+    benchmarks = {}
+    benchmarks.update(bench_features(iterations, row_budget))
+    benchmarks.update(bench_validation(iterations, row_budget))
+    benchmarks.update(bench_predict_proba(model, iterations, row_budget))
+    benchmarks.update(bench_api(model, iterations, row_budget))
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {"iterations": iterations, "row_budget": row_budget, "n_estimators": n_estimators},
+        "environment": environment(),
+        "benchmarks": benchmarks,
+    }
+
+
+# =========================
+# COMPARAISON
+# =========================
+def compare(results, baseline, tolerance=0.2) -> List[dict]:
+    """
+    Régressions : débit < référence x (1 - tol) ou latence > référence x (1 + tol),
+    la latence étant p99 si les deux runs ont au moins MIN_CALLS_FOR_P99 appels, p50 sinon
+    """
+    regressions = []
+    for name, current in results["benchmarks"].items():
+        reference = baseline["benchmarks"].get(name)
+        if reference is None:
+            continue
+        if current["throughput_rows_s"] < reference["throughput_rows_s"] * (1 - tolerance):
+            regressions.append({
+                "benchmark": name,
+                "metric": "throughput_rows_s",
+                "baseline": reference["throughput_rows_s"],
+                "current": current["throughput_rows_s"],
+                "change": round(current["throughput_rows_s"] / reference["throughput_rows_s"] - 1, 3),
+            })
+        enough_calls = min(current["calls"], reference["calls"]) >= MIN_CALLS_FOR_P99
+        latency = "p99_ms" if enough_calls else "p50_ms"
+        if (current[latency] > reference[latency] * (1 + tolerance)
+                and current[latency] - reference[latency] > LATENCY_FLOOR_MS):
+            regressions.append({
+                "benchmark": name,
+                "metric": latency,
+                "baseline": reference[latency],
+                "current": current[latency],
+                "change": round(current[latency] / reference[latency] - 1, 3),
+            })
+    return regressions
+
+
+def print_report(results, baseline=None):
+    print(f"{'benchmark':<32}{'p50 ms':>10}{'p99 ms':>10}{'lignes/s':>14}{'vs réf.':>10}")
+    for name, summary in results["benchmarks"].items():
+        reference = (baseline or {}).get("benchmarks", {}).get(name)
+        change = (f"{summary['throughput_rows_s'] / reference['throughput_rows_s'] - 1:+.1%}"
+                  if reference else "")
+        print(f"{name:<32}{summary['p50_ms']:>10.3f}{summary['p99_ms']:>10.3f}"
+              f"{summary['throughput_rows_s']:>14,.0f}{change:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks du chemin de service")
+    parser.add_argument("--iterations", type=int, default=200, help="Appels max par benchmark")
+    parser.add_argument("--row-budget", type=int, default=2_000_000, help="Lignes max par benchmark")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--quick", action="store_true", help="Run court (20 appels, 200k lignes max)")
+    parser.add_argument("--output", default="benchmark_serving.json")
+    parser.add_argument("--save-baseline", default=None, help="Enregistre les résultats comme référence")
+    parser.add_argument("--compare", default=None, help="Fichier de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.quick:
+        args.iterations, args.row_budget = 20, 200_000
+
+    print("=" * 60)
+    print("BENCHMARKS DU CHEMIN DE SERVICE")
+    print("=" * 60)
+
+    start = time.time()
+    results = run_benchmarks(args.iterations, args.row_budget, args.n_estimators)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("environment") != results["environment"]:
+            print(f"⚠️ Environnement différent de la référence : {baseline.get('environment')}")
+
+    print_report(results, baseline)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nRéférence enregistrée : {args.save_baseline}")
+    print(f"\nRésultats : {args.output} ({time.time() - start:.1f} s)")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} régression(s) au-delà de {args.tolerance:.0%} :")
+            for r in regressions:
+                print(f"   {r['benchmark']:<32}{r['metric']:<20}{r['baseline']} -> {r['current']} ({r['change']:+.1%})")
+            sys.exit(1)
+        print(f"\n✅ Aucune régression au-delà de {args.tolerance:.0%}")
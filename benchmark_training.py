@@ -0,0 +1,221 @@
+"""
+Benchmark de montée en charge de l'entraînement (capacité des ré-entraînements).
+
+Pour chaque taille de dataset synthétique (recette de generate_data.py) et
+chaque configuration de forêt (n_estimators x max_depth x n_jobs) :
+  - temps d'entraînement et pic de RSS (dans un processus neuf)
+  - taille du modèle sur disque (joblib) et temps de chargement
+  - latence d'inférence : une ligne (p50 / p99) et débit sur 1 000 lignes
+  - ROC AUC sur un test 80/20 stratifié (comme train_model.py)
+
+Seule la forêt est mesurée : le feature engineering, SMOTE et la validation
+croisée de train_model_mod.py multiplient ce coût (une GridSearch à k plis
+coûte ~k x la somme des fits de ses combinaisons).
+
+Chaque configuration est un run MLflow imbriqué sous un run parent ; le
+tableau récapitulatif est écrit en CSV et attaché au run parent.
+
+Usage :
+    python benchmark_training.py
+    python benchmark_training.py --rows 10000 100000 1000000 --n-estimators 100 300 \\
+        --max-depth 10 20 0 --n-jobs 1 -1 --report model/training_benchmark.csv
+"""
+import argparse
+import itertools
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from generate_data import generate_bank_data
+
+DEFAULT_ROWS = (10_000, 50_000, 200_000)
+DEFAULT_N_ESTIMATORS = (100, 300)
+DEFAULT_MAX_DEPTH = (10, None)
+DEFAULT_N_JOBS = (1, -1)
+SINGLE_ROW_CALLS = 200
+BATCH_ROWS = 1000
+TARGET = "Exited"
+
+
+# =========================
+# DONNÉES
+# =========================
+def write_split(directory, n_rows, seed=42) -> str:
+    """Split 80/20 stratifié d'un dataset synthétique, en .npz pour les processus de mesure"""
+    from sklearn.model_selection import train_test_split
+
+    df = generate_bank_data(n_rows, seed=seed)
+    X = df.drop(TARGET, axis=1).to_numpy(dtype=np.float64)
+    y = df[TARGET].to_numpy()
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    path = os.path.join(directory, f"split-{n_rows}.npz")
+    np.savez(path, X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test)
+    return path
+
+
+# =========================
+# MESURE (processus neuf)
+# =========================
+def _peak_rss_bytes():
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _measure(split_path, model_path, n_estimators, max_depth, n_jobs):
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import roc_auc_score
+
+    data = np.load(split_path)
+    X_train, X_test, y_train, y_test = data["X_train"], data["X_test"], data["y_train"], data["y_test"]
+
+    before = _peak_rss_bytes()
+    model = RandomForestClassifier(
+        n_estimators=n_estimators, max_depth=max_depth, min_samples_split=5,
+        n_jobs=n_jobs, random_state=42,
+    )
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+    peak = _peak_rss_bytes()
+
+    joblib.dump(model, model_path)
+    size = os.path.getsize(model_path)
+    del model
+    start = time.perf_counter()
+    model = joblib.load(model_path)
+    load_s = time.perf_counter() - start
+
+    # Inférence comme dans l'API : n_jobs=1
+    model.n_jobs = 1
+    roc_auc = roc_auc_score(y_test, model.predict_proba(X_test)[:, 1])
+
+    row = X_test[:1]
+    latencies = []
+    for _ in range(SINGLE_ROW_CALLS):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        latencies.append(time.perf_counter() - start)
+    batch = X_test[:BATCH_ROWS]
+    start = time.perf_counter()
+    model.predict_proba(batch)
+    batch_s = time.perf_counter() - start
+
+    return {
+        "fit_s": fit_s,
+        "peak_rss_mb": peak / 2 ** 20,
+        "fit_rss_mb": (peak - before) / 2 ** 20,
+        "model_size_mb": size / 2 ** 20,
+        "load_s": load_s,
+        "single_row_p50_ms": float(np.percentile(latencies, 50)) * 1000,
+        "single_row_p99_ms": float(np.percentile(latencies, 99)) * 1000,
+        "batch_rows_per_s": len(batch) / batch_s,
+        "roc_auc": roc_auc,
+    }
+
+
+def measure(split_path, model_path, n_estimators, max_depth, n_jobs) -> dict:
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(_measure, split_path, model_path, n_estimators, max_depth, n_jobs).result()
+
+
+# =========================
+# SCÉNARIO
+# =========================
+def run_benchmark(rows=DEFAULT_ROWS, n_estimators=DEFAULT_N_ESTIMATORS, max_depth=DEFAULT_MAX_DEPTH,
+                  n_jobs=DEFAULT_N_JOBS, seed=42, log_mlflow=True, workdir=None) -> pd.DataFrame:
+    if log_mlflow:
+        import mlflow
+
+    # Un workdir fourni n'appartient pas au benchmark : seuls ses fichiers sont supprimés
+    own_workdir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="training-bench-")
+    model_path = os.path.join(workdir, "model.pkl")
+    split_path = None
+    records = []
+    try:
+        for n_rows in rows:
+            split_path = write_split(workdir, n_rows, seed)
+            for trees, depth, jobs in itertools.product(n_estimators, max_depth, n_jobs):
+                metrics = measure(split_path, model_path, trees, depth, jobs)
+                # max_depth 0 = illimitée (None), comme en ligne de commande
+                params = {"rows": n_rows, "n_estimators": trees, "max_depth": depth or 0, "n_jobs": jobs}
+                records.append({**params, **metrics})
+                print(f"  {n_rows:>9,} lignes  {trees:>4} arbres  profondeur {str(depth):>4}  "
+                      f"n_jobs {jobs:>2} : fit {metrics['fit_s']:.2f} s, AUC {metrics['roc_auc']:.4f}")
+
+                if log_mlflow:
+                    with mlflow.start_run(run_name=f"rows{n_rows}-trees{trees}-depth{depth}-jobs{jobs}",
+                                          nested=True):
+                        mlflow.log_params(params)
+                        mlflow.log_metrics(metrics)
+            os.remove(split_path)
+            split_path = None
+    finally:
+        if own_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+        else:
+            for path in (split_path, model_path):
+                if path and os.path.exists(path):
+                    os.remove(path)
+
+    return pd.DataFrame.from_records(records).set_index(["rows", "n_estimators", "max_depth", "n_jobs"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de l'entraînement RandomForest")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS))
+    parser.add_argument("--n-estimators", type=int, nargs="+", default=list(DEFAULT_N_ESTIMATORS))
+    parser.add_argument("--max-depth", type=int, nargs="+", default=[10, 0],
+                        help="0 = profondeur illimitée (None)")
+    parser.add_argument("--n-jobs", type=int, nargs="+", default=list(DEFAULT_N_JOBS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-mlflow", action="store_true")
+    parser.add_argument("--report", default="model/training_benchmark.csv")
+    args = parser.parse_args()
+
+    max_depth = [depth or None for depth in args.max_depth]
+
+    print("=" * 60)
+    print("BENCHMARK DE L'ENTRAÎNEMENT")
+    print("=" * 60)
+
+    start = time.time()
+    if args.no_mlflow:
+        report = run_benchmark(args.rows, args.n_estimators, max_depth, args.n_jobs, args.seed, False)
+        report.to_csv(args.report)
+    else:
+        import mlflow
+
+        # Configuration MLflow
+        mlflow.set_tracking_uri("./mlruns")
+        mlflow.set_experiment("bank-churn-prediction")
+
+        with mlflow.start_run(run_name=f"training-benchmark-{datetime.now().strftime('%Y%m%d-%H%M%S')}"):
+            mlflow.log_params({
+                "rows": args.rows,
+                "n_estimators": args.n_estimators,
+                "max_depth": args.max_depth,
+                "n_jobs": args.n_jobs,
+                "cpu_count": os.cpu_count(),
+            })
+            report = run_benchmark(args.rows, args.n_estimators, max_depth, args.n_jobs, args.seed, True)
+            report.to_csv(args.report)
+            mlflow.log_artifact(args.report)
+            mlflow.set_tags({"task": "capacity_planning", "model_type": "RandomForest"})
+
+    print("\n" + report.round(4).to_string())
+    print("=" * 60)
+    print(f"📊 Rapport : {args.report} ({time.time() - start:.1f} s)")
+    print("=" * 60)
@@ -0,0 +1,253 @@
+"""
+Compression du modèle orientée latence : élagage d'arbres, limite de
+profondeur et suppression des features peu importantes.
+
+Chaque variante est comparée au modèle de base sur :
+ROC AUC, taille de l'artefact, temps de chargement et latence
+(1 ligne / batch). La plus petite variante dont l'AUC reste dans la
+tolérance configurée est exportée.
+
+Les variantes à features réduites sont enveloppées dans un Pipeline qui
+sélectionne les colonnes : elles prennent toujours les 10 features de
+l'API et se chargent via MODEL_PATH sans changement.
+
+Usage :
+    python compress_model.py --model model/churn_model.pkl --auc-tolerance 0.005
+"""
+import argparse
+import copy
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+
+from app.dataset_io import read_dataset
+
+TARGET = "Exited"
+
+
+# =========================
+# CONSTRUCTION DES VARIANTES
+# =========================
+def forest_of(model):
+    """Retourne la forêt d'un modèle (éventuellement dans un Pipeline)"""
+    return model.steps[-1][1] if isinstance(model, Pipeline) else model
+
+
+def with_first_trees(model, n_trees):
+    """Copie du modèle ne gardant que les n_trees premiers arbres (sans ré-entraînement)"""
+    model = copy.deepcopy(model)
+    forest = forest_of(model)
+    forest.estimators_ = forest.estimators_[:n_trees]
+    forest.n_estimators = len(forest.estimators_)
+    return model
+
+
+def important_feature_indices(model, threshold):
+    """Indices des features dont l'importance dépasse le seuil"""
+    importances = forest_of(model).feature_importances_
+    return [i for i, imp in enumerate(importances) if imp > threshold]
+
+
+def fit_variant(base_model, X_train, y_train, max_depth=None, feature_indices=None):
+    """Ré-entraîne la forêt avec une profondeur limitée et/ou un sous-ensemble de features"""
+    forest = clone(forest_of(base_model))
+    if max_depth is not None:
+        forest.set_params(max_depth=max_depth)
+
+    if feature_indices is None:
+        return forest.fit(X_train, y_train)
+
+    model = Pipeline([
+        ("select", ColumnTransformer([("keep", "passthrough", feature_indices)])),
+        ("forest", forest),
+    ])
+    return model.fit(X_train, y_train)
+
+
+def build_variants(base_model, X_train, y_train, tree_counts, depth_caps, importance_threshold):
+    """
+    Génère les variantes {nom: modèle}.
+
+    Les variantes à profondeur limitée / features réduites sont ré-entraînées
+    une seule fois puis élaguées aux différents nombres d'arbres.
+    """
+    n_base_trees = len(forest_of(base_model).estimators_)
+    tree_counts = sorted({n for n in tree_counts if n < n_base_trees})
+    features = important_feature_indices(base_model, importance_threshold)
+    if len(features) == X_train.shape[1]:
+        features = None
+
+    retrained = {"base": base_model}
+    for depth in depth_caps:
+        retrained[f"depth{depth}"] = fit_variant(base_model, X_train, y_train, max_depth=depth)
+    if features is not None:
+        retrained["features"] = fit_variant(base_model, X_train, y_train, feature_indices=features)
+        for depth in depth_caps:
+            retrained[f"features_depth{depth}"] = fit_variant(
+                base_model, X_train, y_train, max_depth=depth, feature_indices=features
+            )
+
+    variants = {}
+    for name, model in retrained.items():
+        variants[f"{name}_trees{n_base_trees}"] = model
+        for n_trees in tree_counts:
+            variants[f"{name}_trees{n_trees}"] = with_first_trees(model, n_trees)
+    return variants
+
+
+# =========================
+# MESURES
+# =========================
+def measure_variant(model, X_test, y_test, n_single=200, n_batch_repeats=10, batch_size=1000):
+    """AUC, taille, temps de chargement et latences d'une variante"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.pkl")
+        joblib.dump(model, path)
+        size_bytes = os.path.getsize(path)
+
+        load_times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            joblib.load(path)
+            load_times.append(time.perf_counter() - start)
+
+    single_row = X_test[:1]
+    single_times = []
+    for _ in range(n_single):
+        start = time.perf_counter()
+        model.predict_proba(single_row)
+        single_times.append(time.perf_counter() - start)
+
+    batch = np.resize(X_test, (batch_size, X_test.shape[1]))
+    batch_times = []
+    for _ in range(n_batch_repeats):
+        start = time.perf_counter()
+        model.predict_proba(batch)
+        batch_times.append(time.perf_counter() - start)
+
+    forest = forest_of(model)
+    return {
+        "n_trees": len(forest.estimators_),
+        "max_depth": max(tree.get_depth() for tree in forest.estimators_),
+        "n_features": int(forest.n_features_in_),
+        "roc_auc": float(roc_auc_score(y_test, model.predict_proba(X_test)[:, 1])),
+        "size_kb": size_bytes / 1024,
+        "load_ms": statistics.median(load_times) * 1000,
+        "single_row_ms": statistics.median(single_times) * 1000,
+        f"batch{batch_size}_ms": statistics.median(batch_times) * 1000,
+    }
+
+
+def compress_model(
+    model_path="model/churn_model.pkl",
+    data_file="data/bank_churn.csv",
+    tree_counts=(25, 50, 100),
+    depth_caps=(6, 8),
+    importance_threshold=0.01,
+    auc_tolerance=0.005,
+):
+    """
+    Construit et mesure toutes les variantes.
+
+    Returns:
+        (DataFrame du rapport trié par taille, nom de la variante retenue, dict des variantes)
+    """
+    base_model = joblib.load(model_path)
+    if not hasattr(forest_of(base_model), "estimators_"):
+        raise ValueError("La compression nécessite une forêt d'arbres entraînée")
+
+    df = read_dataset(data_file)
+    X = df.drop(TARGET, axis=1).to_numpy()
+    y = df[TARGET].to_numpy()
+    # Même split que train_model.py : le holdout n'a pas été vu par le modèle de base
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+
+    variants = build_variants(
+        base_model, X_train, y_train, tree_counts, depth_caps, importance_threshold
+    )
+
+    rows = []
+    for name, model in variants.items():
+        print(f"  ⏱️  {name}")
+        rows.append({"variant": name, **measure_variant(model, X_test, y_test)})
+    report = pd.DataFrame(rows).set_index("variant").sort_values("size_kb")
+
+    base_name = f"base_trees{len(forest_of(base_model).estimators_)}"
+    min_auc = report.loc[base_name, "roc_auc"] - auc_tolerance
+    report["within_tolerance"] = report["roc_auc"] >= min_auc
+    selected = report[report["within_tolerance"]].index[0]
+    return report, selected, variants
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compression du modèle de churn")
+    parser.add_argument("--model", default="model/churn_model.pkl")
+    parser.add_argument("--data", default="data/bank_churn.csv")
+    parser.add_argument("--tree-counts", type=int, nargs="+", default=[25, 50, 100])
+    parser.add_argument("--depth-caps", type=int, nargs="+", default=[6, 8])
+    parser.add_argument("--importance-threshold", type=float, default=0.01,
+                        help="Seuil d'importance sous lequel une feature est supprimée")
+    parser.add_argument("--auc-tolerance", type=float, default=0.005,
+                        help="Perte d'AUC maximale tolérée par rapport au modèle de base")
+    parser.add_argument("--output", default="model/churn_model_compressed.pkl")
+    parser.add_argument("--report", default="model/compression_report.csv")
+    args = parser.parse_args()
+
+    # Import ici : compress_model & co restent utilisables (et testables) sans MLflow
+    import mlflow
+
+    # Configuration MLflow
+    mlflow.set_tracking_uri("./mlruns")
+    mlflow.set_experiment("bank-churn-prediction")
+
+    print("=" * 60)
+    print("COMPRESSION DU MODÈLE")
+    print("=" * 60)
+
+    with mlflow.start_run(run_name=f"compression-{datetime.now().strftime('%Y%m%d-%H%M%S')}"):
+        report, selected, variants = compress_model(
+            model_path=args.model,
+            data_file=args.data,
+            tree_counts=args.tree_counts,
+            depth_caps=args.depth_caps,
+            importance_threshold=args.importance_threshold,
+            auc_tolerance=args.auc_tolerance,
+        )
+
+        report.to_csv(args.report)
+        joblib.dump(variants[selected], args.output)
+
+        mlflow.log_params({
+            "base_model": args.model,
+            "auc_tolerance": args.auc_tolerance,
+            "importance_threshold": args.importance_threshold,
+            "selected_variant": selected,
+        })
+        mlflow.log_metrics({
+            f"selected_{k}": float(v) for k, v in report.loc[selected].items()
+            if k != "within_tolerance"
+        })
+        mlflow.log_artifact(args.report)
+
+    print("\n" + report.round(4).to_string())
+    print("=" * 60)
+    print(f"🏆 Variante retenue : {selected}")
+    print(f"   AUC {report.loc[selected, 'roc_auc']:.4f}, "
+          f"{report.loc[selected, 'size_kb']:.0f} KB, "
+          f"{report.loc[selected, 'single_row_ms']:.2f} ms / ligne")
+    print(f"\n💾 Modèle compressé sauvegardé dans : {args.output}")
+    print(f"📊 Rapport : {args.report}")
+    print("=" * 60)
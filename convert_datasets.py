@@ -0,0 +1,60 @@
+"""
+Conversion unique des datasets CSV existants en parquet (app/dataset_io.py).
+
+Chaque CSV est converti par morceaux en un .parquet voisin ; les lecteurs
+(detect_drift, scripts d'entraînement, générateurs) le prennent ensuite
+automatiquement tant qu'il n'est pas plus ancien que le CSV.
+
+Usage :
+    python convert_datasets.py
+    python convert_datasets.py data/bank_churn.csv data/production_data.csv --compression zstd
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from app.dataset_io import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_COMPRESSION,
+    convert_to_parquet,
+    dataset_columns,
+    read_dataset,
+)
+
+DEFAULT_FILES = ["data/bank_churn.csv", "data/production_data.csv"]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Conversion des datasets CSV en parquet")
+    parser.add_argument("files", nargs="*", default=DEFAULT_FILES)
+    parser.add_argument("--compression", default=DEFAULT_COMPRESSION)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Lignes par row group")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("CONVERSION DES DATASETS EN PARQUET")
+    print("=" * 60)
+
+    for path in args.files:
+        try:
+            csv_read = timed(lambda: pd.read_csv(path))
+        except FileNotFoundError:
+            print(f"⚠️ {path} introuvable, ignoré")
+            continue
+        result = convert_to_parquet(path, compression=args.compression, chunk_size=args.chunk_size)
+        parquet_read = timed(lambda: read_dataset(result["output"]))
+        columns = dataset_columns(result["output"])[:2]
+        projected_read = timed(lambda: read_dataset(result["output"], columns=columns))
+
+        print(f"✅ {result['source']} -> {result['output']} ({result['rows']:,} lignes)")
+        print(f"   Taille : {result['csv_bytes'] / 1024:,.0f} Ko -> {result['parquet_bytes'] / 1024:,.0f} Ko "
+              f"(x{result['csv_bytes'] / max(result['parquet_bytes'], 1):.1f})")
+        print(f"   Lecture : CSV {csv_read * 1000:.1f} ms, parquet {parquet_read * 1000:.1f} ms, "
+              f"{len(columns)} colonnes {projected_read * 1000:.1f} ms")
@@ -0,0 +1,248 @@
+"""
+Génère des scénarios de drift dans le temps : une suite de partitions
+journalières ou horaires, chacune avec son propre niveau de drift.
+
+drift_data_gen.py produit une copie décalée statique ; ici le drift suit une
+trajectoire par feature :
+  - linear   : rampe de 0 à `amount` entre les positions `start` et `end` (0..1)
+  - step     : saut de `amount` à la position `at`
+  - seasonal : `amount` x sin(2π i / period), période en partitions
+Les features numériques sont décalées de `amount` (mode "add") ou
+multipliées par 1 + `amount` (mode "mul"), puis bornées comme CustomerFeatures.
+Pour Geography et IsActiveMember, une part `amount` x intensité des clients
+est re-tirée selon le mélange cible `mix` (changement de composition).
+
+Chaque partition part de la recette de generate_data.py avec un
+SeedSequence dérivé de son index : le résultat ne dépend pas du nombre de
+workers. Les partitions sont générées en parallèle et écrites dès qu'elles
+sont prêtes (<output>/dt=<date>/part.csv|parquet) ; _manifest.json donne,
+pour chaque partition, l'intensité appliquée à chaque feature (vérité
+terrain). Exited n'est pas modifié : drift des features seul.
+
+Usage :
+    python drift_scenario_gen.py --preset gradual --periods 90 --freq D --rows-per-partition 100000
+    python drift_scenario_gen.py --scenario my_scenario.json --periods 168 --freq H --format parquet
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.dataset_io import write_dataset
+from app.models import FEATURE_BOUNDS, INTEGER_FEATURES
+from generate_data import generate_bank_data
+from generate_large_data import FORMATS, check_format, chunk_rng
+
+TRAJECTORIES = ("linear", "step", "seasonal")
+FREQUENCIES = {"D": "%Y-%m-%d", "H": "%Y-%m-%dT%H"}
+DEFAULT_SEASONAL_PERIOD = {"D": 7, "H": 24}
+
+# Features catégorielles : catégorie -> valeurs des colonnes encodées
+CATEGORICAL_FEATURES = {
+    "Geography": {
+        "France": {"Geography_Germany": 0, "Geography_Spain": 0},
+        "Germany": {"Geography_Germany": 1, "Geography_Spain": 0},
+        "Spain": {"Geography_Germany": 0, "Geography_Spain": 1},
+    },
+    "IsActiveMember": {
+        "inactive": {"IsActiveMember": 0},
+        "active": {"IsActiveMember": 1},
+    },
+}
+
+PRESETS = {
+    "none": {},
+    "gradual": {
+        "Age": {"type": "linear", "amount": 8},
+        "CreditScore": {"type": "linear", "amount": -40},
+        "Balance": {"type": "linear", "amount": 0.25, "mode": "mul"},
+        "Geography": {"type": "linear", "mix": {"Germany": 0.6, "Spain": 0.2, "France": 0.2}},
+    },
+    "sudden": {
+        "CreditScore": {"type": "step", "amount": -50, "at": 0.5},
+        "EstimatedSalary": {"type": "step", "amount": 10000, "at": 0.5},
+        "IsActiveMember": {"type": "step", "at": 0.5, "mix": {"inactive": 0.7, "active": 0.3}},
+    },
+    "seasonal": {
+        "EstimatedSalary": {"type": "seasonal", "amount": 0.1, "mode": "mul"},
+        "Balance": {"type": "seasonal", "amount": 0.15, "mode": "mul"},
+        "IsActiveMember": {"type": "seasonal", "amount": 0.5, "mix": {"inactive": 0.8, "active": 0.2}},
+    },
+}
+
+
+# =========================
+# TRAJECTOIRES
+# =========================
+def validate_scenario(scenario):
+    for feature, spec in scenario.items():
+        if spec.get("type") not in TRAJECTORIES:
+            raise ValueError(f"{feature}: trajectoire inconnue {spec.get('type')} "
+                             f"(attendu: {', '.join(TRAJECTORIES)})")
+        if feature in CATEGORICAL_FEATURES:
+            unknown = set(spec.get("mix", {})) - set(CATEGORICAL_FEATURES[feature])
+            if not spec.get("mix") or unknown:
+                raise ValueError(f"{feature}: 'mix' requis, catégories possibles "
+                                 f"{', '.join(CATEGORICAL_FEATURES[feature])}")
+        elif feature not in FEATURE_BOUNDS:
+            raise ValueError(f"Feature inconnue: {feature}")
+        elif spec.get("mode", "add") not in ("add", "mul"):
+            raise ValueError(f"{feature}: mode 'add' ou 'mul'")
+    return scenario
+
+
+def trajectory(spec, index, n_partitions, seasonal_period=7) -> float:
+    """Intensité (sans unité) de la trajectoire pour la partition `index`"""
+    position = index / (n_partitions - 1) if n_partitions > 1 else 1.0
+    if spec["type"] == "linear":
+        start, end = spec.get("start", 0.0), spec.get("end", 1.0)
+        return float(np.clip((position - start) / max(end - start, 1e-12), 0.0, 1.0))
+    if spec["type"] == "step":
+        return 1.0 if position >= spec.get("at", 0.5) else 0.0
+    period = spec.get("period", seasonal_period)
+    return float(np.sin(2 * np.pi * (index + spec.get("phase", 0)) / period))
+
+
+def apply_scenario(df, scenario, index, n_partitions, rng, seasonal_period=7) -> dict:
+    """Applique le drift de la partition `index` à df (en place) ; retourne les intensités"""
+    intensities = {}
+    for feature, spec in scenario.items():
+        level = trajectory(spec, index, n_partitions, seasonal_period)
+
+        if feature in CATEGORICAL_FEATURES:
+            # Part de clients re-tirés selon le mélange cible (saisonnier ramené à 0..1)
+            if spec["type"] == "seasonal":
+                level = (level + 1) / 2
+            share = float(np.clip(spec.get("amount", 1.0) * level, 0.0, 1.0))
+            intensities[feature] = round(share, 6)
+            categories = list(spec["mix"])
+            weights = np.array([spec["mix"][c] for c in categories], dtype=np.float64)
+            redraw = rng.random_sample(len(df)) < share
+            drawn = rng.choice(len(categories), size=int(redraw.sum()), p=weights / weights.sum())
+            for code, category in enumerate(categories):
+                rows = np.flatnonzero(redraw)[drawn == code]
+                for column, value in CATEGORICAL_FEATURES[feature][category].items():
+                    df.iloc[rows, df.columns.get_loc(column)] = value
+            continue
+
+        # + 0.0 : pas de -0.0 dans le manifeste
+        amount = spec.get("amount", 0.0) * level + 0.0
+        intensities[feature] = round(amount, 6)
+        values = df[feature].to_numpy(dtype=np.float64)
+        values = values * (1 + amount) if spec.get("mode", "add") == "mul" else values + amount
+        low, high = FEATURE_BOUNDS[feature]
+        values = np.clip(values, low if low is not None else -np.inf, high if high is not None else np.inf)
+        df[feature] = np.round(values).astype(df[feature].dtype) if feature in INTEGER_FEATURES else values
+    return intensities
+
+
+# =========================
+# PARTITIONS
+# =========================
+def write_partition(job):
+    """Génère et écrit une partition (exécuté dans un worker)"""
+    output_dir, label, index, n_partitions, n_rows, scenario, seed, seasonal_period, fmt, compression = job
+    rng = chunk_rng(seed, index)
+    df = generate_bank_data(n_rows, seed=rng)
+    intensities = apply_scenario(df, scenario, index, n_partitions, rng, seasonal_period)
+
+    directory = os.path.join(output_dir, f"dt={label}")
+    os.makedirs(directory, exist_ok=True)
+    write_dataset(df, os.path.join(directory, f"part.{fmt}"), compression=compression)
+    return {
+        "partition": label,
+        "path": f"dt={label}/part.{fmt}",
+        "rows": n_rows,
+        "intensity": intensities,
+    }
+
+
+def generate_scenario(scenario, output_dir, start="2024-01-01", periods=30, freq="D",
+                      rows_per_partition=10000, workers=None, fmt="csv", compression="snappy",
+                      seed=42, seasonal_period=None):
+    validate_scenario(scenario)
+    check_format(fmt)
+    if freq not in FREQUENCIES:
+        raise ValueError(f"Fréquence inconnue: {freq} (attendu: {', '.join(FREQUENCIES)})")
+    seasonal_period = seasonal_period or DEFAULT_SEASONAL_PERIOD[freq]
+
+    labels = [ts.strftime(FREQUENCIES[freq]) for ts in pd.date_range(start, periods=periods, freq=freq.lower())]
+    jobs = [
+        (output_dir, label, i, periods, rows_per_partition, scenario, seed, seasonal_period, fmt, compression)
+        for i, label in enumerate(labels)
+    ]
+    os.makedirs(output_dir, exist_ok=True)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+
+    start_time = time.time()
+    partitions = []
+    pool = multiprocessing.get_context("spawn").Pool(workers) if workers > 1 else None
+    try:
+        for partition in (pool.imap(write_partition, jobs) if pool else map(write_partition, jobs)):
+            partitions.append(partition)
+            levels = ", ".join(f"{f}={v:+.3g}" for f, v in partition["intensity"].items())
+            print(f"  dt={partition['partition']} : {partition['rows']:,} lignes  {levels}")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    manifest = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "scenario": scenario,
+        "start": start,
+        "periods": periods,
+        "freq": freq,
+        "seasonal_period": seasonal_period,
+        "rows_per_partition": rows_per_partition,
+        "seed": seed,
+        "format": fmt,
+        "workers": workers,
+        "elapsed_s": round(time.time() - start_time, 3),
+        "partitions": partitions,
+    }
+    with open(os.path.join(output_dir, "_manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scénarios de drift partitionnés dans le temps")
+    parser.add_argument("--preset", choices=PRESETS, default="gradual")
+    parser.add_argument("--scenario", default=None, help="Fichier JSON {feature: trajectoire} (remplace --preset)")
+    parser.add_argument("--output", default="data/drift_scenario")
+    parser.add_argument("--start", default="2024-01-01")
+    parser.add_argument("--periods", type=int, default=30)
+    parser.add_argument("--freq", choices=FREQUENCIES, default="D", help="D = journalier, H = horaire")
+    parser.add_argument("--rows-per-partition", type=int, default=10000)
+    parser.add_argument("--seasonal-period", type=int, default=None,
+                        help="Période saisonnière en partitions (défaut : 7 en D, 24 en H)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--compression", default="snappy")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.scenario:
+        with open(args.scenario, encoding="utf-8") as f:
+            scenario = json.load(f)
+        name = args.scenario
+    else:
+        scenario, name = PRESETS[args.preset], args.preset
+
+    print("=" * 60)
+    print(f"SCÉNARIO DE DRIFT : {name} ({args.periods} partitions, fréquence {args.freq})")
+    print("=" * 60)
+
+    manifest = generate_scenario(
+        scenario, args.output, args.start, args.periods, args.freq, args.rows_per_partition,
+        args.workers, args.format, args.compression, args.seed, args.seasonal_period,
+    )
+
+    print(f"\n✅ {len(manifest['partitions'])} partitions x {args.rows_per_partition:,} lignes "
+          f"dans {args.output} ({manifest['elapsed_s']} s)")
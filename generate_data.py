@@ -2,32 +2,46 @@
 import pandas as pd
 import numpy as np
 
-np.random.seed(42)
-n_samples = 10000
-
-data = {
-    'CreditScore': np.random.randint(300, 850, n_samples),
-    'Age': np.random.randint(18, 80, n_samples),
-    'Tenure': np.random.randint(0, 11, n_samples),
-    'Balance': np.random.uniform(0, 200000, n_samples),
-    'NumOfProducts': np.random.randint(1, 5, n_samples),
-    'HasCrCard': np.random.choice([0, 1], n_samples),
-    'IsActiveMember': np.random.choice([0, 1], n_samples),
-    'EstimatedSalary': np.random.uniform(20000, 150000, n_samples),
-    'Geography_Germany': np.random.choice([0, 1], n_samples),
-    'Geography_Spain': np.random.choice([0, 1], n_samples),
-}
-
-# Target : plus de chance de partir si inactif, peu de produits, etc.
-churn_prob = (
-    (1 - data['IsActiveMember']) * 0.3 +
-    (data['NumOfProducts'] == 1) * 0.2 +
-    (data['Age'] > 60) * 0.15 +
-    (data['Balance'] == 0) * 0.25
-)
-data['Exited'] = (np.random.random(n_samples) < churn_prob).astype(int)
-
-df = pd.DataFrame(data)
-df.to_csv('data/bank_churn.csv', index=False)
-print(f"Dataset cree : {len(df)} lignes")
-print(f"Taux de churn : {df['Exited'].mean():.2%}")
\ No newline at end of file
+from app.dataset_io import write_dataset
+
+
+def generate_bank_data(n_samples=10000, seed=42):
+    """
+    Dataset synthétique de churn. Avec seed=42 et 10 000 lignes, identique à
+    l'ancien script (même suite de tirages qu'après np.random.seed(42)).
+
+    seed peut aussi être un np.random.RandomState déjà construit (par exemple
+    sur un SeedSequence par chunk, voir generate_large_data.py).
+    """
+    rng = seed if isinstance(seed, np.random.RandomState) else np.random.RandomState(seed)
+
+    data = {
+        'CreditScore': rng.randint(300, 850, n_samples),
+        'Age': rng.randint(18, 80, n_samples),
+        'Tenure': rng.randint(0, 11, n_samples),
+        'Balance': rng.uniform(0, 200000, n_samples),
+        'NumOfProducts': rng.randint(1, 5, n_samples),
+        'HasCrCard': rng.choice([0, 1], n_samples),
+        'IsActiveMember': rng.choice([0, 1], n_samples),
+        'EstimatedSalary': rng.uniform(20000, 150000, n_samples),
+        'Geography_Germany': rng.choice([0, 1], n_samples),
+        'Geography_Spain': rng.choice([0, 1], n_samples),
+    }
+
+    # Target : plus de chance de partir si inactif, peu de produits, etc.
+    churn_prob = (
+        (1 - data['IsActiveMember']) * 0.3 +
+        (data['NumOfProducts'] == 1) * 0.2 +
+        (data['Age'] > 60) * 0.15 +
+        (data['Balance'] == 0) * 0.25
+    )
+    data['Exited'] = (rng.random_sample(n_samples) < churn_prob).astype(int)
+
+    return pd.DataFrame(data)
+
+
+if __name__ == "__main__":
+    df = generate_bank_data()
+    write_dataset(df, 'data/bank_churn.csv')
+    print(f"Dataset cree : {len(df)} lignes")
+    print(f"Taux de churn : {df['Exited'].mean():.2%}")
@@ -0,0 +1,141 @@
+"""
+Générateur de données synthétiques à grande échelle (jusqu'à ~100M lignes),
+par chunks, en parallèle et déterministe.
+
+Même recette que generate_data.py (generate_bank_data : distributions des
+features et probabilité de churn), mais :
+  - les N lignes sont découpées en chunks de --chunk-size lignes
+  - le chunk i tire ses nombres d'un SeedSequence(seed, spawn_key=(i,)) :
+    le résultat ne dépend que de (seed, chunk-size), pas du nombre de workers
+  - chaque worker écrit son chunk sur disque (part-NNNNN.csv ou .parquet) :
+    la mémoire reste bornée à ~un chunk par worker
+  - un _manifest.json décrit les parts (lignes, taux de churn, format)
+
+Le format parquet (colonnes, compression) nécessite pyarrow ; l'écriture passe
+par app/dataset_io.py.
+
+Usage :
+    python generate_large_data.py --rows 100000000 --output data/large --workers 8
+    python generate_large_data.py --rows 5000000 --format parquet --output data/large_parquet
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.dataset_io import require_pyarrow, write_dataset
+from generate_data import generate_bank_data
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+FORMATS = ("csv", "parquet")
+
+
+def chunk_plan(n_rows, chunk_size):
+    """[(index du chunk, première ligne, nombre de lignes)]"""
+    return [
+        (i, start, min(chunk_size, n_rows - start))
+        for i, start in enumerate(range(0, n_rows, chunk_size))
+    ]
+
+
+def chunk_rng(seed, index):
+    """Générateur du chunk `index` : indépendant de l'ordre et du nombre de workers"""
+    return np.random.RandomState(np.random.MT19937(np.random.SeedSequence(seed, spawn_key=(index,))))
+
+
+def generate_chunk(seed, index, start, n_rows, customer_ids=False):
+    df = generate_bank_data(n_rows, seed=chunk_rng(seed, index))
+    if customer_ids:
+        df.insert(0, "CustomerId", np.arange(start + 1, start + n_rows + 1, dtype=np.int64))
+    return df
+
+
+def part_path(output_dir, index, fmt):
+    return os.path.join(output_dir, f"part-{index:05d}.{fmt}")
+
+
+def check_format(fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"Format inconnu: {fmt} (attendu: {', '.join(FORMATS)})")
+    if fmt == "parquet":
+        require_pyarrow()
+
+
+def write_chunk(job):
+    """Génère et écrit un chunk (exécuté dans un worker) ; retourne ses statistiques"""
+    output_dir, fmt, compression, seed, customer_ids, (index, start, n_rows) = job
+    df = generate_chunk(seed, index, start, n_rows, customer_ids)
+    path = part_path(output_dir, index, fmt)
+    write_dataset(df, path, compression=compression)
+    return {"part": os.path.basename(path), "rows": n_rows, "churners": int(df["Exited"].sum())}
+
+
+def generate_large_data(n_rows, output_dir, chunk_size=DEFAULT_CHUNK_SIZE, workers=None, fmt="csv",
+                        compression="snappy", seed=42, customer_ids=False):
+    check_format(fmt)
+
+    os.makedirs(output_dir, exist_ok=True)
+    plan = chunk_plan(n_rows, chunk_size)
+    jobs = [(output_dir, fmt, compression, seed, customer_ids, chunk) for chunk in plan]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(plan)))
+
+    start = time.time()
+    parts = []
+    pool = multiprocessing.get_context("spawn").Pool(workers) if workers > 1 else None
+    try:
+        for part in (pool.imap(write_chunk, jobs) if pool else map(write_chunk, jobs)):
+            parts.append(part)
+            print(f"  {part['part']} : {part['rows']:,} lignes ({len(parts)}/{len(jobs)})")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    elapsed = time.time() - start
+
+    manifest = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "rows": n_rows,
+        "chunk_size": chunk_size,
+        "seed": seed,
+        "format": fmt,
+        "compression": compression if fmt == "parquet" else None,
+        "customer_ids": customer_ids,
+        "churn_rate": sum(p["churners"] for p in parts) / n_rows if n_rows else None,
+        "workers": workers,
+        "elapsed_s": round(elapsed, 3),
+        "parts": parts,
+    }
+    with open(os.path.join(output_dir, "_manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génération parallèle et déterministe de données de churn")
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--output", default="data/large")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="Défaut : nombre de coeurs")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--compression", default="snappy", help="Compression parquet (snappy, zstd, gzip...)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--customer-ids", action="store_true", help="Ajoute une colonne CustomerId (1..N)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"GÉNÉRATION : {args.rows:,} lignes en chunks de {args.chunk_size:,} ({args.format})")
+    print("=" * 60)
+
+    manifest = generate_large_data(
+        args.rows, args.output, args.chunk_size, args.workers, args.format,
+        args.compression, args.seed, args.customer_ids,
+    )
+
+    print(f"\nDataset cree : {manifest['rows']:,} lignes en {len(manifest['parts'])} parts "
+          f"({manifest['workers']} workers, {manifest['elapsed_s']} s)")
+    print(f"Taux de churn : {manifest['churn_rate']:.2%}")
+    print(f"Répertoire : {args.output}")
@@ -0,0 +1,263 @@
+"""
+Générateur de charge en boucle ouverte (open loop).
+
+Contrairement à monitoring_load_test.py (boucle fermée : 10 workers qui
+attendent chacun leur réponse), les requêtes partent à des instants fixés
+à l'avance par le taux d'arrivée, que le serveur suive ou non. La latence
+est mesurée depuis l'instant d'envoi prévu : un serveur saturé ne
+ralentit pas la charge et ne masque pas sa latence de queue
+(« coordinated omission »).
+
+  - taux fixe (--rate) ou rampe linéaire (--rate -> --ramp-to)
+  - arrivées régulières ou poissoniennes (--poisson)
+  - mélange configurable de /predict, /predict/batch et /drift/check
+  - plusieurs processus (--processes) quand un seul ne suffit pas
+  - percentiles p50/p95/p99/p999, histogramme et taux d'erreur par endpoint,
+    écrits en JSON
+
+Usage :
+    uvicorn app.main:app --port 8000
+    python load_generator.py --url http://localhost:8000 --rate 200 --duration 60
+    python load_generator.py --rate 50 --ramp-to 800 --duration 120 --processes 4 \\
+        --mix predict=0.9,batch=0.09,drift=0.01 --output load_results.json
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+
+from app.latency import latency_summary
+from app.models import INTEGER_FEATURES
+from app.utils import FEATURE_COLUMNS, synthetic_features
+
+ENDPOINTS = {
+    "predict": ("POST", "/predict"),
+    "batch": ("POST", "/predict/batch"),
+    "drift": ("POST", "/drift/check"),
+}
+DEFAULT_MIX = "predict=0.9,batch=0.09,drift=0.01"
+PAYLOAD_POOL_SIZE = 1000
+
+
+def parse_mix(text: str) -> dict:
+    """'predict=0.9,batch=0.1' -> poids normalisés"""
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Endpoint inconnu dans le mélange: {name} (attendu: {', '.join(ENDPOINTS)})")
+        weights[name] = float(weight)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Le mélange doit avoir au moins un poids positif")
+    return {name: weight / total for name, weight in weights.items()}
+
+
+def arrival_times(rate: float, duration: float, ramp_to: float = None,
+                  poisson: bool = False, seed: int = 42) -> np.ndarray:
+    """
+    Instants d'envoi (s) sur [0, duration].
+
+    Le nombre cumulé d'arrivées attendu est N(t) = r0 t + a t^2 / 2 avec
+    a = (r1 - r0) / duration ; la i-ème arrivée est à N^-1(i) (régulier) ou
+    à N^-1 d'un processus de Poisson unitaire (changement d'échelle du temps).
+    """
+    r0 = rate
+    r1 = rate if ramp_to is None else ramp_to
+    a = (r1 - r0) / duration
+    total = r0 * duration + a * duration ** 2 / 2
+
+    if poisson:
+        rng = np.random.default_rng(seed)
+        targets = np.cumsum(rng.exponential(1.0, size=int(total * 1.2) + 100))
+        targets = targets[targets < total]
+    else:
+        targets = np.arange(int(total), dtype=np.float64)
+
+    if a == 0:
+        return targets / r0
+    return (-r0 + np.sqrt(r0 ** 2 + 2 * a * targets)) / a
+
+
+def payload_pool(seed: int = 42):
+    """Clients synthétiques pré-générés (la génération reste hors de la boucle de charge)"""
+    rows = synthetic_features(PAYLOAD_POOL_SIZE, seed=seed)
+    return [
+        {name: int(value) if name in INTEGER_FEATURES else float(value)
+         for name, value in zip(FEATURE_COLUMNS, row)}
+        for row in rows
+    ]
+
+
+async def run_worker(url, times, kinds, batch_size=50, max_in_flight=1000, timeout=30.0, seed=42):
+    """Envoie les requêtes aux instants prévus ; retourne les latences brutes par endpoint"""
+    import httpx
+
+    customers = payload_pool(seed)
+    rng = np.random.default_rng(seed)
+    latencies = defaultdict(list)
+    statuses = defaultdict(list)
+    dropped = defaultdict(int)
+
+    async def send(http, kind, scheduled):
+        method, path = ENDPOINTS[kind]
+        if kind == "predict":
+            kwargs = {"json": customers[rng.integers(len(customers))]}
+        elif kind == "batch":
+            start = rng.integers(len(customers) - batch_size + 1)
+            kwargs = {"json": customers[start:start + batch_size]}
+        else:
+            kwargs = {"params": {"threshold": 0.05}}
+        try:
+            response = await http.request(method, path, **kwargs)
+            status = response.status_code
+        except Exception as e:
+            status = type(e).__name__
+        latencies[kind].append(loop.time() - scheduled)
+        statuses[kind].append(status)
+
+    loop = asyncio.get_running_loop()
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as http:
+        in_flight = set()
+        start = loop.time() + 0.1
+        for t, kind in zip(times, kinds):
+            scheduled = start + t
+            delay = scheduled - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(in_flight) >= max_in_flight:
+                # Générateur saturé : la requête n'est pas envoyée, mais comptée
+                dropped[kind] += 1
+                continue
+            task = asyncio.create_task(send(http, kind, scheduled))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        if in_flight:
+            await asyncio.gather(*in_flight)
+        elapsed = loop.time() - start
+
+    return {
+        "latencies": dict(latencies),
+        "statuses": dict(statuses),
+        "dropped": dict(dropped),
+        "elapsed_s": elapsed,
+    }
+
+
+def _worker_process(args):
+    return asyncio.run(run_worker(*args))
+
+
+def run_load(url, rate, duration, ramp_to=None, mix=DEFAULT_MIX, batch_size=50, processes=1,
+             max_in_flight=1000, poisson=False, timeout=30.0, seed=42):
+    """Exécute le scénario (réparti entre `processes` processus) et agrège les résultats"""
+    weights = parse_mix(mix) if isinstance(mix, str) else mix
+    times = arrival_times(rate, duration, ramp_to, poisson, seed)
+    rng = np.random.default_rng(seed)
+    kinds = rng.choice(list(weights), p=list(weights.values()), size=len(times))
+
+    # Répartition entrelacée : chaque processus porte ~1/processes du taux, rampe comprise
+    jobs = [
+        (url, times[p::processes], kinds[p::processes], batch_size,
+         max(1, max_in_flight // processes), timeout, seed + p)
+        for p in range(processes)
+    ]
+    if processes == 1:
+        parts = [_worker_process(jobs[0])]
+    else:
+        with multiprocessing.get_context("spawn").Pool(processes) as pool:
+            parts = pool.map(_worker_process, jobs)
+
+    latencies, statuses, dropped = defaultdict(list), defaultdict(list), defaultdict(int)
+    for part in parts:
+        for kind in part["latencies"]:
+            latencies[kind].extend(part["latencies"][kind])
+            statuses[kind].extend(part["statuses"][kind])
+        for kind, n in part["dropped"].items():
+            dropped[kind] += n
+    elapsed = max(part["elapsed_s"] for part in parts)
+
+    sent = sum(len(values) for values in latencies.values())
+    endpoints = {}
+    for kind in weights:
+        endpoints[kind] = latency_summary(latencies[kind], statuses[kind])
+        endpoints[kind]["dropped"] = dropped[kind]
+
+    return {
+        "config": {
+            "url": url,
+            "rate": rate,
+            "ramp_to": ramp_to,
+            "duration_s": duration,
+            "poisson": poisson,
+            "mix": weights,
+            "batch_size": batch_size,
+            "processes": processes,
+            "max_in_flight": max_in_flight,
+        },
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "scheduled": int(len(times)),
+        "sent": sent,
+        "dropped": int(sum(dropped.values())),
+        "elapsed_s": round(elapsed, 3),
+        "achieved_rate": round(sent / elapsed, 2) if elapsed > 0 else None,
+        "overall": latency_summary(
+            [v for values in latencies.values() for v in values],
+            [s for values in statuses.values() for s in values],
+        ),
+        "endpoints": endpoints,
+    }
+
+
+def print_report(results):
+    print(f"Requêtes prévues : {results['scheduled']}  envoyées : {results['sent']}  "
+          f"abandonnées : {results['dropped']}")
+    print(f"Débit atteint    : {results['achieved_rate']} req/s en {results['elapsed_s']} s")
+    print()
+    print(f"{'endpoint':<10}{'count':>8}{'err %':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'p999':>10}  (ms)")
+    for name, summary in [("overall", results["overall"])] + list(results["endpoints"].items()):
+        latency = summary.get("latency_ms", {})
+        error_rate = summary["error_rate"]
+        print(f"{name:<10}{summary['count']:>8}"
+              f"{(error_rate * 100 if error_rate is not None else 0):>8.2f}"
+              + "".join(f"{latency.get(p, float('nan')):>10.2f}" for p in ("p50", "p95", "p99", "p999")))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Générateur de charge open-loop pour l'API de churn")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--rate", type=float, default=100, help="Requêtes/s (taux initial si --ramp-to)")
+    parser.add_argument("--ramp-to", type=float, default=None, help="Taux final d'une rampe linéaire")
+    parser.add_argument("--duration", type=float, default=30, help="Durée en secondes")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--poisson", action="store_true", help="Arrivées poissoniennes")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="load_results.json")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    ramp = f" -> {args.ramp_to}" if args.ramp_to is not None else ""
+    print(f"CHARGE OPEN-LOOP : {args.rate}{ramp} req/s pendant {args.duration} s ({args.processes} processus)")
+    print("=" * 60)
+
+    start = time.time()
+    results = run_load(
+        args.url, args.rate, args.duration, args.ramp_to, args.mix, args.batch_size,
+        args.processes, args.max_in_flight, args.poisson, args.timeout, args.seed,
+    )
+    print_report(results)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nRésultats : {args.output} ({time.time() - start:.1f} s)")
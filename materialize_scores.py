@@ -0,0 +1,111 @@
+"""
+Matérialisation nocturne des scores de churn.
+
+Score tout le fichier clients avec le modèle courant et écrit la table à
+largeur fixe lue par memory-map par l'API (voir app/score_store.py).
+La version du modèle (sha256 du fichier) est enregistrée à côté : si le
+modèle servi change, l'API repasse en scoring live jusqu'au prochain run.
+
+Mémoire bornée quelle que soit la taille du fichier : une première passe
+compte les lignes, les morceaux scorés sont écrits directement dans un
+tableau memory-mappé pré-alloué, puis le tri par id (argsort sur la seule
+colonne id) recopie les enregistrements par morceaux dans la table finale.
+
+Usage :
+    python materialize_scores.py --input data/production_data.csv --output model/scores.npy
+"""
+import argparse
+import os
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.ranking import DEFAULT_CHUNK_SIZE, iter_csv_chunks
+from app.score_store import (
+    SCORE_DTYPE,
+    check_unique_ids,
+    model_version,
+    publish_score_table,
+    tmp_table_path,
+)
+
+
+def count_rows(input_file, chunk_size=DEFAULT_CHUNK_SIZE) -> int:
+    """Nombre de lignes du CSV (première colonne seulement)"""
+    return sum(len(chunk) for chunk in pd.read_csv(input_file, usecols=[0], chunksize=chunk_size))
+
+
+def sort_by_id(unsorted, output, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Recopie `unsorted` trié par id dans `output`, morceau par morceau"""
+    order = np.argsort(unsorted["id"], kind="stable")
+    check_unique_ids(unsorted["id"][order])
+    for start in range(0, len(order), chunk_size):
+        output[start:start + chunk_size] = unsorted[order[start:start + chunk_size]]
+
+
+def materialize_scores(model_path, input_file, output_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Score le fichier par morceaux et écrit la table ; retourne les métadonnées"""
+    model = joblib.load(model_path)
+    version = model_version(model_path)
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    unsorted_path = output_path.with_suffix(".unsorted.npy")
+    n_rows = count_rows(input_file, chunk_size)
+
+    start = time.perf_counter()
+    try:
+        unsorted = np.lib.format.open_memmap(unsorted_path, mode="w+", dtype=SCORE_DTYPE, shape=(n_rows,))
+        position = 0
+        for chunk_ids, X in iter_csv_chunks(input_file, chunk_size):
+            if position + len(chunk_ids) > n_rows:
+                raise ValueError(f"{input_file} a changé pendant la matérialisation")
+            block = unsorted[position:position + len(chunk_ids)]
+            block["id"] = chunk_ids
+            block["probability"] = model.predict_proba(X)[:, 1]
+            block["features"] = X
+            position += len(chunk_ids)
+        if position != n_rows:
+            raise ValueError(f"{input_file} a changé pendant la matérialisation")
+        scoring_s = time.perf_counter() - start
+
+        table = np.lib.format.open_memmap(tmp_table_path(output_path), mode="w+",
+                                          dtype=SCORE_DTYPE, shape=(n_rows,))
+        sort_by_id(unsorted, table, chunk_size)
+        table.flush()
+        del table, unsorted
+    except Exception:
+        if tmp_table_path(output_path).exists():
+            os.remove(tmp_table_path(output_path))
+        raise
+    finally:
+        if unsorted_path.exists():
+            os.remove(unsorted_path)
+
+    metadata = publish_score_table(output_path, n_rows, version, model_path=str(model_path))
+    metadata["scoring_s"] = round(scoring_s, 3)
+    metadata["rows_per_second"] = round(n_rows / scoring_s, 1) if scoring_s > 0 else None
+    return metadata
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Matérialisation de la table de scores de churn")
+    parser.add_argument("--model", default="model/churn_model.pkl")
+    parser.add_argument("--input", default="data/production_data.csv")
+    parser.add_argument("--output", default="model/scores.npy")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("MATÉRIALISATION DES SCORES")
+    print("=" * 60)
+
+    metadata = materialize_scores(args.model, args.input, args.output, args.chunk_size)
+
+    print(f"Version du modèle : {metadata['model_version']}")
+    print(f"Lignes            : {metadata['rows']} ({SCORE_DTYPE.itemsize} octets / ligne)")
+    print(f"Scoring           : {metadata['scoring_s']} s ({metadata['rows_per_second']} lignes/s)")
+    print(f"Table             : {args.output}")
@@ -1,8 +1,9 @@
-import requests
 import random
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from app.client import ChurnClient
+
 # =========================================
 # CONFIGURATION
 # =========================================
@@ -15,6 +16,10 @@ N_DRIFT_CHECKS = 5
 N_MANUAL_ALERTS = 3
 MAX_WORKERS = 10
 
+# Session partagée (keep-alive) et retries sur 503 ; pas de regroupement :
+# chaque tâche doit solliciter /predict individuellement
+client = ChurnClient(API_BASE_URL, pool_size=MAX_WORKERS, coalesce=False)
+
 # =========================================
 # PAYLOADS
 # =========================================
@@ -37,32 +42,21 @@ def random_customer():
 # =========================================
 def call_predict(i):
     try:
-        r = requests.post(
-            f"{API_BASE_URL}/predict",
-            json=random_customer(),
-            timeout=10
-        )
+        r = client.request("POST", "/predict", json=random_customer(), timeout=10)
         return f"[PREDICT {i}] {r.status_code}"
     except Exception as e:
         return f"[PREDICT {i}] ERROR {e}"
 
 def call_drift(i):
     try:
-        r = requests.post(
-            f"{API_BASE_URL}/drift/check",
-            params={"threshold": 0.05},
-            timeout=30
-        )
+        r = client.request("POST", "/drift/check", params={"threshold": 0.05}, timeout=30)
         return f"[DRIFT {i}] {r.status_code}"
     except Exception as e:
         return f"[DRIFT {i}] ERROR {e}"
 
 def call_manual_alert(i):
     try:
-        r = requests.post(
-            f"{API_BASE_URL}/drift/alert",
-            timeout=10
-        )
+        r = client.request("POST", "/drift/alert", timeout=10)
         return f"[ALERT {i}] {r.status_code}"
     except Exception as e:
         return f"[ALERT {i}] ERROR {e}"
@@ -93,5 +87,6 @@ def run_load_test():
 
 if __name__ == "__main__":
     start = time.time()
-    run_load_test()
+    with client:
+        run_load_test()
     print(f"⏱️ Durée totale : {time.time() - start:.2f}s")
@@ -0,0 +1,52 @@
+"""
+Classement d'un portefeuille : top-K des clients les plus à risque.
+
+Le fichier est lu et scoré par morceaux, seul le top-K courant est gardé
+en mémoire (voir app/ranking.py). Le résultat est écrit en CSV, classé par
+probabilité de churn décroissante.
+
+Usage :
+    python rank_portfolio.py --input data/production_data.csv --top-k 5000 --output top_risk.csv
+"""
+import argparse
+
+import joblib
+import pandas as pd
+
+from app.ranking import DEFAULT_CHUNK_SIZE, DEFAULT_TOP_K, iter_csv_chunks, rank_population
+from app.utils import FEATURE_COLUMNS
+
+
+def rank_file(model_path, input_file, top_k=DEFAULT_TOP_K, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Top-K d'un fichier de population sous forme de DataFrame + statistiques"""
+    model = joblib.load(model_path)
+    ranked, stats = rank_population(model, iter_csv_chunks(input_file, chunk_size), k=top_k)
+    df = pd.DataFrame([
+        {"rank": r["rank"], "id": r["id"], "churn_probability": r["churn_probability"],
+         "risk_level": r["risk_level"], **r["features"]}
+        for r in ranked
+    ], columns=["rank", "id", "churn_probability", "risk_level"] + FEATURE_COLUMNS)
+    return df, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Top-K des clients les plus à risque de churn")
+    parser.add_argument("--model", default="model/churn_model.pkl")
+    parser.add_argument("--input", default="data/production_data.csv")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--output", default="top_risk.csv")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"CLASSEMENT DU PORTEFEUILLE (top {args.top_k})")
+    print("=" * 60)
+
+    df, stats = rank_file(args.model, args.input, args.top_k, args.chunk_size)
+    df.to_csv(args.output, index=False)
+
+    print(f"Lignes scorées    : {stats['rows_scored']} ({stats['chunks']} morceaux)")
+    print(f"Durée             : {stats['elapsed_s']} s (scoring: {stats['scoring_s']} s)")
+    print(f"Débit             : {stats['rows_per_second']} lignes/s")
+    print(f"Répartition top-K : {df['risk_level'].value_counts().to_dict()}")
+    print(f"Résultat          : {args.output}")
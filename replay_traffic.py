@@ -0,0 +1,182 @@
+"""
+Rejeu du trafic de production enregistré (app/recorder.py) contre une API locale.
+
+Les requêtes /predict et /predict/batch enregistrées sont renvoyées :
+  - au rythme d'origine          (--speed 1, défaut)
+  - N fois plus vite             (--speed N)
+  - aussi vite que possible      (--speed 0, borné par --concurrency)
+
+Rapport : percentiles de latence rejouée (et enregistrée, pour comparaison)
+et, quand la version du modèle servi est celle de l'enregistrement, la
+comparaison octet par octet des réponses.
+
+Usage :
+    RECORD_TRAFFIC_DIR=recordings uvicorn app.main:app        # capture
+    python replay_traffic.py --input recordings --url http://localhost:8000 --speed 4
+"""
+import argparse
+import asyncio
+import glob
+import gzip
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from app.latency import latency_summary
+
+MAX_MISMATCH_SAMPLES = 5
+
+
+def recording_files(source: str):
+    """Fichiers .ndjson.gz d'un répertoire (ou fichier unique), dans l'ordre"""
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, "*.ndjson.gz")))
+    return [source]
+
+
+def load_recordings(source: str):
+    """Enregistrements triés par horodatage"""
+    records = []
+    for path in recording_files(source):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    records.sort(key=lambda r: r["ts"])
+    return records
+
+
+async def replay(url, records, speed=1.0, concurrency=64, timeout=30.0):
+    import httpx
+
+    latencies = defaultdict(list)
+    statuses = defaultdict(list)
+    comparison = {"compared": 0, "identical": 0, "mismatched": 0, "not_compared": 0, "samples": []}
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout,
+                                 limits=httpx.Limits(max_connections=concurrency)) as http:
+        health = await http.get("/health")
+        live_version = health.json().get("model_version") if health.status_code == 200 else None
+
+        semaphore = asyncio.Semaphore(concurrency)
+        loop = asyncio.get_running_loop()
+
+        async def send(record, scheduled):
+            async with semaphore:
+                try:
+                    response = await http.post(record["path"], content=record["body"].encode("utf-8"),
+                                               headers={"Content-Type": "application/json"})
+                    status, content = response.status_code, response.content
+                except Exception as e:
+                    status, content = type(e).__name__, None
+            latencies[record["path"]].append(loop.time() - scheduled)
+            statuses[record["path"]].append(status)
+
+            comparable = (live_version is not None and record.get("model_version") == live_version
+                          and record.get("status") == 200 and status == 200)
+            if not comparable:
+                comparison["not_compared"] += 1
+                return
+            comparison["compared"] += 1
+            if content == record["response"].encode("utf-8"):
+                comparison["identical"] += 1
+                return
+            comparison["mismatched"] += 1
+            if len(comparison["samples"]) < MAX_MISMATCH_SAMPLES:
+                comparison["samples"].append({
+                    "path": record["path"],
+                    "body": record["body"][:500],
+                    "recorded": record["response"][:500],
+                    "replayed": content.decode("utf-8", errors="replace")[:500],
+                })
+
+        start = loop.time() + 0.1
+        t0 = records[0]["ts"] if records else 0.0
+        tasks = []
+        for record in records:
+            if speed > 0:
+                scheduled = start + (record["ts"] - t0) / speed
+                delay = scheduled - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            else:
+                # Aussi vite que possible : pas d'instant prévu, latence mesurée depuis la soumission
+                scheduled = loop.time()
+            tasks.append(asyncio.create_task(send(record, scheduled)))
+        await asyncio.gather(*tasks)
+        elapsed = loop.time() - start
+
+    return latencies, statuses, comparison, live_version, elapsed
+
+
+def run_replay(url, source, speed=1.0, concurrency=64, timeout=30.0):
+    records = load_recordings(source)
+    latencies, statuses, comparison, live_version, elapsed = asyncio.run(
+        replay(url, records, speed, concurrency, timeout)
+    )
+
+    recorded_by_path = defaultdict(list)
+    for record in records:
+        recorded_by_path[record["path"]].append(record)
+
+    paths = {}
+    for path, path_records in recorded_by_path.items():
+        paths[path] = {
+            "replayed": latency_summary(latencies[path], statuses[path]),
+            "recorded": latency_summary(
+                [r["latency_ms"] / 1000 for r in path_records],
+                [r["status"] for r in path_records],
+            ),
+        }
+
+    return {
+        "config": {"url": url, "input": source, "speed": speed, "concurrency": concurrency},
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "requests": len(records),
+        "recorded_span_s": round(records[-1]["ts"] - records[0]["ts"], 3) if records else 0.0,
+        "elapsed_s": round(elapsed, 3),
+        "live_model_version": live_version,
+        "overall": latency_summary(
+            [v for values in latencies.values() for v in values],
+            [s for values in statuses.values() for s in values],
+        ),
+        "paths": paths,
+        "comparison": comparison,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rejeu du trafic enregistré contre une API locale")
+    parser.add_argument("--input", default="recordings", help="Répertoire ou fichier .ndjson.gz")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="1 = rythme d'origine, N = N fois plus vite, 0 = aussi vite que possible")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", default="replay_results.json")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    pacing = "aussi vite que possible" if args.speed == 0 else f"vitesse x{args.speed}"
+    print(f"REJEU DU TRAFIC ({pacing})")
+    print("=" * 60)
+
+    start = time.time()
+    results = run_replay(args.url, args.input, args.speed, args.concurrency, args.timeout)
+
+    print(f"Requêtes         : {results['requests']} (durée enregistrée {results['recorded_span_s']} s, "
+          f"rejouée {results['elapsed_s']} s)")
+    for path, summary in results["paths"].items():
+        replayed = summary["replayed"].get("latency_ms", {})
+        recorded = summary["recorded"].get("latency_ms", {})
+        print(f"{path:<16} rejoué   p50={replayed.get('p50')} p99={replayed.get('p99')} "
+              f"p999={replayed.get('p999')} ms  erreurs={summary['replayed']['error_rate']}")
+        print(f"{'':<16} enregistré p50={recorded.get('p50')} p99={recorded.get('p99')} "
+              f"p999={recorded.get('p999')} ms")
+    comparison = results["comparison"]
+    print(f"Réponses         : {comparison['identical']}/{comparison['compared']} identiques "
+          f"({comparison['not_compared']} non comparées, version live {results['live_model_version']})")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nRésultats : {args.output} ({time.time() - start:.1f} s)")
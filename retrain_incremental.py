@@ -0,0 +1,221 @@
+"""
+Ré-entraînement incrémental (warm start) du RandomForest à partir des
+données de production labellisées.
+
+Deux modes :
+  - grow    : on garde tous les anciens arbres et on ajoute N arbres
+              entraînés uniquement sur les nouvelles données
+  - rolling : fenêtre glissante, les N plus anciens arbres sont remplacés
+              par N arbres entraînés sur les nouvelles données
+
+Le script compare le temps d'entraînement et l'AUC sur un holdout avec un
+ré-entraînement complet, puis écrit un nouvel artefact versionné.
+
+Usage :
+    python retrain_incremental.py --new-data data/production_data.csv --mode grow --n-new-trees 50
+"""
+import argparse
+import copy
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from app.dataset_io import read_dataset
+
+TARGET = "Exited"
+
+
+def load_labeled_data(path):
+    """Charge un dataset labellisé (parquet ou CSV) et sépare features / target"""
+    df = read_dataset(path)
+    if TARGET not in df.columns:
+        raise ValueError(f"Colonne '{TARGET}' absente de {path} : données non labellisées")
+    return df.drop(TARGET, axis=1), df[TARGET]
+
+
+def grow_forest(model, X_new, y_new, n_new_trees, mode="grow", window=None):
+    """
+    Ajoute n_new_trees arbres entraînés sur (X_new, y_new) à une copie du modèle.
+
+    En mode 'rolling', les arbres les plus anciens sont retirés pour que la
+    forêt finale contienne `window` arbres (par défaut la taille actuelle).
+    """
+    if not hasattr(model, "estimators_"):
+        raise ValueError("Le modèle de base n'est pas une forêt entraînée (estimators_ manquant)")
+    if mode not in ("grow", "rolling"):
+        raise ValueError(f"Mode inconnu: {mode} (attendu: grow, rolling)")
+    if pd.Series(y_new).nunique() < 2:
+        raise ValueError("Les nouvelles données doivent contenir les deux classes")
+
+    forest = copy.deepcopy(model)
+
+    if mode == "rolling":
+        window = window or len(forest.estimators_)
+        keep = max(window - n_new_trees, 0)
+        # Les arbres sont ajoutés en fin de liste : les plus anciens sont en tête
+        forest.estimators_ = forest.estimators_[len(forest.estimators_) - keep:]
+
+    forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + n_new_trees)
+    forest.fit(X_new, y_new)
+    forest.set_params(warm_start=False)
+    return forest
+
+
+def evaluate_auc(model, X, y):
+    return float(roc_auc_score(y, model.predict_proba(X)[:, 1]))
+
+
+def versioned_model_path(model_dir="model", prefix="churn_model"):
+    version = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return Path(model_dir) / f"{prefix}_v{version}.pkl", version
+
+
+def run_incremental_retraining(
+    base_model_path="model/churn_model.pkl",
+    reference_file="data/bank_churn.csv",
+    new_data_file="data/production_data.csv",
+    mode="grow",
+    n_new_trees=50,
+    window=None,
+    holdout_size=0.2,
+    model_dir="model",
+):
+    """
+    Ré-entraîne incrémentalement le modèle et le compare à un ré-entraînement complet.
+
+    Returns:
+        (modèle incrémental, dict des métriques, temps et chemin de l'artefact écrit)
+    """
+    base_model = joblib.load(base_model_path)
+
+    X_ref, y_ref = load_labeled_data(reference_file)
+    X_new, y_new = load_labeled_data(new_data_file)
+
+    # Holdout pris dans les nouvelles données : c'est la distribution à servir
+    X_new_train, X_holdout, y_new_train, y_holdout = train_test_split(
+        X_new, y_new, test_size=holdout_size, random_state=42, stratify=y_new
+    )
+
+    # -------- Incrémental
+    start = time.perf_counter()
+    incremental_model = grow_forest(
+        base_model, X_new_train, y_new_train, n_new_trees, mode=mode, window=window
+    )
+    incremental_fit_time = time.perf_counter() - start
+
+    # -------- Ré-entraînement complet (référence de comparaison)
+    full_model = clone(base_model).set_params(
+        warm_start=False, n_estimators=len(incremental_model.estimators_)
+    )
+    X_full = pd.concat([X_ref, X_new_train], ignore_index=True)
+    y_full = pd.concat([y_ref, y_new_train], ignore_index=True)
+
+    start = time.perf_counter()
+    full_model.fit(X_full, y_full)
+    full_fit_time = time.perf_counter() - start
+
+    results = {
+        "mode": mode,
+        "n_new_trees": n_new_trees,
+        "n_trees": len(incremental_model.estimators_),
+        "base_model": str(base_model_path),
+        "new_data_file": str(new_data_file),
+        "n_new_rows": len(X_new_train),
+        "n_full_rows": len(X_full),
+        "incremental_fit_time_s": incremental_fit_time,
+        "full_fit_time_s": full_fit_time,
+        "base_auc": evaluate_auc(base_model, X_holdout, y_holdout),
+        "incremental_auc": evaluate_auc(incremental_model, X_holdout, y_holdout),
+        "full_retrain_auc": evaluate_auc(full_model, X_holdout, y_holdout),
+    }
+
+    # -------- Artefact versionné + métadonnées
+    Path(model_dir).mkdir(parents=True, exist_ok=True)
+    model_path, version = versioned_model_path(model_dir)
+    joblib.dump(incremental_model, model_path)
+
+    results["version"] = version
+    results["model_path"] = str(model_path)
+    with open(model_path.with_suffix(".json"), "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    return incremental_model, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ré-entraînement incrémental du modèle de churn")
+    parser.add_argument("--base-model", default="model/churn_model.pkl")
+    parser.add_argument("--reference", default="data/bank_churn.csv")
+    parser.add_argument("--new-data", default="data/production_data.csv")
+    parser.add_argument("--mode", choices=["grow", "rolling"], default="grow")
+    parser.add_argument("--n-new-trees", type=int, default=50)
+    parser.add_argument("--window", type=int, default=None,
+                        help="Taille de la fenêtre en mode rolling (défaut: taille actuelle)")
+    parser.add_argument("--model-dir", default="model")
+    args = parser.parse_args()
+
+    # Import ici : grow_forest & co restent utilisables (et testables) sans MLflow
+    import mlflow
+    import mlflow.sklearn
+
+    # Configuration MLflow
+    mlflow.set_tracking_uri("./mlruns")
+    mlflow.set_experiment("bank-churn-prediction")
+
+    print("=" * 60)
+    print(f"RÉ-ENTRAÎNEMENT INCRÉMENTAL (mode: {args.mode})")
+    print("=" * 60)
+
+    with mlflow.start_run(run_name=f"incremental-rf-{args.mode}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"):
+        model, results = run_incremental_retraining(
+            base_model_path=args.base_model,
+            reference_file=args.reference,
+            new_data_file=args.new_data,
+            mode=args.mode,
+            n_new_trees=args.n_new_trees,
+            window=args.window,
+            model_dir=args.model_dir,
+        )
+
+        mlflow.log_params({
+            "mode": results["mode"],
+            "n_new_trees": results["n_new_trees"],
+            "n_trees": results["n_trees"],
+            "base_model": results["base_model"],
+            "new_data_file": results["new_data_file"],
+        })
+        mlflow.log_metrics({
+            "incremental_fit_time_s": results["incremental_fit_time_s"],
+            "full_fit_time_s": results["full_fit_time_s"],
+            "base_auc": results["base_auc"],
+            "incremental_auc": results["incremental_auc"],
+            "full_retrain_auc": results["full_retrain_auc"],
+        })
+        mlflow.log_artifact(str(Path(results["model_path"]).with_suffix(".json")))
+        mlflow.sklearn.log_model(model, "incremental_model")
+        mlflow.set_tags({
+            "environment": "development",
+            "model_type": "RandomForest_Incremental",
+            "version": results["version"],
+        })
+
+    speedup = results["full_fit_time_s"] / max(results["incremental_fit_time_s"], 1e-9)
+
+    print(f"Arbres              : {results['n_trees']} (+{results['n_new_trees']})")
+    print(f"Nouvelles lignes    : {results['n_new_rows']}")
+    print("-" * 60)
+    print(f"{'':20s}{'Fit (s)':>12s}{'AUC holdout':>14s}")
+    print(f"{'Modèle actuel':20s}{'-':>12s}{results['base_auc']:>14.4f}")
+    print(f"{'Incrémental':20s}{results['incremental_fit_time_s']:>12.2f}{results['incremental_auc']:>14.4f}")
+    print(f"{'Ré-entraînement':20s}{results['full_fit_time_s']:>12.2f}{results['full_retrain_auc']:>14.4f}")
+    print("-" * 60)
+    print(f"Accélération        : x{speedup:.1f}")
+    print(f"\n💾 Modèle sauvegardé dans : {results['model_path']}")
+    print("=" * 60)
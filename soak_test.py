@@ -0,0 +1,237 @@
+"""
+Soak test : charge mixte constante pendant des heures sur une instance
+uvicorn locale de app.main, avec détection de croissance mémoire et de
+dérive de latence.
+
+À chaque intervalle :
+  - la charge open-loop (load_generator.run_worker) tourne `--interval` secondes
+  - les percentiles de latence de l'intervalle sont calculés
+  - /debug/memory est échantillonné : RSS, tas Python (tracemalloc), fds,
+    threads, figures matplotlib, handlers de logging, fichiers drift_reports/
+
+En fin de run (et à chaque échantillon dans le JSON), chaque série est
+analysée après la période de chauffe : une métrique qui monte de façon
+régulière (pente positive, majorité de pas croissants, croissance ajustée
+au-delà de la tolérance) est signalée.
+
+Attention : /drift/check écrit un rapport dans drift_reports/ à chaque appel.
+
+Usage :
+    python soak_test.py --hours 4 --rate 50 --interval 60 --output soak_results.json
+    python soak_test.py --duration 600 --interval 30 --model model/churn_model.pkl
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.latency import latency_summary
+from load_generator import arrival_times, parse_mix, run_worker
+
+DEFAULT_SOAK_MIX = "predict=0.9,batch=0.095,drift=0.005"
+
+# Métrique -> (extraction depuis un échantillon, tolérance, relative ?)
+TRACKED_METRICS = {
+    "rss_mb": (lambda s: s["memory"]["rss_bytes"] / 2 ** 20, 0.10, True),
+    "heap_mb": (lambda s: s["memory"]["tracemalloc"]["current_bytes"] / 2 ** 20
+                if s["memory"]["tracemalloc"] else None, 0.10, True),
+    "open_fds": (lambda s: s["memory"]["open_fds"], 5, False),
+    "threads": (lambda s: s["memory"]["threads"], 2, False),
+    "matplotlib_figures": (lambda s: s["memory"]["matplotlib_figures"], 1, False),
+    "logging_handlers": (lambda s: s["memory"]["logging_handlers_total"], 1, False),
+    "drift_report_files": (lambda s: s["memory"]["drift_reports"]["files"], 1, False),
+    "latency_p50_ms": (lambda s: s["latency"].get("latency_ms", {}).get("p50"), 0.25, True),
+    "latency_p99_ms": (lambda s: s["latency"].get("latency_ms", {}).get("p99"), 0.25, True),
+}
+
+
+def detect_trend(times, values, tolerance, relative=True, min_rising_fraction=0.6) -> dict:
+    """
+    Tendance d'une série : pente des moindres carrés, croissance ajustée sur la
+    fenêtre, part des pas croissants. Signalée si la croissance dépasse la
+    tolérance (relative à la première valeur ou absolue) et reste régulière.
+    """
+    points = [(t, v) for t, v in zip(times, values) if v is not None]
+    if len(points) < 4:
+        return {"samples": len(points), "flagged": False, "reason": "pas assez d'échantillons"}
+
+    t = np.array([p[0] for p in points], dtype=np.float64)
+    v = np.array([p[1] for p in points], dtype=np.float64)
+    slope = float(np.polyfit(t, v, 1)[0])
+    growth = slope * (t[-1] - t[0])
+    steps = np.diff(v)
+    moving = steps[steps != 0]
+    rising_fraction = float((moving > 0).mean()) if moving.size else 0.0
+
+    limit = tolerance * abs(v[0]) if relative else tolerance
+    flagged = growth > limit and rising_fraction >= min_rising_fraction
+    return {
+        "samples": len(points),
+        "first": round(float(v[0]), 3),
+        "last": round(float(v[-1]), 3),
+        "slope_per_hour": round(slope * 3600, 4),
+        "fitted_growth": round(growth, 3),
+        "limit": round(limit, 3),
+        "rising_fraction": round(rising_fraction, 3),
+        "flagged": bool(flagged),
+    }
+
+
+def analyze(samples, warmup_fraction=0.2) -> dict:
+    """Tendances de toutes les métriques suivies, période de chauffe exclue"""
+    kept = samples[int(len(samples) * warmup_fraction):]
+    times = [s["elapsed_s"] for s in kept]
+    trends = {}
+    for name, (extract, tolerance, relative) in TRACKED_METRICS.items():
+        trends[name] = detect_trend(times, [extract(s) for s in kept], tolerance, relative)
+    return trends
+
+
+def allocation_growth(samples, top=10) -> list:
+    """Sites d'allocation tracemalloc dont la taille a le plus augmenté (premier -> dernier)"""
+    snapshots = [s["memory"]["tracemalloc"] for s in samples if s["memory"]["tracemalloc"]]
+    if len(snapshots) < 2:
+        return []
+    first = {a["location"]: a["size_bytes"] for a in snapshots[0]["top"]}
+    last = {a["location"]: a["size_bytes"] for a in snapshots[-1]["top"]}
+    growth = [
+        {"location": location, "growth_bytes": size - first.get(location, 0), "size_bytes": size}
+        for location, size in last.items()
+    ]
+    return sorted(growth, key=lambda g: g["growth_bytes"], reverse=True)[:top]
+
+
+def start_server(port, model_path, tracemalloc_frames, log_path):
+    env = dict(os.environ)
+    env.update({
+        "MODEL_PATH": model_path,
+        "DEBUG_ENDPOINTS": "1",
+        "DEBUG_TRACEMALLOC_FRAMES": str(tracemalloc_frames),
+    })
+    log = open(log_path, "w", encoding="utf-8")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    return process, log
+
+
+def wait_ready(url, timeout=120):
+    import httpx
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{url}/ready", timeout=2).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"L'API n'est pas prête après {timeout} s")
+
+
+def run_soak(duration_s, interval_s=60, rate=50, mix=DEFAULT_SOAK_MIX, port=8010,
+             model_path="model/churn_model.pkl", tracemalloc_frames=1, warmup_fraction=0.2,
+             output="soak_results.json", server_log="soak_server.log"):
+    import httpx
+
+    url = f"http://127.0.0.1:{port}"
+    weights = parse_mix(mix)
+    rng = np.random.default_rng(42)
+    process, log = start_server(port, model_path, tracemalloc_frames, server_log)
+    samples = []
+    start = time.time()
+
+    try:
+        wait_ready(url)
+        while time.time() - start < duration_s:
+            times = arrival_times(rate, interval_s)
+            kinds = rng.choice(list(weights), p=list(weights.values()), size=len(times))
+            part = asyncio.run(run_worker(url, times, kinds, seed=len(samples)))
+
+            latencies = [v for values in part["latencies"].values() for v in values]
+            statuses = [s for values in part["statuses"].values() for s in values]
+            memory = httpx.get(f"{url}/debug/memory", timeout=30).json()
+            samples.append({
+                "elapsed_s": round(time.time() - start, 1),
+                "latency": latency_summary(latencies, statuses),
+                "memory": memory,
+            })
+            print_sample(samples[-1])
+            write_results(output, samples, warmup_fraction, interval_s, rate, weights)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        log.close()
+
+    return write_results(output, samples, warmup_fraction, interval_s, rate, weights)
+
+
+def write_results(output, samples, warmup_fraction, interval_s, rate, weights):
+    """Écriture incrémentale : un run interrompu garde ses échantillons et son analyse"""
+    trends = analyze(samples, warmup_fraction)
+    results = {
+        "config": {"interval_s": interval_s, "rate": rate, "mix": weights, "warmup_fraction": warmup_fraction},
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "flagged": [name for name, trend in trends.items() if trend["flagged"]],
+        "trends": trends,
+        "allocation_growth": allocation_growth(samples),
+        "samples": samples,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    return results
+
+
+def print_sample(sample):
+    memory, latency = sample["memory"], sample["latency"].get("latency_ms", {})
+    heap = memory["tracemalloc"]["current_bytes"] / 2 ** 20 if memory["tracemalloc"] else float("nan")
+    print(f"[{sample['elapsed_s']:>8.0f}s] rss={memory['rss_bytes'] / 2 ** 20:7.1f}MB heap={heap:6.1f}MB "
+          f"fds={memory['open_fds']} figs={memory['matplotlib_figures']} "
+          f"handlers={memory['logging_handlers_total']} reports={memory['drift_reports']['files']} "
+          f"p50={latency.get('p50')}ms p99={latency.get('p99')}ms err={sample['latency']['error_rate']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Soak test de l'API de churn")
+    parser.add_argument("--hours", type=float, default=None)
+    parser.add_argument("--duration", type=float, default=600, help="Durée en secondes (ignorée si --hours)")
+    parser.add_argument("--interval", type=float, default=60, help="Secondes de charge entre deux échantillons")
+    parser.add_argument("--rate", type=float, default=50)
+    parser.add_argument("--mix", default=DEFAULT_SOAK_MIX)
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--model", default="model/churn_model.pkl")
+    parser.add_argument("--tracemalloc-frames", type=int, default=1)
+    parser.add_argument("--warmup-fraction", type=float, default=0.2)
+    parser.add_argument("--output", default="soak_results.json")
+    parser.add_argument("--server-log", default="soak_server.log")
+    args = parser.parse_args()
+
+    duration = args.hours * 3600 if args.hours is not None else args.duration
+
+    print("=" * 60)
+    print(f"SOAK TEST : {duration / 3600:.2f} h à {args.rate} req/s (échantillon toutes les {args.interval} s)")
+    print("=" * 60)
+
+    results = run_soak(
+        duration, args.interval, args.rate, args.mix, args.port, args.model,
+        args.tracemalloc_frames, args.warmup_fraction, args.output, args.server_log,
+    )
+
+    print("\nTendances :")
+    for name, trend in results["trends"].items():
+        if "slope_per_hour" in trend:
+            marker = "⚠️ " if trend["flagged"] else "   "
+            print(f"{marker}{name:<20} {trend['first']} -> {trend['last']} "
+                  f"({trend['slope_per_hour']:+}/h, pas croissants {trend['rising_fraction']:.0%})")
+    if results["flagged"]:
+        print(f"\n⚠️ Croissance détectée : {', '.join(results['flagged'])}")
+    else:
+        print("\n✅ Aucune croissance régulière détectée")
+    print(f"Résultats : {args.output}")
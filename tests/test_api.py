@@ -2,6 +2,8 @@
 import sys
 import os
 from unittest.mock import patch
+import asyncio
+import json
 import numpy as np
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -32,4 +34,825 @@ def test_predict_with_mock():
         
         response = client.post("/predict", json=TEST_CUSTOMER)
         # Le test passe si l'API traite la requête
-        assert response.status_code in [200, 422, 503]
\ No newline at end of file
+        assert response.status_code in [200, 422, 503]
+
+def _train_small_forest(n_estimators=60):
+    """Petite forêt entraînée sur des données synthétiques (ordre FEATURE_COLUMNS)"""
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(0)
+    n = 2000
+    X = np.column_stack([
+        rng.integers(300, 851, n), rng.integers(18, 80, n), rng.integers(0, 11, n),
+        rng.uniform(0, 200000, n), rng.integers(1, 5, n), rng.integers(0, 2, n),
+        rng.integers(0, 2, n), rng.uniform(20000, 150000, n),
+        rng.integers(0, 2, n), rng.integers(0, 2, n),
+    ]).astype(float)
+    y = (rng.random(n) < (1 - X[:, 6]) * 0.4 + (X[:, 4] == 1) * 0.3).astype(int)
+    return RandomForestClassifier(n_estimators=n_estimators, max_depth=8, random_state=42).fit(X, y), X
+
+
+def test_grow_forest_modes_leave_base_model_unchanged():
+    """grow ajoute N arbres, rolling garde la fenêtre ; le modèle de base n'est pas modifié"""
+    import pytest
+    from retrain_incremental import grow_forest
+
+    forest, X = _train_small_forest(n_estimators=20)
+    base_trees = list(forest.estimators_)
+    y_new = (X[:500, 6] == 0).astype(int)
+
+    grown = grow_forest(forest, X[:500], y_new, 10, mode="grow")
+    assert len(grown.estimators_) == 30 and grown.estimators_[0] is not base_trees[0]
+
+    rolled = grow_forest(forest, X[:500], y_new, 10, mode="rolling", window=15)
+    assert len(rolled.estimators_) == 15
+    # Les 5 plus récents des anciens arbres sont gardés, les 10 nouveaux ajoutés en fin
+    np.testing.assert_array_equal(rolled.estimators_[0].predict(X[:50]), base_trees[15].predict(X[:50]))
+
+    with pytest.raises(ValueError, match="deux classes"):
+        grow_forest(forest, X[:500], np.zeros(500), 10)
+
+    assert forest.estimators_ == base_trees and forest.n_estimators == 20 and not forest.warm_start
+
+
+def test_ooc_chunks_holdout_and_streaming_metrics(tmp_path):
+    """Holdout indépendant de la taille des morceaux ; comptes de classes et AUC par histogrammes"""
+    from sklearn.metrics import roc_auc_score
+    from generate_data import generate_bank_data
+    from train_model_ooc import collect_statistics, histogram_auc, iter_chunks
+
+    df = generate_bank_data(2500)
+    df.to_csv(tmp_path / "bank.csv", index=False)
+
+    small, large = list(iter_chunks(tmp_path / "bank.csv", 7, 5)), list(iter_chunks(tmp_path / "bank.csv", 1000, 5))
+    for i in range(3):
+        np.testing.assert_array_equal(np.concatenate([c[i] for c in small]), np.concatenate([c[i] for c in large]))
+    is_holdout = np.concatenate([c[2] for c in small])
+    assert is_holdout.sum() == 500 and is_holdout[::5].all()
+
+    n_rows, class_counts, sample = collect_statistics(tmp_path / "bank.csv", 300, 5, sample_size=100)
+    assert n_rows == 2000 and len(sample) == 100
+    assert class_counts.tolist() == np.bincount(df["Exited"].to_numpy()[~is_holdout], minlength=2).tolist()
+
+    rng = np.random.default_rng(0)
+    y, proba = rng.integers(0, 2, 5000), rng.random(5000)
+    proba = np.clip(proba + 0.2 * y, 0, 1)
+    bins = np.minimum((proba * 10_000).astype(int), 9_999)
+    hists = [np.bincount(bins[y == label], minlength=10_000) for label in (0, 1)]
+    assert abs(histogram_auc(hists[1], hists[0]) - roc_auc_score(y, proba)) < 1e-3
+
+
+def test_compress_model_selects_smallest_variant_within_tolerance(tmp_path):
+    """Variantes élaguées / ré-entraînées mesurées ; la plus petite dans la tolérance d'AUC est retenue"""
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+    from compress_model import compress_model, forest_of
+    from generate_data import generate_bank_data
+
+    df = generate_bank_data(3000)
+    df.to_csv(tmp_path / "bank.csv", index=False)
+    base = RandomForestClassifier(n_estimators=20, random_state=42)
+    base.fit(df.drop("Exited", axis=1).to_numpy(), df["Exited"].to_numpy())
+    joblib.dump(base, tmp_path / "model.pkl")
+
+    report, selected, variants = compress_model(
+        tmp_path / "model.pkl", tmp_path / "bank.csv", tree_counts=(5, 10, 50), depth_caps=(4,),
+        auc_tolerance=0.02,
+    )
+    assert {"base_trees20", "base_trees5", "depth4_trees10"} <= set(report.index)
+    assert "base_trees50" not in report.index   # pas plus d'arbres que le modèle de base
+    assert len(forest_of(variants["base_trees5"]).estimators_) == 5 and len(base.estimators_) == 20
+
+    within = report[report["roc_auc"] >= report.loc["base_trees20", "roc_auc"] - 0.02]
+    assert report.loc[selected, "within_tolerance"]
+    assert report.loc[selected, "size_kb"] == within["size_kb"].min()
+    assert report["size_kb"].is_monotonic_increasing
+
+
+def test_early_exit_matches_exact_tiers():
+    """L'early exit donne les mêmes niveaux de risque que la probabilité exacte"""
+    from app.early_exit import EarlyExitScorer
+    from app.utils import risk_level
+
+    forest, X = _train_small_forest()
+    scorer = EarlyExitScorer(forest, delta=0.001)
+    estimate, evaluated = scorer.predict(X[:500])
+    exact = forest.predict_proba(X[:500])[:, 1]
+
+    agreement = np.mean([risk_level(a) == risk_level(b) for a, b in zip(estimate, exact)])
+    assert agreement >= 0.99
+    assert evaluated.max() <= scorer.n_trees
+    assert evaluated.mean() < scorer.n_trees
+    full = evaluated == scorer.n_trees
+    np.testing.assert_allclose(estimate[full], exact[full])
+
+    # Forêt warm start (anciens arbres en tête, nouveaux en fin) : ordre stocké non échangeable
+    from retrain_incremental import grow_forest
+    y_new = (X[:, 6] == 1).astype(int)   # relation inversée sur les nouvelles données
+    grown = grow_forest(forest, X, y_new, 60)
+    estimate, _ = EarlyExitScorer(grown, delta=0.001).predict(X[:500])
+    exact = grown.predict_proba(X[:500])[:, 1]
+    assert np.mean([risk_level(a) == risk_level(b) for a, b in zip(estimate, exact)]) >= 0.99
+
+
+def test_predict_tier_endpoint():
+    """/predict/tier renvoie le niveau de risque et le nombre d'arbres évalués"""
+    forest, _ = _train_small_forest()
+    with patch('app.main.model', forest):
+        response = client.post("/predict/tier", json=TEST_CUSTOMER)
+        assert response.status_code == 200
+        body = response.json()
+        assert body["risk_level"] in ["Low", "Medium", "High"]
+        assert 1 <= body["trees_evaluated"] <= body["total_trees"] == 60
+
+        response = client.post("/predict", json=TEST_CUSTOMER)
+        exact = forest.predict_proba(np.array([list(TEST_CUSTOMER.values())]))[0][1]
+        assert response.json()["churn_probability"] == round(exact, 4)
+
+
+def test_predict_batch_vectorized():
+    """/predict/batch score tout le batch en un appel et garde l'ordre des lignes"""
+    forest, X = _train_small_forest()
+    customers = [dict(zip(TEST_CUSTOMER.keys(), row)) for row in X[:40].tolist()]
+    with patch('app.main.model', forest):
+        response = client.post("/predict/batch", json=customers)
+    assert response.status_code == 200
+    expected = forest.predict_proba(X[:40])[:, 1]
+    got = [p["churn_probability"] for p in response.json()["predictions"]]
+    np.testing.assert_allclose(got, np.round(expected, 4))
+
+
+def test_inference_executor_queues():
+    """Les petites requêtes vont dans la file interactive, les gros batchs en bulk"""
+    from app.inference import InferenceExecutor, pin_model_threads
+
+    executor = InferenceExecutor(bulk_threshold=16)
+    assert executor.queue_for(1) == "interactive"
+    assert executor.queue_for(500) == "bulk"
+
+    forest, _ = _train_small_forest()
+    forest.n_jobs = -1
+    assert pin_model_threads(forest, 1).n_jobs == 1
+
+
+def test_admission_priority_and_shedding():
+    """Une classe saturée rejette, et drift est délesté quand predict attend"""
+    from app.admission import AdmissionController
+
+    async def scenario():
+        controller = AdmissionController(
+            [("predict", 0, 1, 1), ("drift", 2, 1, 1)], total_concurrency=1, queue_timeout=0.05
+        )
+        assert await controller.acquire("predict")
+        waiting = asyncio.ensure_future(controller.acquire("predict"))
+        await asyncio.sleep(0)
+        assert not await controller.acquire("predict")   # file pleine
+        assert not await controller.acquire("drift")     # predict prioritaire en attente
+        controller.release("predict")
+        assert await waiting
+        stats = controller.stats()["classes"]
+        assert stats["predict"]["rejected"] == 1 and stats["drift"]["rejected"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_admission_rejects_with_retry_after():
+    """Au-delà des limites, /predict répond 503 avec Retry-After"""
+    from app.main import admission
+
+    route = admission.classes["predict"]
+    limits = route.max_concurrency, route.max_queue
+    route.max_concurrency, route.max_queue = 0, 0
+    try:
+        response = client.post("/predict", json=TEST_CUSTOMER)
+    finally:
+        route.max_concurrency, route.max_queue = limits
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == str(admission.retry_after)
+    assert client.get("/admission/stats").json()["classes"]["predict"]["rejected"] >= 1
+
+
+def test_readiness_after_warm_up(tmp_path):
+    """/ready répond 503 pendant le démarrage puis 200 après chargement + warm-up"""
+    import joblib
+    import app.main as main
+
+    assert client.get("/ready").status_code == 503
+
+    forest, _ = _train_small_forest()
+    model_path = tmp_path / "model.pkl"
+    joblib.dump(forest, model_path)
+    with patch.object(main, "MODEL_PATH", str(model_path)), \
+            patch.object(main, "model", None), \
+            patch.object(main, "early_exit_scorer", None), \
+            patch.object(main, "ready", False):
+        asyncio.run(main.load_and_warm_up())
+        response = client.get("/ready")
+        assert response.status_code == 200
+        timings = response.json()["startup_timings"]
+        assert {"imports_s", "model_load_s", "warmup_s"} <= set(timings)
+
+
+def test_shadow_evaluator_compares_and_drops():
+    """Le shadow compare les deux modèles et abandonne le travail quand la file est pleine"""
+    from app.shadow import ShadowEvaluator
+
+    forest, X = _train_small_forest()
+    primary = forest.predict_proba(X[:20])[:, 1]
+
+    evaluator = ShadowEvaluator(forest, max_queue=1)
+    assert evaluator.submit(X[:20], primary, 0.001)
+    assert not evaluator.submit(X[:20], primary, 0.001)   # file pleine, pas de blocage
+    evaluator.start()
+    evaluator.stop()
+
+    stats = evaluator.stats()
+    assert stats["dropped"] == 1
+    assert stats["rows_compared"] == 20
+    assert stats["agreement_rate"] == 1.0
+    assert stats["max_abs_delta"] == 0.0
+
+
+def test_optimized_feature_adapter_columns():
+    """L'adaptateur reproduit les colonnes du modèle optimisé (train_model_mod.py)"""
+    from sklearn.preprocessing import StandardScaler
+    from app.shadow import ENGINEERED_COLUMNS, SCALED_COLUMNS, OptimizedFeatureAdapter
+
+    _, X = _train_small_forest()
+    adapter = OptimizedFeatureAdapter(StandardScaler(), 100000.0, 85000.0)
+    adapter.scaler.fit(np.zeros((2, len(SCALED_COLUMNS))))
+    features = adapter(np.array([list(TEST_CUSTOMER.values())], dtype=float))
+    assert list(features.columns) == ENGINEERED_COLUMNS
+    assert features["Age_25-35"].iloc[0] and not features["Age_35-45"].iloc[0]   # Age 35 : ]25, 35]
+
+
+def test_path_explanations_sum_to_probability():
+    """base_value + somme des contributions = predict_proba de la forêt"""
+    from app.explain import PathExplainer
+
+    forest, X = _train_small_forest()
+    probas, contributions = PathExplainer(forest).explain(X[:300])
+    np.testing.assert_allclose(probas, forest.predict_proba(X[:300])[:, 1], atol=1e-9)
+    assert contributions.shape == (300, 10)
+
+
+def test_explain_endpoint():
+    """/explain renvoie une contribution par feature"""
+    forest, _ = _train_small_forest()
+    with patch('app.main.model', forest):
+        response = client.post("/explain", json=TEST_CUSTOMER)
+        batch = client.post("/explain/batch", json=[TEST_CUSTOMER] * 3)
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body["contributions"]) == set(TEST_CUSTOMER)
+    assert abs(body["base_value"] + sum(body["contributions"].values()) - body["churn_probability"]) < 1e-3
+    assert batch.json()["count"] == 3
+
+
+def test_whatif_surface_matches_individual_predictions():
+    """/whatif score toute la grille d'un coup, identique aux appels unitaires"""
+    forest, _ = _train_small_forest()
+    grid = {"NumOfProducts": [1, 2, 3, 4], "IsActiveMember": [0, 1]}
+    with patch('app.main.model', forest):
+        response = client.post("/whatif", json={"customer": TEST_CUSTOMER, "grid": grid})
+        invalid = client.post("/whatif", json={"customer": TEST_CUSTOMER, "grid": {"CreditScore": [900]}})
+    assert response.status_code == 200
+    surface = np.array(response.json()["surface"])
+    assert surface.shape == (4, 2)
+
+    variant = dict(TEST_CUSTOMER, NumOfProducts=3, IsActiveMember=0)
+    expected = forest.predict_proba(np.array([list(variant.values())], dtype=float))[0][1]
+    assert surface[2, 0] == round(expected, 4)
+    assert invalid.status_code == 422
+
+
+def test_whatif_batch_ice_curves():
+    """/whatif/batch renvoie une courbe ICE par client et la dépendance partielle"""
+    forest, _ = _train_small_forest()
+    customers = [TEST_CUSTOMER, dict(TEST_CUSTOMER, Age=70)]
+    with patch('app.main.model', forest):
+        response = client.post("/whatif/batch", json={
+            "customers": customers, "grid": {"Balance": [0, 50000, 100000]}
+        })
+    body = response.json()
+    assert body["count"] == 2 and len(body["curves"][1]["surface"]) == 3
+    np.testing.assert_allclose(
+        body["partial_dependence"],
+        np.mean([c["surface"] for c in body["curves"]], axis=0), atol=1e-4
+    )
+
+
+def test_counterfactual_search_finds_smallest_change():
+    """Le plus petit nombre de changements est retenu, les sur-ensembles ne sont pas évalués"""
+    from app.counterfactual import CounterfactualSearch
+    from app.utils import FEATURE_COLUMNS
+
+    active = FEATURE_COLUMNS.index("IsActiveMember")
+    products = FEATURE_COLUMNS.index("NumOfProducts")
+
+    def predict_fn(X):
+        return 0.68 - 0.25 * X[:, active] - 0.1 * (X[:, products] - 1)
+
+    inactive = dict(TEST_CUSTOMER, IsActiveMember=0, NumOfProducts=1)
+    X = np.array([list(inactive.values()), list(dict(inactive, IsActiveMember=1, NumOfProducts=3).values())], dtype=float)
+    results = CounterfactualSearch(predict_fn).search(X, budget_s=1.0)
+
+    # Aucun changement unique ne suffit (0.38 au mieux) : niveau 2, activer + 2 produits
+    found = results[0]
+    assert found["status"] == "found"
+    assert found["recommendation"]["n_changes"] == 2
+    assert found["recommendation"]["changes"]["IsActiveMember"] == {"from": 0.0, "to": 1.0}
+    assert found["recommendation"]["changes"]["NumOfProducts"]["to"] == 3.0
+    assert found["recommendation"]["churn_probability"] < 0.3
+    # Alternative non dominée : plus coûteuse mais plus basse
+    assert found["alternatives"][0]["changes"]["NumOfProducts"]["to"] == 4.0
+    assert results[1]["status"] == "already_low" and results[1]["recommendation"] is None
+
+
+def test_counterfactual_budget_is_per_customer():
+    """Un client coûteux épuise son propre budget sans priver les autres"""
+    import time
+    from app.counterfactual import CounterfactualSearch
+
+    def slow_predict_fn(X):
+        time.sleep(0.005 * len(X))
+        return np.full(len(X), 0.9)
+
+    # 5 candidats au niveau 1 (et davantage ensuite) contre un seul au total
+    expensive = dict(TEST_CUSTOMER, IsActiveMember=0, NumOfProducts=1, HasCrCard=0)
+    cheap = dict(TEST_CUSTOMER, IsActiveMember=1, NumOfProducts=4)
+    X = np.array([list(expensive.values()), list(cheap.values())], dtype=float)
+    expensive_result, cheap_result = CounterfactualSearch(slow_predict_fn).search(X, budget_s=0.02)
+
+    assert expensive_result["status"] == "budget_exhausted"
+    assert expensive_result["recommendation"] is not None
+    assert cheap_result["status"] == "not_found" and cheap_result["candidates_evaluated"] == 1
+
+
+def test_recommend_batch_endpoint():
+    """/recommend/batch renvoie une recommandation par client, dans le budget"""
+    forest, _ = _train_small_forest()
+    customers = [TEST_CUSTOMER, dict(TEST_CUSTOMER, IsActiveMember=0, Age=60)]
+    with patch('app.main.model', forest):
+        response = client.post("/recommend/batch", json={"customers": customers, "budget_ms": 200})
+        invalid = client.post("/recommend", json={"customer": TEST_CUSTOMER, "actionable": ["Age"]})
+    body = response.json()
+    assert response.status_code == 200 and body["count"] == 2
+    assert sum(body["summary"].values()) == 2
+    for result in body["recommendations"]:
+        if result["status"] == "found":
+            assert result["recommendation"]["churn_probability"] < 0.3
+    assert invalid.status_code == 422
+
+    # Une erreur du modèle pendant la recherche est une erreur serveur, pas une 422
+    from unittest.mock import MagicMock
+    broken = MagicMock()
+    broken.predict_proba.side_effect = ValueError("X has 9 features, but model expects 10")
+    with patch('app.main.model', broken):
+        assert client.post("/recommend", json={"customer": TEST_CUSTOMER}).status_code == 500
+
+
+def test_rank_endpoint_matches_full_sort():
+    """/rank renvoie le même top-K qu'un tri complet, par morceaux"""
+    import pandas as pd
+    from app.utils import FEATURE_COLUMNS
+
+    forest, X = _train_small_forest()
+    df = pd.DataFrame(X, columns=FEATURE_COLUMNS)
+    with patch('app.main.model', forest):
+        response = client.post(
+            "/rank", params={"k": 25, "chunk_size": 70},
+            files={"file": ("population.csv", df.to_csv(index=False), "text/csv")}
+        )
+    body = response.json()
+    assert response.status_code == 200 and body["count"] == 25
+    assert body["stats"]["rows_scored"] == len(X) and body["stats"]["chunks"] > 1
+
+    probas = forest.predict_proba(X)[:, 1]
+    expected = np.sort(probas)[::-1][:25]
+    np.testing.assert_allclose([r["churn_probability"] for r in body["ranked"]], np.round(expected, 4))
+    assert body["ranked"][0]["churn_probability"] == round(probas[body["ranked"][0]["id"]], 4)
+
+
+def test_score_lookup_from_mmap_with_live_fallback(tmp_path):
+    """/scores sert la table memory-mappée, ou re-score si la version du modèle diffère"""
+    from app.score_store import ScoreStore, build_score_table, write_score_table
+
+    forest, X = _train_small_forest()
+    ids = np.arange(len(X))[::-1] * 10
+    stored = np.full(len(X), 0.123)
+    write_score_table(tmp_path / "scores.npy", build_score_table(ids, stored, X), "v1")
+    store = ScoreStore.open(tmp_path / "scores.npy")
+    assert isinstance(store.table, np.memmap) and store.lookup(15) is None
+
+    with patch('app.main.model', forest), patch('app.main.score_store', store):
+        with patch('app.main.served_model_version', "v1"):
+            materialized = client.get("/scores/50").json()
+        with patch('app.main.served_model_version', "v2"):
+            live = client.get("/scores/50").json()
+        missing = client.get("/scores/15")
+
+    assert materialized["source"] == "materialized" and materialized["churn_probability"] == 0.123
+    row = X[np.flatnonzero(ids == 50)[0]]
+    assert live["source"] == "live"
+    assert live["churn_probability"] == round(forest.predict_proba(row.reshape(1, -1))[0][1], 4)
+    assert missing.status_code == 404
+
+    # Nouveau run de materialize_scores.py (même version) : la table est rouverte sans redémarrage
+    table_path = str(tmp_path / "scores.npy")
+    with patch('app.main.SCORE_TABLE_PATH', table_path), patch('app.main.score_store', None), \
+            patch('app.main.score_table_mtime', None), patch('app.main.served_model_version', "v1"):
+        assert client.get("/scores/50").json()["churn_probability"] == 0.123
+        write_score_table(table_path, build_score_table(ids, np.full(len(X), 0.456), X), "v1")
+        os.utime(tmp_path / "scores.json", ns=(0, 10 ** 18))
+        assert client.get("/scores/50").json()["churn_probability"] == 0.456
+
+
+def test_materialize_scores_chunked_matches_in_memory_table(tmp_path):
+    """Table écrite par morceaux dans un memmap puis triée : identique à build_score_table"""
+    import joblib
+    import pandas as pd
+    from app.score_store import build_score_table
+    from app.utils import FEATURE_COLUMNS
+    from materialize_scores import materialize_scores
+
+    forest, X = _train_small_forest(n_estimators=10)
+    joblib.dump(forest, tmp_path / "model.pkl")
+    ids = np.random.default_rng(1).permutation(10 * len(X))[:len(X)]
+    df = pd.DataFrame(X, columns=FEATURE_COLUMNS)
+    df.insert(0, "CustomerId", ids)
+    df.to_csv(tmp_path / "customers.csv", index=False)
+
+    metadata = materialize_scores(tmp_path / "model.pkl", tmp_path / "customers.csv",
+                                  tmp_path / "out" / "scores.npy", chunk_size=300)
+    # Référence construite d'un bloc, sur les features telles que relues du CSV
+    X_read = pd.read_csv(tmp_path / "customers.csv")[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    expected = build_score_table(ids, forest.predict_proba(X_read)[:, 1], X_read)
+    assert metadata["rows"] == len(X)
+    assert (np.load(tmp_path / "out" / "scores.npy") == expected).all()
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == ["scores.json", "scores.npy"]
+
+
+def test_cohorts_match_pandas_groupby():
+    """/cohorts donne les mêmes agrégats qu'un groupby pandas par segment"""
+    import pandas as pd
+    from app.utils import FEATURE_COLUMNS
+
+    forest, X = _train_small_forest()
+    df = pd.DataFrame(X, columns=FEATURE_COLUMNS)
+    customers = df.astype({col: int for col in FEATURE_COLUMNS if col not in ("Balance", "EstimatedSalary")})
+    with patch('app.main.model', forest):
+        response = client.post("/cohorts", json=customers.to_dict("records"))
+    body = response.json()
+    assert response.status_code == 200 and body["overall"]["count"] == len(X)
+
+    df["proba"] = forest.predict_proba(X)[:, 1]
+    expected = df.groupby("NumOfProducts")["proba"].agg(["count", "mean"])
+    for products, row in expected.iterrows():
+        segment = body["cohorts"]["NumOfProducts"][str(int(products))]
+        assert segment["count"] == row["count"]
+        assert segment["mean_probability"] == round(row["mean"], 4)
+    for dimension in ("Geography", "IsActiveMember", "AgeBand"):
+        assert sum(s["count"] for s in body["cohorts"][dimension].values()) == len(X)
+    assert sum(body["overall"]["risk_levels"].values()) == len(X)
+
+
+def test_validated_batch_reports_per_row_errors():
+    """Une ligne hors bornes ne rejette plus tout le batch : erreurs par ligne, dans l'ordre"""
+    forest, _ = _train_small_forest()
+    missing_age = {k: v for k, v in TEST_CUSTOMER.items() if k != "Age"}
+    rows = [TEST_CUSTOMER, dict(TEST_CUSTOMER, CreditScore=900), missing_age,
+            dict(TEST_CUSTOMER, NumOfProducts=2.5, Tenure="abc"), dict(TEST_CUSTOMER, Age=70)]
+    from unittest.mock import MagicMock
+
+    shadow = MagicMock()
+    with patch('app.main.model', forest), patch('app.main.shadow', shadow):
+        response = client.post("/predict/validated/batch", json=rows)
+    body = response.json()
+    assert response.status_code == 200
+    assert (body["count"], body["valid"], body["invalid"]) == (5, 2, 3)
+    # Les lignes valides passent aussi par l'évaluation shadow, comme /predict/batch
+    shadow_X, shadow_probas, _ = shadow.submit.call_args.args
+    assert shadow_X.shape == (2, 10) and len(shadow_probas) == 2
+    assert [r["index"] for r in body["results"]] == list(range(5))
+
+    assert body["results"][1]["errors"][0]["type"] == "less_than_equal"
+    assert body["results"][2]["errors"][0] == {"loc": ["Age"], "msg": "Field required", "type": "missing", "input": None}
+    assert {e["loc"][0] for e in body["results"][3]["errors"]} == {"NumOfProducts", "Tenure"}
+    expected = forest.predict_proba(np.array([list(rows[4].values())], dtype=float))[0][1]
+    assert body["results"][4]["churn_probability"] == round(expected, 4)
+
+
+def test_websocket_stream_coalesces_and_tags_results():
+    """/ws/predict renvoie un résultat par id, les enregistrements pipelinés étant regroupés"""
+    forest, _ = _train_small_forest()
+    records = [{"id": f"r{i}", "features": dict(TEST_CUSTOMER, Age=20 + i)} for i in range(40)]
+    records.append({"id": "bad", "features": dict(TEST_CUSTOMER, CreditScore=900)})
+
+    with patch('app.main.model', forest):
+        with client.websocket_connect("/ws/predict") as ws:
+            ws.send_json(records[:20])
+            for record in records[20:]:
+                ws.send_json(record)
+            results, messages = {}, 0
+            while len(results) < len(records):
+                for result in ws.receive_json()["results"]:
+                    results[result["id"]] = result
+                messages += 1
+
+    assert messages < len(records)
+    assert results["bad"]["errors"][0]["type"] == "less_than_equal"
+    expected = forest.predict_proba(np.array([list(records[5]["features"].values())], dtype=float))[0][1]
+    assert results["r5"]["churn_probability"] == round(expected, 4)
+
+
+def test_stream_backpressure_bounds_pending_records():
+    """Un producteur rapide face à un scoreur lent ne dépasse jamais la file bornée"""
+    from starlette.websockets import WebSocketDisconnect
+    from app.streaming import PredictionStream
+
+    class FakeWebSocket:
+        def __init__(self, n_messages):
+            self.incoming = [json.dumps({"id": i, "features": TEST_CUSTOMER}) for i in range(n_messages)]
+            self.sent = []
+
+        async def receive_text(self):
+            if not self.incoming:
+                raise WebSocketDisconnect()
+            return self.incoming.pop(0)
+
+        async def send_text(self, text):
+            self.sent.extend(json.loads(text)["results"])
+
+    async def slow_score(X):
+        await asyncio.sleep(0.005)
+        return np.full(len(X), 0.8)
+
+    ws = FakeWebSocket(500)
+    stream = PredictionStream(ws, slow_score, max_pending=16, max_batch=8, coalesce_s=0)
+    asyncio.run(stream.run())
+
+    assert stream.max_queue_depth <= 16
+    assert [r["id"] for r in ws.sent] == list(range(500))
+    assert stream.batches < 500
+
+
+def test_websocket_binary_frame_ends_session():
+    """Une trame binaire termine la session (1003) et libère la place de connexion"""
+    from app import main as app_main
+
+    forest, _ = _train_small_forest()
+    with patch('app.main.model', forest):
+        with client.websocket_connect("/ws/predict") as ws:
+            ws.send_json({"id": "ok", "features": TEST_CUSTOMER})
+            assert ws.receive_json()["results"][0]["id"] == "ok"
+            ws.send_bytes(b"\x00\x01")
+            message = ws.receive()
+
+    assert message == {"type": "websocket.close", "code": 1003, "reason": ""}
+    assert app_main.ws_connections == 0
+
+
+def test_client_coalesces_chunks_and_retries():
+    """ChurnClient : prédictions unitaires regroupées, morceaux ordonnés, retry sur 503"""
+    from concurrent.futures import ThreadPoolExecutor
+    import httpx
+    from app.client import ChurnAPIError, ChurnClient
+
+    forest, _ = _train_small_forest()
+    calls = []
+
+    class CountingSession:
+        def request(self, method, url, **kwargs):
+            calls.append(url)
+            kwargs.pop("timeout", None)
+            return client.request(method, url, **kwargs)
+
+        def close(self):
+            pass
+
+    customers = [dict(TEST_CUSTOMER, Age=20 + i) for i in range(30)]
+    with patch('app.main.model', forest):
+        with ChurnClient("http://testserver", chunk_size=7, coalesce_ms=50) as api:
+            api.session = CountingSession()
+            with ThreadPoolExecutor(11) as pool:
+                invalid = pool.submit(api.predict, dict(TEST_CUSTOMER, CreditScore=900))
+                singles = list(pool.map(api.predict, customers[:10]))
+            batch = api.predict_batch(customers)
+
+    expected = forest.predict_proba(np.array([list(c.values()) for c in customers], dtype=float))[:, 1]
+    assert [p["churn_probability"] for p in batch] == list(np.round(expected, 4))
+    # Un client invalide dans la fenêtre de regroupement n'échoue que pour son appelant
+    assert [p["churn_probability"] for p in singles] == list(np.round(expected[:10], 4))
+    assert isinstance(invalid.exception(), ChurnAPIError) and invalid.exception().status_code == 422
+    assert len(calls) < 11 + 5 and all(url.endswith("/batch") for url in calls)
+
+    # risk_level calculé par le serveur sur la probabilité brute, pas sur l'arrondi à 4 décimales
+    from unittest.mock import MagicMock
+    boundary = MagicMock()
+    boundary.predict_proba.side_effect = lambda X: np.tile([0.70004, 0.29996], (len(X), 1))
+    with patch('app.main.model', boundary):
+        with ChurnClient("http://testserver") as api:
+            api.session = CountingSession()
+            single, batched = api.predict(TEST_CUSTOMER), api.predict_batch([TEST_CUSTOMER])[0]
+        direct = client.post("/predict", json=TEST_CUSTOMER).json()
+    assert single["churn_probability"] == batched["churn_probability"] == 0.3
+    assert single["risk_level"] == batched["risk_level"] == direct["risk_level"] == "Low"
+
+    class FlakySession:
+        def __init__(self):
+            self.attempts = 0
+
+        def request(self, method, url, **kwargs):
+            self.attempts += 1
+            if self.attempts < 3:
+                return httpx.Response(503, headers={"Retry-After": "0"}, json={"detail": "busy"})
+            return client.get("/")
+
+        def close(self):
+            pass
+
+    with ChurnClient("http://testserver", backoff=0.001, coalesce=False) as api:
+        api.session = FlakySession()
+        assert api.request("GET", "/").status_code == 200
+        assert api.session.attempts == 3
+
+
+def test_load_generator_arrival_schedule():
+    """Taux fixe et rampe : nombre d'arrivées et instants conformes au taux demandé"""
+    from load_generator import arrival_times, parse_mix
+    from app.latency import latency_summary
+
+    constant = arrival_times(100, 10)
+    assert len(constant) == 1000 and np.allclose(np.diff(constant), 0.01)
+
+    ramp = arrival_times(10, 10, ramp_to=110)
+    assert len(ramp) == 600 and (np.diff(ramp) > 0).all() and ramp[-1] <= 10
+    # Deuxième moitié de la rampe plus dense que la première
+    assert (ramp >= 5).sum() > 2 * (ramp < 5).sum()
+
+    assert parse_mix("predict=3,batch=1") == {"predict": 0.75, "batch": 0.25}
+    summary = latency_summary([0.001] * 99 + [0.5], [200] * 99 + [503])
+    assert summary["error_rate"] == 0.01 and summary["latency_ms"]["p50"] == 1.0
+
+
+def test_traffic_recorder_writes_replayable_ndjson(tmp_path):
+    """Le middleware enregistre /predict en NDJSON gzip, relu par replay_traffic"""
+    from fastapi.testclient import TestClient
+    from app.recorder import RecorderMiddleware, TrafficRecorder
+    from replay_traffic import load_recordings
+
+    forest, _ = _train_small_forest()
+    recorder = TrafficRecorder(tmp_path, version_fn=lambda: "v1", rotate_every=2).start()
+    recording_client = TestClient(RecorderMiddleware(app, recorder))
+    with patch('app.main.model', forest):
+        responses = [recording_client.post("/predict", json=dict(TEST_CUSTOMER, Age=30 + i)) for i in range(3)]
+        recording_client.get("/health")
+    recorder.stop()
+
+    records = load_recordings(str(tmp_path))
+    assert len(list(tmp_path.glob("*.ndjson.gz"))) == 2 and len(records) == 3
+    assert [r["response"] for r in records] == [r.text for r in responses]
+    assert json.loads(records[0]["body"])["Age"] == 30 and records[0]["model_version"] == "v1"
+
+
+def test_soak_trend_detection_and_debug_memory(tmp_path):
+    """Croissance régulière signalée, bruit stable ignoré ; /debug/memory désactivé par défaut"""
+    from soak_test import detect_trend
+
+    times = list(range(0, 600, 60))
+    assert detect_trend(times, [100 + 3 * i for i in range(10)], 0.10)["flagged"]
+    assert not detect_trend(times, [100, 102, 99, 101, 100, 102, 99, 101, 100, 101], 0.10)["flagged"]
+
+    assert client.get("/debug/memory").status_code == 404
+    (tmp_path / "report.html").write_text("x")
+    with patch('app.main.DEBUG_ENDPOINTS', True), patch('app.main.DRIFT_REPORTS_DIR', tmp_path):
+        snapshot = client.get("/debug/memory").json()
+    assert snapshot["drift_reports"] == {"files": 1, "bytes": 1}
+    assert snapshot["rss_bytes"] > 0 and snapshot["logging_handlers_total"] >= 1
+
+
+def test_benchmark_compare_flags_regressions():
+    """La comparaison à la référence signale débit et p99 hors tolérance, pas le bruit"""
+    from benchmark_serving import compare, summarize
+
+    baseline = {"benchmarks": {
+        "predict_proba/100": summarize([0.010] * 100, 100),
+        "api/predict": summarize([0.005] * 100, 1),
+        "features_to_array/1": summarize([0.00001] * 100, 1),
+        "predict_proba/100000": summarize([0.5] * 5, 100000),
+        "api/predict_batch/1000": summarize([0.2] * 5, 1000),
+    }}
+    current = {"benchmarks": {
+        "predict_proba/100": summarize([0.011] * 100, 100),
+        "api/predict": summarize([0.005] * 95 + [0.009] * 5, 1),
+        "features_to_array/1": summarize([0.00002] * 100, 1),
+        "validation/pydantic/1": summarize([0.001] * 10, 1),
+        # 5 appels : un seul appel lent ne fait pas un p99, seul p50 est comparé
+        "predict_proba/100000": summarize([0.5] * 4 + [0.9], 100000),
+        "api/predict_batch/1000": summarize([0.2, 0.2] + [0.3] * 3, 1000),
+    }}
+    regressions = compare(current, baseline, tolerance=0.2)
+    assert {(r["benchmark"], r["metric"]) for r in regressions} == {
+        ("api/predict", "p99_ms"), ("features_to_array/1", "throughput_rows_s"),
+        ("api/predict_batch/1000", "p50_ms"), ("api/predict_batch/1000", "throughput_rows_s"),
+    }
+
+
+def test_drift_benchmark_ground_truth_and_no_plot(tmp_path):
+    """Vérité terrain du benchmark de drift ; detect_drift(plot=False) ne produit pas d'image"""
+    from app.drift_detect import detect_drift
+    from benchmark_drift import detection_scores, write_datasets
+
+    reference_file, production_file, features, truth = write_datasets(tmp_path, 5000, 14, "high")
+    assert len(features) == 14 and truth >= {"Age", "Geography_Spain", "Extra_000", "Extra_002"}
+    assert "Extra_001" not in truth
+
+    results = detect_drift(reference_file, production_file, output_dir=tmp_path / "out", plot=False)
+    scores = detection_scores([f for f, r in results.items() if r["drift_detected"]], truth, features)
+    assert scores["recall"] == 1.0 and scores["true_drifted"] == 9
+    assert not list((tmp_path / "out").glob("*.png")) and list((tmp_path / "out").glob("*.json"))
+
+
+def test_training_benchmark_measures_each_configuration(tmp_path):
+    """Une ligne de rapport par configuration, avec temps, taille, latence et AUC"""
+    from benchmark_training import run_benchmark
+
+    (tmp_path / "important.txt").write_text("à garder")
+    report = run_benchmark(rows=(2000,), n_estimators=(10,), max_depth=(5, None), n_jobs=(1,),
+                           log_mlflow=False, workdir=str(tmp_path))
+    # Workdir fourni : seuls les fichiers du benchmark sont supprimés
+    assert [p.name for p in tmp_path.iterdir()] == ["important.txt"]
+    assert list(report.index) == [(2000, 10, 5, 1), (2000, 10, 0, 1)]
+    assert (report["fit_s"] > 0).all() and (report["model_size_mb"] > 0).all()
+    assert report["roc_auc"].between(0.5, 1.0).all()
+    # Arbres non bornés : modèle plus gros sur disque
+    assert report.loc[(2000, 10, 0, 1), "model_size_mb"] > report.loc[(2000, 10, 5, 1), "model_size_mb"]
+
+
+def test_large_data_generator_is_independent_of_worker_count(tmp_path):
+    """Mêmes parts quel que soit le nombre de workers ; recette de generate_data.py"""
+    import pandas as pd
+    from generate_large_data import generate_large_data
+
+    one = generate_large_data(2500, tmp_path / "one", chunk_size=1000, workers=1, customer_ids=True)
+    two = generate_large_data(2500, tmp_path / "two", chunk_size=1000, workers=2, customer_ids=True)
+    assert [p["rows"] for p in one["parts"]] == [1000, 1000, 500]
+    for part in one["parts"]:
+        assert (tmp_path / "one" / part["part"]).read_bytes() == (tmp_path / "two" / part["part"]).read_bytes()
+    assert one["churn_rate"] == two["churn_rate"]
+
+    df = pd.concat(pd.read_csv(tmp_path / "one" / p["part"]) for p in one["parts"])
+    assert list(df["CustomerId"]) == list(range(1, 2501))
+    assert df["CreditScore"].between(300, 849).all() and set(df["Exited"]) == {0, 1}
+
+
+def test_drift_scenario_partitions_follow_trajectories(tmp_path):
+    """Rampe et saut appliqués par partition, identiques quel que soit le nombre de workers"""
+    import pandas as pd
+    from drift_scenario_gen import generate_scenario, trajectory
+
+    assert [trajectory({"type": "linear"}, i, 5) for i in range(5)] == [0, 0.25, 0.5, 0.75, 1]
+    assert trajectory({"type": "seasonal", "period": 4}, 1, 8) == 1.0
+
+    scenario = {
+        "Age": {"type": "linear", "amount": 10},
+        "IsActiveMember": {"type": "step", "at": 0.5, "mix": {"inactive": 1.0}},
+    }
+    manifest = generate_scenario(scenario, tmp_path / "one", periods=3, rows_per_partition=4000, workers=1)
+    generate_scenario(scenario, tmp_path / "two", periods=3, rows_per_partition=4000, workers=2)
+    assert [p["partition"] for p in manifest["partitions"]] == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    assert [p["intensity"] for p in manifest["partitions"]] == [
+        {"Age": 0.0, "IsActiveMember": 0.0}, {"Age": 5.0, "IsActiveMember": 1.0},
+        {"Age": 10.0, "IsActiveMember": 1.0},
+    ]
+
+    frames = [pd.read_csv(tmp_path / "one" / p["path"]) for p in manifest["partitions"]]
+    assert frames[0]["IsActiveMember"].mean() > 0.4 and frames[1]["IsActiveMember"].sum() == 0
+    assert 9 < frames[2]["Age"].mean() - frames[0]["Age"].mean() < 11 and frames[2]["Age"].max() <= 100
+    for p in manifest["partitions"]:
+        assert (tmp_path / "one" / p["path"]).read_bytes() == (tmp_path / "two" / p["path"]).read_bytes()
+
+
+def test_dataset_io_parquet_projection_and_csv_fallback(tmp_path):
+    """Parquet lu à la place du CSV s'il est à jour, projection, itération par row groups"""
+    import pandas as pd
+    from app.dataset_io import convert_to_parquet, dataset_columns, iter_dataset, read_dataset, resolve_dataset
+    from generate_data import generate_bank_data
+
+    csv_path = tmp_path / "bank_churn.csv"
+    df = generate_bank_data(2500)
+    df.to_csv(csv_path, index=False)
+    assert resolve_dataset(csv_path) == csv_path
+
+    result = convert_to_parquet(csv_path, chunk_size=1000)
+    assert result["rows"] == 2500 and result["parquet_bytes"] < result["csv_bytes"]
+    assert resolve_dataset(csv_path) == tmp_path / "bank_churn.parquet"
+    pd.testing.assert_frame_equal(read_dataset(csv_path), df)
+    assert list(read_dataset(csv_path, columns=["Age", "Exited"]).columns) == ["Age", "Exited"]
+    assert [len(c) for c in iter_dataset(csv_path, columns=["Age"], chunk_size=1000)] == [1000, 1000, 500]
+
+    # CSV réécrit après la conversion : le parquet périmé est ignoré
+    os.utime(csv_path, (os.path.getmtime(result["output"]) + 10,) * 2)
+    assert resolve_dataset(csv_path) == csv_path
+    assert dataset_columns(csv_path) == list(df.columns)
@@ -16,12 +16,14 @@ import mlflow.sklearn
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from app.dataset_io import read_dataset
+
 # Configuration MLflow
 mlflow.set_tracking_uri("./mlruns")
 mlflow.set_experiment("bank-churn-prediction")
 
 print("Chargement des donnees...")
-df = pd.read_csv("data/bank_churn.csv")
+df = read_dataset("data/bank_churn.csv")
 
 print(f"Dataset : {len(df)} lignes, {len(df.columns)} colonnes")
 print(f"Taux de churn : {df['Exited'].mean():.2%}")
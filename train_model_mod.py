@@ -20,6 +20,8 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
 
+from app.dataset_io import read_dataset
+
 # Configuration MLflow
 mlflow.set_tracking_uri("./mlruns")
 mlflow.set_experiment("bank-churn-prediction")
@@ -28,7 +30,7 @@ print("="*60)
 print("CHARGEMENT ET PREPROCESSING DES DONNEES")
 print("="*60)
 
-df = pd.read_csv("data/bank_churn.csv")
+df = read_dataset("data/bank_churn.csv")
 
 print(f"Dataset : {len(df)} lignes, {len(df.columns)} colonnes")
 print(f"Taux de churn : {df['Exited'].mean():.2%}")
@@ -0,0 +1,279 @@
+"""
+Entraînement out-of-core pour les datasets plus gros que la mémoire.
+
+Le dataset (parquet ou CSV, voir app/dataset_io.py) est lu par morceaux,
+restreint aux colonnes utiles, et n'est jamais chargé en entier :
+  1. Passe de statistiques : comptage des classes + échantillon uniforme
+     borné (bottom-k sampling) pour calculer les bornes des bins
+  2. Passes d'entraînement : SGDClassifier(log_loss).partial_fit sur les
+     features discrétisées, déséquilibre géré par sample_weight ('balanced')
+     au lieu de lignes synthétiques SMOTE
+  3. Passe d'évaluation sur le holdout (1 ligne sur `holdout_every`) :
+     matrice de confusion et histogrammes des probabilités par classe,
+     cumulés par morceau (mémoire constante, AUC à 1 / AUC_BINS près)
+
+L'artefact est un Pipeline sklearn qui prend les 10 features brutes dans
+l'ordre de l'API : il se charge avec MODEL_PATH sans changement côté API.
+
+Usage :
+    python train_model_ooc.py --data data/bank_churn.csv --chunk-size 100000 --epochs 3
+"""
+import argparse
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import KBinsDiscretizer, OneHotEncoder
+
+from app.dataset_io import iter_dataset
+
+TARGET = "Exited"
+
+FEATURES = [
+    "CreditScore", "Age", "Tenure", "Balance", "NumOfProducts",
+    "HasCrCard", "IsActiveMember", "EstimatedSalary",
+    "Geography_Germany", "Geography_Spain",
+]
+# Features continues discrétisées en bins de quantiles, les autres sont
+# encodées one-hot (faible cardinalité)
+BINNED_FEATURES = ["CreditScore", "Age", "Balance", "EstimatedSalary"]
+ONEHOT_FEATURES = ["Tenure", "NumOfProducts"]
+PASSTHROUGH_FEATURES = ["HasCrCard", "IsActiveMember", "Geography_Germany", "Geography_Spain"]
+# Résolution des histogrammes de probabilités de l'évaluation
+AUC_BINS = 10_000
+
+
+def iter_chunks(path, chunk_size, holdout_every):
+    """
+    Itère sur (X, y, is_holdout) par morceaux.
+
+    Le holdout est déterminé par la position globale de la ligne : il est
+    donc identique à chaque passe sans être stocké.
+    """
+    offset = 0
+    for chunk in iter_dataset(path, columns=FEATURES + [TARGET], chunk_size=chunk_size):
+        X = chunk[FEATURES].to_numpy(dtype=np.float64)
+        y = chunk[TARGET].to_numpy(dtype=np.int64)
+        is_holdout = (np.arange(offset, offset + len(chunk)) % holdout_every) == 0
+        offset += len(chunk)
+        yield X, y, is_holdout
+
+
+def collect_statistics(path, chunk_size, holdout_every, sample_size, seed=42):
+    """
+    Passe 1 : comptage des classes (hors holdout) et échantillon uniforme
+    de `sample_size` lignes en mémoire bornée.
+
+    L'échantillon garde les lignes ayant les plus petites clés aléatoires
+    (bottom-k), ce qui équivaut à un tirage uniforme sans remise.
+    """
+    rng = np.random.default_rng(seed)
+    class_counts = np.zeros(2, dtype=np.int64)
+    sample_X = np.empty((0, len(FEATURES)))
+    sample_keys = np.empty(0)
+    n_rows = 0
+
+    for X, y, is_holdout in iter_chunks(path, chunk_size, holdout_every):
+        X_train, y_train = X[~is_holdout], y[~is_holdout]
+        class_counts += np.bincount(y_train, minlength=2)[:2]
+        n_rows += len(X_train)
+
+        sample_X = np.vstack([sample_X, X_train])
+        sample_keys = np.concatenate([sample_keys, rng.random(len(X_train))])
+        if len(sample_keys) > sample_size:
+            keep = np.argpartition(sample_keys, sample_size)[:sample_size]
+            sample_X, sample_keys = sample_X[keep], sample_keys[keep]
+
+    return n_rows, class_counts, sample_X
+
+
+def build_preprocessor(n_bins):
+    """Transformation positionnelle (les colonnes sont des indices dans FEATURES)"""
+    idx = {name: i for i, name in enumerate(FEATURES)}
+    return ColumnTransformer([
+        ("bins", KBinsDiscretizer(n_bins=n_bins, encode="onehot", strategy="quantile", subsample=None),
+         [idx[c] for c in BINNED_FEATURES]),
+        ("onehot", OneHotEncoder(handle_unknown="ignore"),
+         [idx[c] for c in ONEHOT_FEATURES]),
+        ("passthrough", "passthrough",
+         [idx[c] for c in PASSTHROUGH_FEATURES]),
+    ])
+
+
+def balanced_class_weights(class_counts):
+    """Même formule que class_weight='balanced' : n / (n_classes * n_c)"""
+    return class_counts.sum() / (len(class_counts) * np.maximum(class_counts, 1))
+
+
+def histogram_auc(pos_hist, neg_hist):
+    """
+    ROC AUC à partir des histogrammes de probabilités des positifs et des
+    négatifs : P(score positif > score négatif), ex-aequo dans un bin comptés 1/2
+    """
+    n_pos, n_neg = pos_hist.sum(), neg_hist.sum()
+    if n_pos == 0 or n_neg == 0:
+        return float("nan")
+    neg_below = np.cumsum(neg_hist) - neg_hist
+    return float((pos_hist * (neg_below + 0.5 * neg_hist)).sum() / (n_pos * n_neg))
+
+
+def evaluate_holdout(pipeline, path, chunk_size, holdout_every, threshold=0.5):
+    """Métriques sur le holdout, cumulées morceau par morceau (mémoire constante)"""
+    hists = np.zeros((2, AUC_BINS), dtype=np.int64)
+    confusion = np.zeros((2, 2), dtype=np.int64)   # [vrai, prédit]
+    for X, y, is_holdout in iter_chunks(path, chunk_size, holdout_every):
+        if not is_holdout.any():
+            continue
+        y_true = y[is_holdout]
+        y_proba = pipeline.predict_proba(X[is_holdout])[:, 1]
+        bins = np.minimum((y_proba * AUC_BINS).astype(np.int64), AUC_BINS - 1)
+        for label in (0, 1):
+            hists[label] += np.bincount(bins[y_true == label], minlength=AUC_BINS)
+        np.add.at(confusion, (y_true, (y_proba > threshold).astype(np.int64)), 1)
+
+    (tn, fp), (fn, tp) = confusion
+    n = int(confusion.sum())
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    metrics = {
+        "accuracy": (tp + tn) / n if n else 0.0,
+        "precision": precision,
+        "recall": recall,
+        "f1_score": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        "roc_auc": histogram_auc(hists[1], hists[0]),
+    }
+    return {name: float(value) for name, value in metrics.items()}, n
+
+
+def train_out_of_core(
+    path="data/bank_churn.csv",
+    chunk_size=100_000,
+    epochs=3,
+    n_bins=16,
+    holdout_every=5,
+    sample_size=200_000,
+    alpha=1e-4,
+    seed=42,
+):
+    """
+    Entraîne le Pipeline (préprocessing + SGD) sans charger le dataset entier.
+
+    Returns:
+        (pipeline, dict des paramètres, métriques et temps)
+    """
+    start = time.perf_counter()
+    n_rows, class_counts, sample_X = collect_statistics(
+        path, chunk_size, holdout_every, sample_size, seed
+    )
+    if (class_counts == 0).any():
+        raise ValueError(f"Une des classes est absente des données d'entraînement: {class_counts}")
+
+    preprocessor = build_preprocessor(n_bins).fit(sample_X)
+    weights = balanced_class_weights(class_counts)
+    stats_time = time.perf_counter() - start
+
+    # -------- Passes d'entraînement
+    clf = SGDClassifier(loss="log_loss", alpha=alpha, random_state=seed)
+    rng = np.random.default_rng(seed)
+
+    start = time.perf_counter()
+    for _ in range(epochs):
+        for X, y, is_holdout in iter_chunks(path, chunk_size, holdout_every):
+            X_train, y_train = X[~is_holdout], y[~is_holdout]
+            if len(X_train) == 0:
+                continue
+            order = rng.permutation(len(X_train))
+            X_train, y_train = X_train[order], y_train[order]
+            clf.partial_fit(
+                preprocessor.transform(X_train),
+                y_train,
+                classes=np.array([0, 1]),
+                sample_weight=weights[y_train],
+            )
+    fit_time = time.perf_counter() - start
+
+    pipeline = Pipeline([("preprocess", preprocessor), ("clf", clf)])
+
+    # -------- Évaluation sur le holdout
+    holdout_metrics, n_holdout = evaluate_holdout(pipeline, path, chunk_size, holdout_every)
+
+    results = {
+        "params": {
+            "estimator": "SGDClassifier(log_loss)",
+            "chunk_size": chunk_size,
+            "epochs": epochs,
+            "n_bins": n_bins,
+            "holdout_every": holdout_every,
+            "alpha": alpha,
+            "class_weight": "balanced",
+        },
+        "metrics": {
+            **holdout_metrics,
+            "stats_time_s": stats_time,
+            "fit_time_s": fit_time,
+        },
+        "n_train_rows": int(n_rows),
+        "n_holdout_rows": n_holdout,
+        "class_counts": class_counts.tolist(),
+    }
+    return pipeline, results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entraînement out-of-core du modèle de churn")
+    parser.add_argument("--data", default="data/bank_churn.csv")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--n-bins", type=int, default=16)
+    parser.add_argument("--holdout-every", type=int, default=5,
+                        help="1 ligne sur N est réservée à l'évaluation")
+    parser.add_argument("--output", default="model/churn_model_ooc.pkl")
+    args = parser.parse_args()
+
+    # Import ici : train_out_of_core & co restent utilisables (et testables) sans MLflow
+    import mlflow
+    import mlflow.sklearn
+
+    # Configuration MLflow
+    mlflow.set_tracking_uri("./mlruns")
+    mlflow.set_experiment("bank-churn-prediction")
+
+    print("=" * 60)
+    print("ENTRAÎNEMENT OUT-OF-CORE")
+    print("=" * 60)
+
+    with mlflow.start_run(run_name=f"ooc-sgd-{datetime.now().strftime('%Y%m%d-%H%M%S')}"):
+        pipeline, results = train_out_of_core(
+            path=args.data,
+            chunk_size=args.chunk_size,
+            epochs=args.epochs,
+            n_bins=args.n_bins,
+            holdout_every=args.holdout_every,
+        )
+
+        mlflow.log_params(results["params"])
+        mlflow.log_metrics(results["metrics"])
+        mlflow.sklearn.log_model(pipeline, "ooc_model")
+        mlflow.set_tags({
+            "environment": "development",
+            "model_type": "SGD_OutOfCore",
+            "task": "binary_classification"
+        })
+
+        joblib.dump(pipeline, args.output)
+
+    metrics = results["metrics"]
+    print(f"Lignes d'entraînement : {results['n_train_rows']} (classes: {results['class_counts']})")
+    print(f"Lignes de holdout     : {results['n_holdout_rows']}")
+    print(f"Accuracy  : {metrics['accuracy']:.4f}")
+    print(f"Precision : {metrics['precision']:.4f}")
+    print(f"Recall    : {metrics['recall']:.4f}")
+    print(f"F1 Score  : {metrics['f1_score']:.4f}")
+    print(f"ROC AUC   : {metrics['roc_auc']:.4f}")
+    print(f"Temps     : stats {metrics['stats_time_s']:.2f}s, fit {metrics['fit_time_s']:.2f}s")
+    print("=" * 60)
+    print(f"\n💾 Modèle sauvegardé dans : {args.output}")